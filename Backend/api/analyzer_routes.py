@@ -1,141 +1,287 @@
-from flask import Blueprint, request, jsonify, current_app
-from google import genai
-from google.api_core.exceptions import ResourceExhausted
-import os
-import json
-import re
-import time
-import jwt
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+import json
+import os
 from database.db import db
-from database.models import StartupAnalysis, User
+from database.models import StartupAnalysis
+from api.auth_routes import get_request_user_id
+from llm import gateway, cache, singleflight, schemas, json_stream, breaker
+from ml import predictor, comparables, simulator
 
 load_dotenv(override=True)
 analyzer_bp = Blueprint('analyzer', __name__)
 
-# --- CONFIG ---
-api_key = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=api_key) if api_key else None
-MODEL_ID = "gemini-2.5-flash-lite"
+# --- BATCH CONFIG ---
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "200"))
+BATCH_PARALLELISM = int(os.getenv("BATCH_PARALLELISM", "4"))
+MAX_BATCH_PARALLELISM = int(os.getenv("MAX_BATCH_PARALLELISM", "16"))
+
+def _score_with_ai(prompt):
+    """Ask Gemini to score the pitch. Returns {} if every attempt fails."""
+    for attempt in range(2): # Retry once if the answer had no usable JSON
+        try:
+            # Quota waits and 429/5xx backoff are handled inside the gateway
+            response_text = gateway.generate(prompt)
+            # Extract the scoring JSON, skipping fences and prose around it
+            ai_data = json_stream.parse(response_text, schemas.ANALYZE)
+            if ai_data is not None:
+                cache.put('analyze', prompt, ai_data)
+                return ai_data
+        except gateway.LLMRateLimited as e:
+            print(f"[WARN] Quota exhausted, using fallback score: {e}")
+            break
+        except Exception as e:
+            print(f"[WARN] AI Error: {e}")
+            break
+    return {}
+
+def _local_probabilities(items):
+    """Local RandomForest success probabilities for payloads (None entries if unavailable)."""
+    try:
+        probabilities = predictor.predict_batch(items)
+    except Exception as e:
+        print(f"[WARN] Local model error: {e}")
+        probabilities = None
+    return probabilities if probabilities is not None else [None] * len(items)
+
+def _extract_inputs(data):
+    startup_name = data.get('startupName', 'Startup')
+    raw_funding = float(data.get('funding', 0))
+    market = data.get('marketSize', 'Regional')
+    team = data.get('teamSize', 'Solo Founder')
+    return startup_name, raw_funding, market, team
+
+def score_startup(data, local_probability=None):
+    """Score one pitch: Gemini's rubric score checked by the Python veto rules. Nothing is saved.
+
+    `local_probability` is the RandomForest's estimate when the caller already
+    computed it (batch scoring); otherwise it is predicted here.
+    """
+    # 1. Extract Data
+    startup_name, raw_funding, market, team = _extract_inputs(data)
+    
+    formatted_funding = f"₹{raw_funding:,.0f}"
+
+    # 2. CONSTRUCT THE "VC JUDGE" PROMPT
+    # We give the AI the rubric so it calculates the score itself.
+    prompt = f"""
+    Act as a strict Venture Capitalist. Evaluate this startup:
+    
+    Name: {startup_name}
+    Funding: {formatted_funding}
+    Market Scope: {market}
+    Team Size: {team}
+
+    SCORING RUBRIC (0-100%):
+    - 0-20%: Pocket money (< ₹10k) or hobby projects.
+    - 21-50%: Early stage, low funding (< ₹2L), or risky global goals with small team.
+    - 51-75%: Good regional potential, decent funding (> ₹2L), solo or small team.
+    - 76-95%: High funding (> ₹10L), strong team, or high-growth market fit.
+
+    TASK:
+    1. Calculate a "Success Score" based on the rubric above.
+    2. Write a 2-sentence analysis.
+    3. Provide 3 specific recommendations.
+
+    RETURN JSON ONLY:
+    {{
+        "score": integer,
+        "analysis": "string",
+        "recommendations": ["string", "string", "string"]
+    }}
+    """
+
+    # 3. CALL GEMINI API (identical inputs are served from the cache)
+    ai_data = cache.get('analyze', prompt) or {}
+    # Default Fallback if API fails
+    fallback_score = 10 if raw_funding < 10000 else 50 
+    source = 'ai'
+
+    # While the circuit is open Gemini is skipped entirely and the local model answers
+    if not ai_data and gateway.is_available() and not breaker.is_open():
+        # Concurrent identical pitches share one upstream call
+        ai_data = singleflight.do(cache.make_key(prompt), lambda: _score_with_ai(prompt))
+
+    if local_probability is None:
+        local_probability = _local_probabilities([data])[0]
+    ml_probability = None if local_probability is None else round(local_probability * 100)
+
+    if not ai_data:
+        if ml_probability is not None:
+            fallback_score = ml_probability
+            source = 'local_model'
+            ai_data = {'analysis': "AI analysis is temporarily unavailable. This score comes from our model trained on past startup outcomes."}
+        else:
+            source = 'rules'
+
+    # 4. EXTRACT & VALIDATE SCORE (The "Python Veto")
+    # We take the AI's score, but we double-check it with hard logic.
+    final_score = ai_data.get('score', fallback_score)
+    
+    # VETO 1: The "Pocket Money" Rule
+    if raw_funding < 5000:
+        final_score = min(final_score, 15) # AI cannot give >15% for <5k
+        ai_data['analysis'] = f"Funding of {formatted_funding} is too low for business operations."
+
+    # VETO 2: The "Unrealistic Global" Rule
+    elif market == "Global" and raw_funding < 500000:
+        final_score = min(final_score, 35) # Cap at 35% if global but poor
+
+    # VETO 3: The "Solid Regional" Boost
+    elif market == "Regional" and raw_funding > 100000:
+        final_score = max(final_score, 60) # Ensure at least 60%
+
+    # 5. PREPARE RESPONSE
+    return {
+        "score": final_score,
+        "analysis": ai_data.get('analysis', "Could not generate analysis."),
+        "recommendations": ai_data.get('recommendations', ["Secure funding", "Build MVP"]),
+        "source": source,
+        "ml_probability": ml_probability
+    }
+
+def build_analysis_entry(data, final_result, user_id=None):
+    """Unsaved StartupAnalysis row for a scored pitch."""
+    startup_name, raw_funding, market, _ = _extract_inputs(data)
+    return StartupAnalysis(
+        startup_name=startup_name,
+        funding=raw_funding,
+        market_size=market,
+        ai_result=final_result,
+        features=comparables.pitch_features(data),
+        user_id=user_id
+    )
+
+def run_analysis(data, user_id=None):
+    """Score a pitch and save it (linked to user_id when given). Returns the response body."""
+    final_result = score_startup(data)
+
+    # 6. SAVE TO DATABASE (with optional user linkage)
+    try:
+        new_entry = build_analysis_entry(data, final_result, user_id)
+        db.session.add(new_entry)
+        db.session.commit()
+
+        # Include the analysis ID in response (for sharing)
+        final_result['analysis_id'] = new_entry.id
+        comparables.mark_stale()
+    except Exception as e:
+        db.session.rollback()
+        print(f"[WARN] DB Save Error: {e}")
+
+    return final_result
 
 @analyzer_bp.route('/analyze', methods=['POST', 'OPTIONS'])
 def analyze_startup():
     if request.method == 'OPTIONS': return jsonify({'status': 'ok'}), 200
     try:
         data = request.get_json()
-        
-        # 1. Extract Data
-        startup_name = data.get('startupName', 'Startup')
-        raw_funding = float(data.get('funding', 0))
-        market = data.get('marketSize', 'Regional')
-        team = data.get('teamSize', 'Solo Founder')
-        
-        formatted_funding = f"₹{raw_funding:,.0f}"
-
-        # 2. CONSTRUCT THE "VC JUDGE" PROMPT
-        # We give the AI the rubric so it calculates the score itself.
-        prompt = f"""
-        Act as a strict Venture Capitalist. Evaluate this startup:
-        
-        Name: {startup_name}
-        Funding: {formatted_funding}
-        Market Scope: {market}
-        Team Size: {team}
-
-        SCORING RUBRIC (0-100%):
-        - 0-20%: Pocket money (< ₹10k) or hobby projects.
-        - 21-50%: Early stage, low funding (< ₹2L), or risky global goals with small team.
-        - 51-75%: Good regional potential, decent funding (> ₹2L), solo or small team.
-        - 76-95%: High funding (> ₹10L), strong team, or high-growth market fit.
-
-        TASK:
-        1. Calculate a "Success Score" based on the rubric above.
-        2. Write a 2-sentence analysis.
-        3. Provide 3 specific recommendations.
-
-        RETURN JSON ONLY:
-        {{
-            "score": integer,
-            "analysis": "string",
-            "recommendations": ["string", "string", "string"]
-        }}
-        """
-
-        # 3. CALL GEMINI API
-        ai_data = {}
-        # Default Fallback if API fails
-        fallback_score = 10 if raw_funding < 10000 else 50 
-        
-        if client:
-            for attempt in range(2): # Retry logic
-                try:
-                    response = client.models.generate_content(model=MODEL_ID, contents=prompt)
-                    # Extract JSON from response
-                    match = re.search(r'\{.*\}', response.text, re.DOTALL)
-                    if match:
-                        ai_data = json.loads(match.group())
-                        break 
-                except ResourceExhausted:
-                    print("[WARN] Quota hit, retrying...")
-                    time.sleep(2)
-                except Exception as e:
-                    print(f"[WARN] AI Error: {e}")
-                    break
-
-        # 4. EXTRACT & VALIDATE SCORE (The "Python Veto")
-        # We take the AI's score, but we double-check it with hard logic.
-        final_score = ai_data.get('score', fallback_score)
-        
-        # VETO 1: The "Pocket Money" Rule
-        if raw_funding < 5000:
-            final_score = min(final_score, 15) # AI cannot give >15% for <5k
-            ai_data['analysis'] = f"Funding of {formatted_funding} is too low for business operations."
-
-        # VETO 2: The "Unrealistic Global" Rule
-        elif market == "Global" and raw_funding < 500000:
-            final_score = min(final_score, 35) # Cap at 35% if global but poor
-
-        # VETO 3: The "Solid Regional" Boost
-        elif market == "Regional" and raw_funding > 100000:
-            final_score = max(final_score, 60) # Ensure at least 60%
-
-        # 5. PREPARE RESPONSE
-        final_result = {
-            "score": final_score,
-            "analysis": ai_data.get('analysis', "Could not generate analysis."),
-            "recommendations": ai_data.get('recommendations', ["Secure funding", "Build MVP"])
-        }
-
-        # 6. SAVE TO DATABASE (with optional user linkage)
+        user_id = get_request_user_id()
+        final_result = run_analysis(data, user_id)
         try:
-            # Try to extract user_id from JWT if user is logged in
-            user_id = None
-            auth_header = request.headers.get('Authorization', '')
-            if auth_header.startswith('Bearer '):
-                try:
-                    token = auth_header.split(' ')[1]
-                    secret = current_app.config.get('SECRET_KEY', 'startup_iq_super_secret_key_123')
-                    data_decoded = jwt.decode(token, secret, algorithms=["HS256"])
-                    user_id = data_decoded.get('user_id')
-                except:
-                    pass  # Anonymous user, that's fine
-
-            new_entry = StartupAnalysis(
-                startup_name=startup_name,
-                funding=raw_funding,
-                market_size=market,
-                ai_result=final_result,
-                user_id=user_id
-            )
-            db.session.add(new_entry)
-            db.session.commit()
-
-            # Include the analysis ID in response (for sharing)
-            final_result['analysis_id'] = new_entry.id
+            # Similar startups and how they fared, plus the user's own similar pitches (not this one)
+            final_result['comparables'] = comparables.find(data)
+            if user_id:
+                final_result['similar_analyses'] = comparables.find_own(
+                    data, user_id, exclude_ids=[final_result.get('analysis_id')])
         except Exception as e:
-            print(f"[WARN] DB Save Error: {e}")
-
+            print(f"[WARN] Comparables lookup failed: {e}")
+        try:
+            final_result['simulation'] = simulator.simulate(data)
+        except Exception as e:
+            print(f"[WARN] Simulation failed: {e}")
         return jsonify(final_result), 200
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@analyzer_bp.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Score a cohort of pitches concurrently and stream NDJSON results as they finish.
+
+    Body: a list of /analyze payloads (or {"startups": [...]}). Optional
+    `?parallelism=N` caps concurrent scoring. Each finished item is one line
+    {"index", "result"} or {"index", "error"}. Rows are saved in one bulk
+    insert after the last item, so analysis IDs only appear in the final line
+    ({"done", "scored", "failed", "analysis_ids": {index: id}}). If the
+    stream is cut short, the results scored so far are still saved.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('startups') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Expected a non-empty list of startups"}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Batch is limited to {MAX_BATCH_SIZE} startups"}), 400
+
+    try:
+        parallelism = int(request.args.get('parallelism', BATCH_PARALLELISM))
+    except ValueError:
+        return jsonify({"error": "parallelism must be an integer"}), 400
+    parallelism = max(1, min(parallelism, MAX_BATCH_PARALLELISM, len(items)))
+
+    user_id = get_request_user_id()
+    app = current_app._get_current_object()
+
+    # One vectorized RandomForest pass for the whole cohort
+    valid = [i for i, item in enumerate(items) if isinstance(item, dict)]
+    local = dict(zip(valid, _local_probabilities([items[i] for i in valid])))
+
+    def score_in_context(i):
+        item = items[i]
+        if not isinstance(item, dict):
+            raise ValueError("Each startup must be a JSON object")
+        with app.app_context():
+            return score_startup(item, local.get(i))
+
+    def save(results):
+        """Bulk-insert every scored result; returns {index: analysis_id}."""
+        entries = {i: build_analysis_entry(items[i], result, user_id)
+                   for i, result in enumerate(results) if result is not None}
+        if not entries:
+            return {}
+        try:
+            db.session.add_all(entries.values())
+            db.session.commit()
+            comparables.mark_stale()
+            return {i: entry.id for i, entry in entries.items()}
+        except Exception as e:
+            db.session.rollback()
+            print(f"[WARN] Batch DB Save Error: {e}")
+            return {}
+
+    def generate():
+        results = [None] * len(items)
+        pool = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='batch')
+        finished = False
+        try:
+            futures = {pool.submit(score_in_context, i): i for i in range(len(items))}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                    line = {"index": i, "result": results[i]}
+                except Exception as e:
+                    line = {"index": i, "error": str(e)}
+                yield json.dumps(line) + "\n"
+            finished = True
+        finally:
+            # Client went away: drop whatever has not started yet
+            pool.shutdown(wait=False, cancel_futures=True)
+            if not finished:
+                # Keep what was already scored (and paid for in quota) even though nobody reads the IDs
+                saved = save(results)
+                print(f"[WARN] Batch stream closed early; saved {len(saved)} of {len(items)} results")
+
+        # 6. SAVE ALL ROWS IN ONE BULK INSERT
+        analysis_ids = save(results)
+        scored = sum(result is not None for result in results)
+        yield json.dumps({
+            "done": True,
+            "scored": scored,
+            "failed": len(items) - scored,
+            "analysis_ids": analysis_ids
+        }) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
@@ -40,6 +40,19 @@ def token_required(f):
 
     return decorated
 
+def get_request_user_id():
+    """user_id from the Bearer token if the caller is logged in, else None (no 401)."""
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        try:
+            token = auth_header.split(' ')[1]
+            secret = current_app.config.get('SECRET_KEY', 'startup_iq_super_secret_key_123')
+            data_decoded = jwt.decode(token, secret, algorithms=["HS256"])
+            return data_decoded.get('user_id')
+        except:
+            pass  # Anonymous user, that's fine
+    return None
+
 # --- 1. SIGNUP API ---
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
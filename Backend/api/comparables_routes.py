@@ -0,0 +1,29 @@
+from flask import Blueprint, request, jsonify
+from api.auth_routes import get_request_user_id
+from ml import comparables
+
+comparables_bp = Blueprint('comparables', __name__)
+
+@comparables_bp.route('/comparables', methods=['POST'])
+def find_comparables():
+    """Dataset startups most similar to the pitch (same payload as /analyze), with their outcomes.
+
+    Signed-in users also get `similar_analyses`: their own earlier analyses
+    of other startups, nearest first. `?k=` up to 50.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        k = int(request.args.get('k', comparables.DEFAULT_K))
+    except ValueError:
+        return jsonify({'error': 'k must be an integer'}), 400
+
+    try:
+        body = {'comparables': comparables.find(data, k)}
+        user_id = get_request_user_id()
+        if user_id:
+            body['similar_analyses'] = comparables.find_own(data, user_id, k)
+        return jsonify(body), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,17 +1,106 @@
 from flask import Blueprint, request, jsonify
-from google import genai
-import os
-import json
-import re
-from dotenv import load_dotenv
+from llm import gateway, cache, singleflight, streaming, schemas, json_stream
 
-load_dotenv(override=True)
 competitor_bp = Blueprint('competitors', __name__)
 
-# --- CONFIG ---
-api_key = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=api_key) if api_key else None
-MODEL_ID = "gemini-2.5-flash-lite"
+def get_fallback_competitors(startup_name, industry):
+    """Placeholder landscape used when the AI call fails."""
+    return {
+        "summary": f"Could not complete AI analysis for {startup_name} in {industry}.",
+        "competitors": [
+            {
+                "name": "Market Leader A",
+                "strengths": ["Strong brand", "Large user base"],
+                "weaknesses": ["Slow innovation", "High pricing"],
+                "marketPosition": "Market leader with dominant share",
+                "threatLevel": "High"
+            },
+            {
+                "name": "Emerging Player B",
+                "strengths": ["Innovative product", "Good funding"],
+                "weaknesses": ["Limited reach", "New to market"],
+                "marketPosition": "Growing challenger",
+                "threatLevel": "Medium"
+            }
+        ]
+    }
+
+def _select_competitor_event(path, value):
+    # `summary` once, then one `competitor` event per finished competitor object
+    if path == ('summary',):
+        return 'summary', {"summary": value}
+    if len(path) == 2 and path[0] == 'competitors':
+        return 'competitor', value
+    return None
+
+def _fetch_competitors(prompt):
+    """Call Gemini and parse its JSON. Returns None if no valid document came back."""
+    response_text = gateway.generate(prompt)
+    result = json_stream.parse(response_text, schemas.COMPETITORS)
+    if result is None:
+        return None
+    cache.put('competitors', prompt, result)
+    return result
+
+def build_competitor_prompt(data):
+    startup_name = data.get('startupName', 'Startup')
+    industry = data.get('industry', 'Technology')
+    description = data.get('description', '')
+
+    prompt = f"""
+    Act as a market research analyst. Analyze the competitive landscape for this startup:
+    
+    Startup Name: {startup_name}
+    Industry: {industry}
+    Description: {description}
+    
+    TASK:
+    1. Identify the top 5 real or likely competitors in this space (prefer Indian market competitors if applicable).
+    2. For each competitor, provide:
+       - name: company name
+       - strengths: array of 2-3 key strengths
+       - weaknesses: array of 2-3 key weaknesses
+       - marketPosition: short description of their market position
+       - threatLevel: "High", "Medium", or "Low"
+    3. Write a brief 2-sentence summary of the competitive landscape.
+    
+    RETURN JSON ONLY:
+    {{
+        "summary": "string",
+        "competitors": [
+            {{
+                "name": "string",
+                "strengths": ["string", "string"],
+                "weaknesses": ["string", "string"],
+                "marketPosition": "string",
+                "threatLevel": "High|Medium|Low"
+            }}
+        ]
+    }}
+    """
+    return prompt
+
+def analyze_competitors_result(data):
+    """Competitive landscape for a pitch: cache, then Gemini, then placeholder competitors."""
+    prompt = build_competitor_prompt(data)
+    result = {"summary": "Unable to analyze competitors.", "competitors": []}
+
+    cached = cache.get('competitors', prompt)
+    if cached is not None:
+        return cached
+
+    if gateway.is_available():
+        try:
+            # Concurrent identical requests share one upstream call
+            fetched = singleflight.do(cache.make_key(prompt), lambda: _fetch_competitors(prompt))
+            if fetched is not None:
+                result = fetched
+        except Exception as e:
+            print(f"[WARN] Competitor AI Error: {e}")
+            # Fallback
+            result = get_fallback_competitors(data.get('startupName', 'Startup'), data.get('industry', 'Technology'))
+
+    return result
 
 @competitor_bp.route('/competitors', methods=['POST', 'OPTIONS'])
 def analyze_competitors():
@@ -20,74 +109,16 @@ def analyze_competitors():
 
     try:
         data = request.get_json()
-        startup_name = data.get('startupName', 'Startup')
-        industry = data.get('industry', 'Technology')
-        description = data.get('description', '')
-
-        prompt = f"""
-        Act as a market research analyst. Analyze the competitive landscape for this startup:
-        
-        Startup Name: {startup_name}
-        Industry: {industry}
-        Description: {description}
-        
-        TASK:
-        1. Identify the top 5 real or likely competitors in this space (prefer Indian market competitors if applicable).
-        2. For each competitor, provide:
-           - name: company name
-           - strengths: array of 2-3 key strengths
-           - weaknesses: array of 2-3 key weaknesses
-           - marketPosition: short description of their market position
-           - threatLevel: "High", "Medium", or "Low"
-        3. Write a brief 2-sentence summary of the competitive landscape.
-        
-        RETURN JSON ONLY:
-        {{
-            "summary": "string",
-            "competitors": [
-                {{
-                    "name": "string",
-                    "strengths": ["string", "string"],
-                    "weaknesses": ["string", "string"],
-                    "marketPosition": "string",
-                    "threatLevel": "High|Medium|Low"
-                }}
-            ]
-        }}
-        """
-
-        result = {"summary": "Unable to analyze competitors.", "competitors": []}
 
-        if client:
-            try:
-                response = client.models.generate_content(model=MODEL_ID, contents=prompt)
-                match = re.search(r'\{.*\}', response.text, re.DOTALL)
-                if match:
-                    result = json.loads(match.group())
-            except Exception as e:
-                print(f"[WARN] Competitor AI Error: {e}")
-                # Fallback
-                result = {
-                    "summary": f"Could not complete AI analysis for {startup_name} in {industry}.",
-                    "competitors": [
-                        {
-                            "name": "Market Leader A",
-                            "strengths": ["Strong brand", "Large user base"],
-                            "weaknesses": ["Slow innovation", "High pricing"],
-                            "marketPosition": "Market leader with dominant share",
-                            "threatLevel": "High"
-                        },
-                        {
-                            "name": "Emerging Player B",
-                            "strengths": ["Innovative product", "Good funding"],
-                            "weaknesses": ["Limited reach", "New to market"],
-                            "marketPosition": "Growing challenger",
-                            "threatLevel": "Medium"
-                        }
-                    ]
-                }
+        # ?stream=1 pushes each competitor as soon as the model finishes it
+        if streaming.wants_stream(request):
+            prompt = build_competitor_prompt(data)
+            return streaming.sse_response(streaming.stream_json(
+                'competitors', prompt, schemas.COMPETITORS, _select_competitor_event,
+                get_fallback_competitors(data.get('startupName', 'Startup'), data.get('industry', 'Technology'))
+            ))
 
-        return jsonify(result), 200
+        return jsonify(analyze_competitors_result(data)), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,35 +1,31 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
 from database.db import db
-from database.models import StartupAnalysis
+from database.models import StartupAnalysis, UserStats
 from api.auth_routes import token_required
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+RECENT_LIMIT = 5
+
 @dashboard_bp.route('/user/dashboard', methods=['GET'])
 @token_required
 def get_dashboard(current_user):
     """Get dashboard stats and recent analyses for the logged-in user."""
     try:
-        # Get all analyses for this user
-        analyses = StartupAnalysis.query.filter_by(user_id=current_user.id)\
-            .order_by(StartupAnalysis.created_at.desc()).all()
-        
-        # Calculate stats
-        total = len(analyses)
-        scores = [a.ai_result.get('score', 0) for a in analyses if a.ai_result]
-        avg_score = round(sum(scores) / len(scores), 1) if scores else 0
-        best_score = max(scores) if scores else 0
+        # Stats are kept up to date on every insert/delete: one primary-key lookup
+        stats = db.session.get(UserStats, current_user.id)
+        if stats is None:
+            stats = UserStats(user_id=current_user.id, total=0, scored=0, score_sum=0.0, market_counts={})
 
-        # Recent analyses (last 5)
-        recent = [a.to_dict() for a in analyses[:5]]
+        # Recent analyses (last 5), without loading the ai_result JSON
+        recent = db.session.query(*StartupAnalysis.summary_columns())\
+            .filter(StartupAnalysis.user_id == current_user.id)\
+            .order_by(StartupAnalysis.created_at.desc(), StartupAnalysis.id.desc())\
+            .limit(RECENT_LIMIT).all()
 
         return jsonify({
-            'stats': {
-                'total': total,
-                'avgScore': avg_score,
-                'bestScore': best_score
-            },
-            'recent': recent
+            'stats': stats.to_dict(),
+            'recent': [StartupAnalysis.summary_dict(row) for row in recent]
         }), 200
 
     except Exception as e:
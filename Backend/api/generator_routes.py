@@ -1,24 +1,37 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_cors import cross_origin
-from google import genai  # Updated library
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
 import os
-import json
+import threading
 import time
-from dotenv import load_dotenv
+from database.db import db
+from database.models import IdeaPoolEntry, IdeaCursor
+from api.auth_routes import get_request_user_id
+from llm import gateway, cache, singleflight, schemas, json_stream, breaker
 
-# Load environment variables
 load_dotenv(override=True)
-
 generator_bp = Blueprint('generator', __name__)
 
-# 1. Initialize Client (New SDK)
-api_key = os.getenv("GEMINI_API_KEY")
-client = None
-if api_key:
-    client = genai.Client(api_key=api_key)
+# --- CONFIG ---
+# Ideas are generated ahead of time into a per-topic pool. Each viewer keeps a
+# cursor (the highest pool id they have seen), so serving is one index range
+# read on (topic, id); when fewer than LOW_WATER unseen ideas are left behind
+# the cursor, a background batch of REFILL_BATCH ideas is appended.
+IDEAS_PER_REQUEST = 3
+REFILL_BATCH = int(os.getenv("IDEA_POOL_BATCH", "30"))
+LOW_WATER = int(os.getenv("IDEA_POOL_LOW_WATER", "9"))
+MAX_POOL = int(os.getenv("IDEA_POOL_MAX", "300"))          # newest ideas kept per topic
+REFILL_TIMEOUT_SECONDS = 60     # big batches take longer than a normal call
+CURSOR_TTL_SECONDS = int(os.getenv("IDEA_CURSOR_TTL_DAYS", "30")) * 86400   # idle viewers start over
+CURSOR_SWEEP_SECONDS = 3600
 
-# Using the high-limit lite model for 2026
-MODEL_ID = "gemini-2.5-flash-lite"
+_refilling = set()
+_swept_at = 0.0
+_lock = threading.Lock()
+_executor = None
+_stats = {"served_from_pool": 0, "cold_misses": 0, "refills": 0, "refill_failures": 0}
 
 # --- 🧠 SMART FALLBACK LOGIC ---
 def get_fallback_ideas(topic):
@@ -45,6 +58,175 @@ def get_fallback_ideas(topic):
         }
     ]
 
+def build_ideas_prompt(topic, count=IDEAS_PER_REQUEST, avoid=()):
+    avoid_text = ""
+    if avoid:
+        avoid_text = "Do NOT repeat any of these existing ideas: " + "; ".join(avoid) + "."
+    return f"""
+        Act as a startup consultant. Generate exactly {count} innovative startup ideas in the "{topic}" industry.
+        
+        Categories (cycle through them):
+        1. Hard-Tech/Physical Idea.
+        2. Business Model Innovation.
+        3. Tech-Enabled Solution.
+        {avoid_text}
+
+        Return ONLY a valid JSON array of objects.
+        Format:
+        [
+            {{"name": "Idea Name", "problem": "Statement", "solution": "Description", "audience": "Target"}}
+        ]
+        """
+
+def topic_key(topic):
+    return str(topic or '').strip().lower()[:100]
+
+def name_key(idea):
+    return str(idea.get('name') or '').strip().lower()[:200]
+
+def _viewer():
+    """Whose cursor to advance: the logged-in user, else the browser's persisted X-Client-Id
+    (see IdeaGenerator.jsx), else the client address (ProxyFix in app.py makes that the
+    real client rather than Render's proxy)."""
+    user_id = get_request_user_id()
+    if user_id is not None:
+        return f"user:{user_id}"
+    client = request.headers.get('X-Client-Id') or request.remote_addr or 'anonymous'
+    return f"client:{client}"[:80]
+
+def _bump(name):
+    with _lock:
+        _stats[name] += 1
+
+def _add_to_pool(key, ideas):
+    """Append new ideas (skipping names already pooled) and trim the topic to MAX_POOL."""
+    existing = {name for (name,) in
+                db.session.query(IdeaPoolEntry.name_key).filter(IdeaPoolEntry.topic == key)}
+    now = time.time()
+    added = 0
+    for idea in ideas:
+        name = name_key(idea)
+        if not name or name in existing:
+            continue
+        existing.add(name)
+        try:
+            with db.session.begin_nested():
+                db.session.add(IdeaPoolEntry(topic=key, name_key=name, idea=idea, created_at=now))
+            added += 1
+        except IntegrityError:
+            pass  # a concurrent refill pooled the same idea first
+    oldest_kept = db.session.query(IdeaPoolEntry.id).filter(IdeaPoolEntry.topic == key) \
+        .order_by(IdeaPoolEntry.id.desc()).offset(MAX_POOL - 1).limit(1).scalar()
+    if oldest_kept is not None:
+        IdeaPoolEntry.query.filter(IdeaPoolEntry.topic == key, IdeaPoolEntry.id < oldest_kept) \
+            .delete(synchronize_session=False)
+    db.session.commit()
+    return added
+
+def expire_cursors(now=None):
+    """Delete cursors idle longer than CURSOR_TTL_SECONDS. Returns how many went."""
+    now = now or time.time()
+    removed = IdeaCursor.query.filter(
+        (IdeaCursor.updated_at < now - CURSOR_TTL_SECONDS) | IdeaCursor.updated_at.is_(None)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+def _maybe_expire_cursors():
+    global _swept_at
+    now = time.time()
+    with _lock:
+        if now - _swept_at < CURSOR_SWEEP_SECONDS:
+            return
+        _swept_at = now
+    removed = expire_cursors(now)
+    if removed:
+        print(f"💡 Expired {removed} idle idea cursors")
+
+def _generate_ideas(topic, count, avoid=(), timeout=None):
+    prompt = build_ideas_prompt(topic, count, avoid)
+    response_text = singleflight.do(cache.make_key(prompt), lambda: gateway.generate(prompt, timeout=timeout))
+    ideas = json_stream.parse(response_text, schemas.IDEAS)
+    if not ideas:
+        raise ValueError("AI response did not contain a valid idea list")
+    return ideas
+
+def refill_pool(topic, after_id=0):
+    """Generate one large batch for the topic, unless (e.g. thanks to another
+    worker's refill) there are already enough ideas past `after_id`."""
+    key = topic_key(topic)
+    unseen = IdeaPoolEntry.query.filter(IdeaPoolEntry.topic == key, IdeaPoolEntry.id > after_id) \
+        .limit(IDEAS_PER_REQUEST + LOW_WATER).count()
+    if unseen >= IDEAS_PER_REQUEST + LOW_WATER:
+        return 0
+    recent = [idea['name'] for (idea,) in db.session.query(IdeaPoolEntry.idea).filter(IdeaPoolEntry.topic == key)
+              .order_by(IdeaPoolEntry.id.desc()).limit(REFILL_BATCH)]
+    ideas = _generate_ideas(topic, REFILL_BATCH, recent, REFILL_TIMEOUT_SECONDS)
+    added = _add_to_pool(key, ideas)
+    _bump("refills")
+    print(f"💡 Idea pool for '{topic}' refilled with {added} ideas")
+    return added
+
+def _refill_worker(app, key, topic, after_id):
+    try:
+        with app.app_context():
+            refill_pool(topic, after_id)
+            _maybe_expire_cursors()
+    except Exception as e:
+        _bump("refill_failures")
+        print(f"[WARN] Idea pool refill for '{topic}' failed: {e}")
+    finally:
+        with _lock:
+            _refilling.discard(key)
+
+def _schedule_refill(key, topic, after_id):
+    global _executor
+    if breaker.is_open():
+        return
+    with _lock:
+        if key in _refilling:
+            return
+        _refilling.add(key)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ideas')
+    _executor.submit(_refill_worker, current_app._get_current_object(), key, topic, after_id)
+
+def _advance_cursor(viewer, key, last_id):
+    cursor = db.session.get(IdeaCursor, (viewer, key))
+    if cursor is None:
+        db.session.add(IdeaCursor(viewer=viewer, topic=key, last_id=last_id, updated_at=time.time()))
+    else:
+        cursor.last_id = max(cursor.last_id, last_id)
+        cursor.updated_at = time.time()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Same viewer on two tabs; the other request created the cursor first
+        db.session.rollback()
+
+def pop_ideas(topic, viewer):
+    """Up to IDEAS_PER_REQUEST ideas this viewer has not seen yet, oldest first ([] if none)."""
+    key = topic_key(topic)
+    cursor = db.session.get(IdeaCursor, (viewer, key))
+    last_id = cursor.last_id if cursor else 0
+    # One bounded range read: the ideas to serve plus enough to tell if we are under the low-water mark
+    rows = IdeaPoolEntry.query.filter(IdeaPoolEntry.topic == key, IdeaPoolEntry.id > last_id) \
+        .order_by(IdeaPoolEntry.id).limit(IDEAS_PER_REQUEST + LOW_WATER).all()
+    served = rows[:IDEAS_PER_REQUEST]
+    if len(rows) - len(served) < LOW_WATER:
+        _schedule_refill(key, topic, last_id)
+    if served:
+        _advance_cursor(viewer, key, served[-1].id)
+    return [row.idea for row in served]
+
+def get_pool_stats():
+    with _lock:
+        snapshot = dict(_stats)
+        snapshot["refilling"] = len(_refilling)
+    snapshot["batch"] = REFILL_BATCH
+    snapshot["low_water"] = LOW_WATER
+    return snapshot
+
 @generator_bp.route('/generate_idea', methods=['POST', 'OPTIONS'])
 @cross_origin()
 def generate_idea():
@@ -57,55 +239,29 @@ def generate_idea():
         print(f"📩 Request for Idea Generation: {topic}")
 
         # 2. Check for Client/API Key
-        if not client:
+        if not gateway.is_available():
             print("❌ No API Client initialized. Using Fallback.")
             return jsonify(get_fallback_ideas(topic)), 200
 
-        # 3. Construct the Prompt (Asking for JSON Schema)
-        prompt = f"""
-        Act as a startup consultant. Generate exactly 3 innovative startup ideas in the "{topic}" industry.
-        
-        Categories:
-        1. Hard-Tech/Physical Idea.
-        2. Business Model Innovation.
-        3. Tech-Enabled Solution.
+        # 3. Serve unseen ideas from the pre-generated pool (a refill is queued when it runs low)
+        viewer = _viewer()
+        ideas = pop_ideas(topic, viewer)
+        if len(ideas) == IDEAS_PER_REQUEST:
+            _bump("served_from_pool")
+            return jsonify(ideas), 200
 
-        Return ONLY a valid JSON array of objects.
-        Format:
-        [
-            {{"name": "Idea Name", "problem": "Statement", "solution": "Description", "audience": "Target"}}
-        ]
-        """
-
-        print(f"⚡ ACTIVATING MODEL: {MODEL_ID} ⚡")
-
-        # 4. Call Gemini 2.5 Flash-Lite
+        # 4. Pool empty for this viewer: generate a small batch now (the big refill is already queued)
+        _bump("cold_misses")
+        print(f"⚡ ACTIVATING MODEL: {gateway.MODEL_ID} ⚡")
         try:
-            # Using new generate_content syntax
-            response = client.models.generate_content(
-                model=MODEL_ID,
-                contents=prompt
-            )
-            
-            if not response.text:
-                raise ValueError("Empty response from AI")
-
-            response_text = response.text
-
+            generated = _generate_ideas(topic, IDEAS_PER_REQUEST)
         except Exception as e:
             print(f"⚠️ AI Model Failed: {e}")
-            return jsonify(get_fallback_ideas(topic)), 200
+            return jsonify(ideas or get_fallback_ideas(topic)), 200
 
-        # 5. Clean and Parse Response
-        # Removing potential markdown blocks if AI includes them
-        cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
-        
-        try:
-            ideas_json = json.loads(cleaned_text)
-            return jsonify(ideas_json), 200
-        except json.JSONDecodeError:
-            print("⚠️ Failed to parse AI JSON. Using Fallback.")
-            return jsonify(get_fallback_ideas(topic)), 200
+        _add_to_pool(topic_key(topic), generated)
+        ideas.extend(pop_ideas(topic, viewer))
+        return jsonify(ideas[:IDEAS_PER_REQUEST] or generated), 200
 
     except Exception as e:
         print(f"🔥 Critical Error: {e}")
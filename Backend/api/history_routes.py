@@ -1,20 +1,82 @@
 from flask import Blueprint, request, jsonify
+from datetime import datetime
+import base64
+import json
+from sqlalchemy import tuple_
 from database.db import db
 from database.models import StartupAnalysis
 from api.auth_routes import token_required
 
 history_bp = Blueprint('history', __name__)
 
+# --- CONFIG ---
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(row):
+    """Opaque cursor for the (created_at, id) of the last row on a page."""
+    raw = json.dumps([row.created_at.isoformat(), row.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    created_at, analysis_id = json.loads(raw)
+    return datetime.fromisoformat(created_at), int(analysis_id)
+
+def _parse_date(value, end_of_day=False):
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        # A bare date as the upper bound includes that whole day
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return parsed
+
+def _history_filters(args):
+    """SQL filters from the query string; raises ValueError on bad input."""
+    filters = []
+    if args.get('min_score'):
+        filters.append(StartupAnalysis.score >= float(args['min_score']))
+    if args.get('max_score'):
+        filters.append(StartupAnalysis.score <= float(args['max_score']))
+    markets = args.getlist('market_size')
+    if markets:
+        filters.append(StartupAnalysis.market_size.in_(markets))
+    if args.get('from'):
+        filters.append(StartupAnalysis.created_at >= _parse_date(args['from']))
+    if args.get('to'):
+        filters.append(StartupAnalysis.created_at <= _parse_date(args['to'], end_of_day=True))
+    return filters
+
 @history_bp.route('/user/history', methods=['GET'])
 @token_required
 def get_history(current_user):
-    """Get all analyses for the logged-in user."""
+    """One page of the logged-in user's analyses, newest first, without the ai_result JSON.
+
+    Query params: `limit` (default 20, max 100), `cursor` (the previous page's
+    next_cursor), `min_score`/`max_score`, `market_size` (repeatable) and
+    `from`/`to` (ISO dates). Full results come from /user/history/<id>.
+    """
     try:
-        analyses = StartupAnalysis.query.filter_by(user_id=current_user.id)\
-            .order_by(StartupAnalysis.created_at.desc()).all()
-        
+        limit = max(1, min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        filters = _history_filters(request.args)
+        cursor = request.args.get('cursor')
+        if cursor:
+            # Keyset: strictly after the last row already sent, so pages never shift
+            filters.append(tuple_(StartupAnalysis.created_at, StartupAnalysis.id) < decode_cursor(cursor))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid query parameter: {e}'}), 400
+
+    try:
+        rows = db.session.query(*StartupAnalysis.summary_columns())\
+            .filter(StartupAnalysis.user_id == current_user.id, *filters)\
+            .order_by(StartupAnalysis.created_at.desc(), StartupAnalysis.id.desc())\
+            .limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         return jsonify({
-            'analyses': [a.to_dict() for a in analyses]
+            'analyses': [StartupAnalysis.summary_dict(row) for row in rows],
+            'next_cursor': encode_cursor(rows[-1]) if has_more else None,
+            'has_more': has_more
         }), 200
 
     except Exception as e:
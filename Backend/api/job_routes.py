@@ -0,0 +1,207 @@
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import and_, or_
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import os
+import threading
+import time
+import uuid
+from database.db import db
+from database.models import Job
+from api.auth_routes import get_request_user_id
+from api.analyzer_routes import run_analysis
+from api.canvas_routes import generate_canvas_result
+from api.competitor_routes import analyze_competitors_result
+from api.market_routes import get_market_analysis
+from api.valuation_routes import calculate_valuation_result
+from api.report_routes import run_report
+
+load_dotenv(override=True)
+job_bp = Blueprint('jobs', __name__)
+
+# --- CONFIG ---
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "100"))
+MAX_WAIT_SECONDS = 10   # cap for ?wait= long-polling, well under the worker timeout (gunicorn.conf.py)
+POLL_SECONDS = 0.5      # re-check interval for jobs owned by another worker
+# A job queued or running this long belongs to a worker that died (restart, OOM, timeout kill)
+STALE_JOB_SECONDS = int(os.getenv("STALE_JOB_SECONDS", "900"))
+STALE_JOB_ERROR = 'The worker running this job stopped before it finished; please submit it again'
+
+def _run_market(payload, user_id):
+    industry = payload.get('industry')
+    if not industry:
+        raise ValueError("Industry is required")
+    return get_market_analysis(industry)
+
+# job kind -> fn(payload, user_id) returning the JSON result
+JOB_RUNNERS = {
+    'analyze': run_analysis,
+    'canvas': lambda payload, user_id: generate_canvas_result(payload),
+    'competitors': lambda payload, user_id: analyze_competitors_result(payload),
+    'market': _run_market,
+    'valuation': lambda payload, user_id: calculate_valuation_result(payload),
+    'report': run_report,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+_local_events = {}  # job_id -> Event, for jobs running in this worker
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job')
+    return _executor
+
+def _reserve_slot():
+    global _pending
+    with _pending_lock:
+        if _pending >= MAX_PENDING_JOBS:
+            return False
+        _pending += 1
+        return True
+
+def _release_slot():
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+def _execute(app, job_id):
+    """Worker-thread body: run one job and persist its outcome."""
+    try:
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+
+            try:
+                result = JOB_RUNNERS[job.kind](job.payload or {}, job.user_id)
+                job.status = 'done'
+                job.result = result
+            except Exception as e:
+                print(f"[WARN] Job {job_id} failed: {e}")
+                db.session.rollback()
+                job = db.session.get(Job, job_id)
+                job.status = 'failed'
+                job.error = str(e)
+
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+    except Exception as e:
+        print(f"[ERROR] Job {job_id} could not be recorded: {e}")
+    finally:
+        _release_slot()
+        event = _local_events.pop(job_id, None)
+        if event:
+            event.set()
+
+
+def recover_stale_jobs(app=None):
+    """Mark jobs abandoned by a dead worker as failed. Returns how many were marked.
+
+    Job threads live inside a worker process, so nothing else will ever
+    finish a job whose worker was killed. Runs at startup and whenever a
+    client reads a job that is still pending. Jobs running in this worker
+    are left alone however old they are.
+    """
+    def mark():
+        cutoff = datetime.utcnow() - timedelta(seconds=STALE_JOB_SECONDS)
+        query = Job.query.filter(or_(
+            and_(Job.status == 'queued', Job.created_at < cutoff),
+            and_(Job.status == 'running', Job.started_at < cutoff)
+        ))
+        local = list(_local_events)
+        if local:
+            query = query.filter(Job.id.notin_(local))
+        count = query.update({'status': 'failed', 'error': STALE_JOB_ERROR, 'finished_at': datetime.utcnow()},
+                             synchronize_session=False)
+        db.session.commit()
+        return count
+
+    try:
+        if app is None:
+            return mark()
+        with app.app_context():
+            count = mark()
+            if count:
+                print(f"[WARN] Marked {count} abandoned job(s) as failed")
+            return count
+    except Exception as e:
+        db.session.rollback()
+        print(f"[WARN] Stale job recovery failed: {e}")
+        return 0
+
+
+def _is_stale(job):
+    since = job.started_at if job.status == 'running' else job.created_at
+    return (job.id not in _local_events and since is not None
+            and datetime.utcnow() - since > timedelta(seconds=STALE_JOB_SECONDS))
+
+
+@job_bp.route('/jobs/<string:kind>', methods=['POST'])
+def submit_job(kind):
+    """Queue an AI analysis and return its job ID immediately (202)."""
+    if kind not in JOB_RUNNERS:
+        return jsonify({'error': f"Unknown job type '{kind}'"}), 404
+
+    if not _reserve_slot():
+        return jsonify({'error': 'Too many jobs in progress, try again shortly'}), 503
+
+    try:
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status='queued',
+            payload=request.get_json(silent=True) or {},
+            user_id=get_request_user_id()
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        _local_events[job.id] = threading.Event()
+        _get_executor().submit(_execute, current_app._get_current_object(), job.id)
+    except Exception as e:
+        _release_slot()
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify(job.to_dict()), 202, {'Location': f"/api/jobs/{job.id}"}
+
+
+@job_bp.route('/jobs/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status/result. `?wait=N` long-polls up to N seconds (max 10) for it to finish."""
+    try:
+        wait = min(float(request.args.get('wait', 0)), MAX_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+
+    try:
+        job = db.session.get(Job, job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.status in ('queued', 'running') and _is_stale(job):
+            recover_stale_jobs()
+            db.session.refresh(job)
+
+        deadline = time.monotonic() + wait
+        while job.status in ('queued', 'running'):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            event = _local_events.get(job_id)
+            if event:
+                event.wait(remaining)
+            else:
+                time.sleep(min(POLL_SECONDS, remaining))
+            db.session.refresh(job)
+
+        return jsonify(job.to_dict()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
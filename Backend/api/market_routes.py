@@ -1,30 +1,338 @@
-from flask import Blueprint, request, jsonify
-from google import genai  # Modern 2026 SDK
-import os
-import json
+from flask import Blueprint, request, jsonify, current_app
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+import os
+import socket
+import threading
+import time
+from database.db import db
+from database.models import MarketReport, WorkerLease
+from llm import gateway, cache, singleflight, streaming, schemas, json_stream, breaker
 
-# Ensure environment variables are loaded
 load_dotenv(override=True)
-
 market_bp = Blueprint('market', __name__)
 
-# --- CONFIGURATION ---
-api_key = os.getenv("GEMINI_API_KEY")
+# --- CONFIG ---
+# Popular industries are re-analysed in the background shortly before their
+# report expires, so they are always answered from `market_reports`. Any other
+# stored report past its TTL is served as-is while a refresh runs behind it.
+# `market_reports` is the only store for these reports (the LLM cache is not
+# used), and request demand is counted there directly. Every worker runs a
+# prewarm thread, but only the holder of the `market-prewarm` lease ticks,
+# so one worker picks the top industries and refreshes them.
+PREWARM_ENABLED = os.getenv("MARKET_PREWARM_ENABLED", "true").lower() in ("1", "true", "yes")
+PREWARM_TOP_N = int(os.getenv("MARKET_PREWARM_TOP_N", "8"))
+PREWARM_INTERVAL_SECONDS = int(os.getenv("MARKET_PREWARM_INTERVAL_SECONDS", "300"))
+PREWARM_LEAD_SECONDS = int(os.getenv("MARKET_PREWARM_LEAD_SECONDS", "1800"))  # refresh this long before expiry
+PREWARM_MIN_DEMAND = 2.0            # decayed requests before an industry is kept warm
+DEMAND_HALF_LIFE_SECONDS = 86400
+MAX_STALE_SECONDS = int(os.getenv("MARKET_MAX_STALE_SECONDS", str(7 * 86400)))  # older reports are not served
+REPORT_TTL_SECONDS = cache.ttl_for('market')
+PREWARM_LEASE = 'market-prewarm'
+PREWARM_LEASE_SECONDS = 2 * PREWARM_INTERVAL_SECONDS   # the holder renews it every tick
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+_refreshing = set()      # keys with a background refresh queued or running in this worker
+_lock = threading.Lock()
+_executor = None
+_scheduler = None
+_stats = {
+    "report_hits": 0,
+    "stale_served": 0,
+    "refreshes": 0,
+    "refresh_failures": 0,
+    "prewarm_runs": 0,
+    "prewarm_skipped": 0,
+}
+
+def get_fallback_market(industry):
+    """Mock market data served when Gemini is overloaded or unreachable."""
+    return {
+        "summary": f"Analysis for {industry} (MOCK DATA - AI Service Currently Overloaded).",
+        "growth_trend": [
+            {"year": "2021", "market_size": 10}, {"year": "2022", "market_size": 20},
+            {"year": "2023", "market_size": 35}, {"year": "2024", "market_size": 50},
+            {"year": "2025", "market_size": 80}
+        ],
+        "sentiment_distribution": [
+            {"name": "Positive", "value": 60},
+            {"name": "Neutral", "value": 30},
+            {"name": "Negative", "value": 10}
+        ],
+        "trending_startups_heatmap": [
+            {
+                "name": f"{industry} Automator", 
+                "subtitle": "AI-driven operational efficiency", 
+                "competition": "High", 
+                "avgFunding": "₹15Cr", 
+                "successRate": 72
+            },
+            {
+                "name": f"NextGen {industry}", 
+                "subtitle": "Blockchain verified transactions", 
+                "competition": "Medium", 
+                "avgFunding": "₹5Cr", 
+                "successRate": 85
+            }
+        ]
+    }
+
+def _select_market_event(path, value):
+    # Chart sections arrive whole; heatmap entries are pushed one at a time
+    if len(path) == 2 and path[0] == 'trending_startups_heatmap':
+        return 'heatmap', value
+    if len(path) == 1 and path[0] != 'trending_startups_heatmap':
+        return 'section', {"key": path[0], "value": value}
+    return None
 
-# Initialize the new Client
-# The client will automatically use the API key for all requests in this blueprint
-client = None
-if api_key:
-    client = genai.Client(api_key=api_key)
+def _fetch_market(prompt):
+    """Call Gemini and parse the market JSON (raises if no valid document came back)."""
+    response_text = gateway.generate(prompt)
 
-# We use Flash-Lite for better speed and higher daily limits
-MODEL_ID = "gemini-2.5-flash-lite"
+    # Gemini often wraps JSON in markdown blocks like ```json ... ```; the parser skips them
+    market_data = json_stream.parse(response_text, schemas.MARKET)
+    if market_data is None:
+        raise ValueError("AI response did not contain valid market JSON")
+    return market_data
+
+def industry_key(industry):
+    return str(industry or '').strip().lower()[:100]
+
+def _bump(name):
+    with _lock:
+        _stats[name] += 1
+
+def _upsert_report(conn, key, label, values, insert_values=None):
+    """UPDATE the industry's row, or INSERT it if no worker has created it yet."""
+    table = MarketReport.__table__
+    if conn.execute(table.update().where(table.c.industry == key).values(**values)).rowcount:
+        return
+    row = {'industry': key, 'label': label[:100], 'demand': 0.0, 'decayed_at': time.time()}
+    row.update(insert_values or values)
+    try:
+        with conn.begin_nested():
+            conn.execute(table.insert().values(**row))
+    except IntegrityError:
+        conn.execute(table.update().where(table.c.industry == key).values(**values))
+
+def _save_report(industry, data):
+    # Own connection so saving never commits whatever the caller has pending in db.session
+    try:
+        with db.engine.begin() as conn:
+            _upsert_report(conn, industry_key(industry), str(industry).strip(),
+                           {'data': data, 'refreshed_at': time.time()})
+    except Exception as e:
+        print(f"[WARN] Market report save failed: {e}")
+
+def _load_report(key):
+    table = MarketReport.__table__
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(table.select().where(table.c.industry == key)).first()
+    except Exception as e:
+        print(f"[WARN] Market report read failed: {e}")
+        return None
+
+def _record_demand(industry):
+    """Count one request for the industry in market_reports (shared by every worker)."""
+    key = industry_key(industry)
+    table = MarketReport.__table__
+    now = time.time()
+    try:
+        with db.engine.begin() as conn:
+            _upsert_report(conn, key, str(industry).strip(),
+                           {'demand': table.c.demand + 1, 'requested_at': now},
+                           {'demand': 1.0, 'requested_at': now})
+    except Exception as e:
+        print(f"[WARN] Market demand update failed: {e}")
+    return key
+
+def _decay_demand(now):
+    """Halve every industry's demand once per DEMAND_HALF_LIFE_SECONDS."""
+    table = MarketReport.__table__
+    with db.engine.begin() as conn:
+        conn.execute(table.update().where(table.c.decayed_at <= now - DEMAND_HALF_LIFE_SECONDS).values(
+            demand=table.c.demand * 0.5, decayed_at=now
+        ))
+
+def _take_lease(name, seconds, now=None):
+    """Take or renew a WorkerLease for this process. False while another live worker holds it."""
+    now = now or time.time()
+    table = WorkerLease.__table__
+    try:
+        with db.engine.begin() as conn:
+            if conn.execute(table.update().where(
+                table.c.name == name, or_(table.c.owner == _OWNER, table.c.expires_at <= now)
+            ).values(owner=_OWNER, expires_at=now + seconds)).rowcount:
+                return True
+            conn.execute(table.insert().values(name=name, owner=_OWNER, expires_at=now + seconds))
+        return True
+    except IntegrityError:
+        return False  # held by another worker
+    except Exception as e:
+        print(f"[WARN] Lease {name} error: {e}")
+        return False
+
+def refresh_market(industry):
+    """Fetch a new analysis for the industry and store it. Raises if Gemini fails."""
+    prompt = build_market_prompt(industry)
+    # Concurrent refreshes of one industry (in any worker) share the call
+    data = singleflight.do(cache.make_key(prompt), lambda: _fetch_market(prompt))
+    _save_report(industry, data)
+    _bump("refreshes")
+    return data
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='market')
+    return _executor
+
+def _revalidate(app, key, label):
+    try:
+        with app.app_context():
+            row = _load_report(key)
+            # Another worker may have refreshed it since we served the stale copy
+            if row is None or row.refreshed_at is None or time.time() - row.refreshed_at >= REPORT_TTL_SECONDS:
+                refresh_market(label)
+    except Exception as e:
+        _bump("refresh_failures")
+        print(f"[WARN] Market refresh for {label} failed: {e}")
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+def _schedule_revalidate(key, label):
+    if breaker.is_open():
+        return
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    _get_executor().submit(_revalidate, current_app._get_current_object(), key, label)
+
+def _stored_report(industry):
+    """Stored report for the industry, or None. Past its TTL it is still returned (and refreshed)."""
+    key = industry_key(industry)
+    row = _load_report(key)
+    if row is None or row.data is None or row.refreshed_at is None:
+        return None
+    age = time.time() - row.refreshed_at
+    if age >= MAX_STALE_SECONDS:
+        return None
+    if age >= REPORT_TTL_SECONDS:
+        _bump("stale_served")
+        _schedule_revalidate(key, row.label)
+    else:
+        _bump("report_hits")
+    return row.data
+
+def prewarm_once(now=None):
+    """One scheduler tick: decay demand, then refresh the top industries that are close to expiry.
+
+    Only the worker holding the prewarm lease does anything; the others return [].
+    """
+    now = now or time.time()
+    if not _take_lease(PREWARM_LEASE, PREWARM_LEASE_SECONDS, now):
+        _bump("prewarm_skipped")
+        return []
+    _decay_demand(now)
+    _bump("prewarm_runs")
+
+    rows = MarketReport.query.filter(MarketReport.demand >= PREWARM_MIN_DEMAND) \
+        .order_by(MarketReport.demand.desc()).limit(PREWARM_TOP_N).all()
+    refreshed = []
+    for row in rows:
+        if row.refreshed_at is not None and now - row.refreshed_at < REPORT_TTL_SECONDS - PREWARM_LEAD_SECONDS:
+            continue
+        if breaker.is_open():
+            print("[WARN] Market prewarm paused: AI service circuit is open")
+            break
+        try:
+            refresh_market(row.label)
+            refreshed.append(row.label)
+        except Exception as e:
+            _bump("refresh_failures")
+            print(f"[WARN] Market prewarm for {row.label} failed: {e}")
+    db.session.remove()
+    return refreshed
+
+def _scheduler_loop(app):
+    while True:
+        time.sleep(PREWARM_INTERVAL_SECONDS)
+        try:
+            with app.app_context():
+                refreshed = prewarm_once()
+            if refreshed:
+                print(f"🔥 Pre-warmed market reports: {', '.join(refreshed)}")
+        except Exception as e:
+            print(f"[WARN] Market prewarm tick failed: {e}")
+
+def start_prewarmer(app):
+    """Start this worker's background prewarm thread (once per process)."""
+    global _scheduler
+    if not PREWARM_ENABLED or REPORT_TTL_SECONDS <= 0 or not gateway.is_available():
+        return
+    with _lock:
+        if _scheduler is not None and _scheduler[0] == os.getpid():
+            return
+        thread = threading.Thread(target=_scheduler_loop, args=(app,), name='market-prewarm', daemon=True)
+        _scheduler = (os.getpid(), thread)
+    thread.start()
+
+def get_prewarm_stats():
+    with _lock:
+        snapshot = dict(_stats)
+        snapshot["refreshing"] = len(_refreshing)
+    snapshot["enabled"] = PREWARM_ENABLED
+    snapshot["top_n"] = PREWARM_TOP_N
+    return snapshot
+
+def build_market_prompt(industry):
+    prompt = f"""
+    Act as a Senior Market Research Analyst.
+    Analyze the current real-world market for the "{industry}" industry (focus on India and Global trends).
+    
+    Return STRICT JSON format with these exact keys:
+    
+    1. "summary": A 1-sentence executive summary.
+    2. "growth_trend": List of 6 objects (2020-2025) format: {{"year": "202x", "market_size": number_in_billions}}.
+    3. "sentiment_distribution": List of 3 objects (Positive, Neutral, Negative) summing to 100.
+    
+    4. "trending_startups_heatmap": 
+       Identify 4 TRENDING startup concepts/opportunities in "{industry}".
+       For each, provide:
+       - "name": A catchy startup name or concept title.
+       - "subtitle": What problem it solves (max 6 words).
+       - "competition": "High", "Medium", or "Low".
+       - "avgFunding": Estimated funding needed (e.g., "₹5Cr", "$1M").
+       - "successRate": A number between 50-95.
+    """
+    return prompt
+
+def get_market_analysis(industry):
+    """Market report for an industry: stored report, then Gemini, then mock data if the call fails."""
+    _record_demand(industry)
+    stored = _stored_report(industry)
+    if stored is not None:
+        return stored
+
+    try:
+        # --- CALL GEMINI (concurrent requests for one industry share the call) ---
+        return refresh_market(industry)
+    except Exception as e:
+        print(f"❌ Market Analysis Error: {e}")
+        # Provide graceful fallback data on Gemini 503 Overload errors
+        return get_fallback_market(industry)
 
 @market_bp.route('/analyze_market', methods=['POST'])
 def analyze_market():
+    industry = None
     try:
-        if not client:
+        if not gateway.is_available():
             return jsonify({"error": "AI Client not initialized. Check your API Key."}), 500
 
         data = request.get_json()
@@ -33,71 +341,20 @@ def analyze_market():
         if not industry:
             return jsonify({"error": "Industry is required"}), 400
 
-        # --- PROMPT FOR STARTUP-IQ ANALYTICS ---
-        prompt = f"""
-        Act as a Senior Market Research Analyst.
-        Analyze the current real-world market for the "{industry}" industry (focus on India and Global trends).
-        
-        Return STRICT JSON format with these exact keys:
-        
-        1. "summary": A 1-sentence executive summary.
-        2. "growth_trend": List of 6 objects (2020-2025) format: {{"year": "202x", "market_size": number_in_billions}}.
-        3. "sentiment_distribution": List of 3 objects (Positive, Neutral, Negative) summing to 100.
-        
-        4. "trending_startups_heatmap": 
-           Identify 4 TRENDING startup concepts/opportunities in "{industry}".
-           For each, provide:
-           - "name": A catchy startup name or concept title.
-           - "subtitle": What problem it solves (max 6 words).
-           - "competition": "High", "Medium", or "Low".
-           - "avgFunding": Estimated funding needed (e.g., "₹5Cr", "$1M").
-           - "successRate": A number between 50-95.
-        """
-
-        # --- CALL NEW GENERATE METHOD ---
-        response = client.models.generate_content(
-            model=MODEL_ID,
-            contents=prompt
-        )
-
-        # Gemini often wraps JSON in markdown blocks like ```json ... ```
-        response_text = response.text
-        clean_text = response_text.replace("```json", "").replace("```", "").strip()
-        
-        market_data = json.loads(clean_text)
-
-        return jsonify(market_data), 200
+        # ?stream=1 pushes each heatmap entry as soon as the model finishes it
+        if streaming.wants_stream(request):
+            _record_demand(industry)
+            stored = _stored_report(industry)
+            if stored is not None:
+                return streaming.sse_response(streaming.replay_json(stored, schemas.MARKET, _select_market_event))
+            return streaming.sse_response(streaming.stream_json(
+                'market', build_market_prompt(industry), schemas.MARKET,
+                _select_market_event, get_fallback_market(industry),
+                store=lambda result: _save_report(industry, result)
+            ))
+
+        return jsonify(get_market_analysis(industry)), 200
 
     except Exception as e:
         print(f"❌ Market Analysis Error: {e}")
-        # Provide graceful fallback data on Gemini 503 Overload errors
-        fallback_data = {
-            "summary": f"Analysis for {industry} (MOCK DATA - AI Service Currently Overloaded).",
-            "growth_trend": [
-                {"year": "2021", "market_size": 10}, {"year": "2022", "market_size": 20},
-                {"year": "2023", "market_size": 35}, {"year": "2024", "market_size": 50},
-                {"year": "2025", "market_size": 80}
-            ],
-            "sentiment_distribution": [
-                {"name": "Positive", "value": 60},
-                {"name": "Neutral", "value": 30},
-                {"name": "Negative", "value": 10}
-            ],
-            "trending_startups_heatmap": [
-                {
-                    "name": f"{industry} Automator", 
-                    "subtitle": "AI-driven operational efficiency", 
-                    "competition": "High", 
-                    "avgFunding": "₹15Cr", 
-                    "successRate": 72
-                },
-                {
-                    "name": f"NextGen {industry}", 
-                    "subtitle": "Blockchain verified transactions", 
-                    "competition": "Medium", 
-                    "avgFunding": "₹5Cr", 
-                    "successRate": 85
-                }
-            ]
-        }
-        return jsonify(fallback_data), 200
\ No newline at end of file
+        return jsonify(get_fallback_market(industry)), 200
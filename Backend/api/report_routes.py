@@ -0,0 +1,156 @@
+from flask import Blueprint, request, jsonify, current_app
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+import os
+import threading
+import time
+from database.db import db
+from api.auth_routes import get_request_user_id
+from api.analyzer_routes import score_startup, build_analysis_entry
+from api.canvas_routes import generate_canvas_result
+from api.competitor_routes import analyze_competitors_result
+from api.market_routes import get_market_analysis
+from llm import streaming
+from ml import comparables
+
+load_dotenv(override=True)
+report_bp = Blueprint('report', __name__)
+
+# --- CONFIG ---
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "16"))   # section threads shared by all reports
+
+def _market_section(data):
+    industry = data.get('industry')
+    if not industry:
+        raise ValueError("Industry is required for the market section")
+    return get_market_analysis(industry)
+
+# section -> fn(payload) returning its JSON. Each goes through the shared
+# gateway, so the cache, single-flight, limiter and breaker all apply.
+SECTIONS = {
+    'analysis': score_startup,
+    'canvas': generate_canvas_result,
+    'competitors': analyze_competitors_result,
+    'market': _market_section,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix='report')
+    return _executor
+
+def _requested_sections(data):
+    names = data.get('sections') or list(SECTIONS)
+    unknown = [name for name in names if name not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown report sections: {', '.join(map(str, unknown))}")
+    return names
+
+def run_sections(data, names):
+    """Start every section at once; yield (name, result, error, elapsed_ms) as each finishes."""
+    app = current_app._get_current_object()
+    started = time.perf_counter()
+
+    def run(name):
+        with app.app_context():
+            return SECTIONS[name](data)
+
+    futures = {_get_executor().submit(run, name): name for name in names}
+    try:
+        for future in as_completed(futures):
+            name = futures[future]
+            elapsed = round((time.perf_counter() - started) * 1000)
+            try:
+                yield name, future.result(), None, elapsed
+            except Exception as e:
+                print(f"[WARN] Report section {name} failed: {e}")
+                yield name, None, str(e), elapsed
+    finally:
+        # Client went away: drop sections that have not started
+        for future in futures:
+            future.cancel()
+
+def save_report(data, sections, user_id=None):
+    """One StartupAnalysis row for the whole report; returns its id (None if not saved).
+
+    The analysis fields stay at the top of ai_result (score, analysis, ...)
+    so history, sharing and the dashboard read it like any other analysis.
+    """
+    final_result = dict(sections.get('analysis') or {})
+    for name in ('canvas', 'competitors', 'market'):
+        if name in sections:
+            final_result[name] = sections[name]
+    try:
+        entry = build_analysis_entry(data, final_result, user_id)
+        db.session.add(entry)
+        db.session.commit()
+        comparables.mark_stale()
+        return entry.id
+    except Exception as e:
+        db.session.rollback()
+        print(f"[WARN] Report DB Save Error: {e}")
+        return None
+
+def run_report(data, user_id=None):
+    """Every section of the report, computed concurrently and saved. Returns the response body."""
+    names = _requested_sections(data)
+    sections, errors, timings = {}, {}, {}
+    for name, result, error, elapsed in run_sections(data, names):
+        timings[name] = elapsed
+        if error is None:
+            sections[name] = result
+        else:
+            errors[name] = error
+    return {
+        "sections": sections,
+        "errors": errors,
+        "timings_ms": timings,
+        "analysis_id": save_report(data, sections, user_id),
+    }
+
+@report_bp.route('/report', methods=['POST'])
+def full_report():
+    """Analysis, canvas, competitors and market for one startup, generated concurrently.
+
+    Body: the /analyze payload plus `description` and `industry`; optional
+    `sections` picks a subset. With `?stream=1` each section is sent as an SSE
+    `section` event the moment it is ready, then a `done` event with the saved
+    analysis_id; otherwise everything comes back in one JSON object.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    try:
+        names = _requested_sections(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    user_id = get_request_user_id()
+
+    if not streaming.wants_stream(request):
+        try:
+            return jsonify(run_report(data, user_id)), 200
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    def events():
+        sections, errors = {}, {}
+        for name, result, error, elapsed in run_sections(data, names):
+            if error is None:
+                sections[name] = result
+                yield streaming.sse_event('section', {"name": name, "data": result, "elapsed_ms": elapsed})
+            else:
+                errors[name] = error
+                yield streaming.sse_event('error', {"name": name, "error": error, "elapsed_ms": elapsed})
+        yield streaming.sse_event('done', {
+            "analysis_id": save_report(data, sections, user_id),
+            "sections": sorted(sections),
+            "errors": errors,
+        })
+
+    return streaming.sse_response(events())
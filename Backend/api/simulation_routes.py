@@ -0,0 +1,44 @@
+from flask import Blueprint, request, jsonify
+from ml import simulator
+
+simulation_bp = Blueprint('simulation', __name__)
+
+MAX_PORTFOLIO_SIZE = 200
+
+def _scenarios():
+    return int(request.args.get('scenarios', simulator.DEFAULT_SCENARIOS))
+
+@simulation_bp.route('/simulate', methods=['POST'])
+def simulate_startup():
+    """Monte Carlo success-probability and runway distribution for one pitch (same payload as /analyze)."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        scenarios = _scenarios()
+    except ValueError:
+        return jsonify({'error': 'scenarios must be an integer'}), 400
+
+    try:
+        return jsonify(simulator.simulate(data, scenarios)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@simulation_bp.route('/simulate/batch', methods=['POST'])
+def simulate_portfolio():
+    """Simulate a portfolio in one vectorized pass. Body: a list of payloads (or {"startups": [...]})."""
+    data = request.get_json(silent=True)
+    items = data.get('startups') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items or not all(isinstance(i, dict) for i in items):
+        return jsonify({'error': 'Expected a non-empty list of startups'}), 400
+    if len(items) > MAX_PORTFOLIO_SIZE:
+        return jsonify({'error': f"Portfolio is limited to {MAX_PORTFOLIO_SIZE} startups"}), 400
+    try:
+        scenarios = _scenarios()
+    except ValueError:
+        return jsonify({'error': 'scenarios must be an integer'}), 400
+
+    try:
+        return jsonify({'results': simulator.simulate_batch(items, scenarios)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
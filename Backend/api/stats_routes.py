@@ -0,0 +1,22 @@
+from flask import Blueprint, jsonify
+from llm import gateway, cache, singleflight, limiter, breaker
+from ml import predictor, comparables
+from api.market_routes import get_prewarm_stats
+from api.generator_routes import get_pool_stats
+
+stats_bp = Blueprint('stats', __name__)
+
+@stats_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """Per-worker runtime counters (LLM latency, errors, concurrency, cache hits, model version)."""
+    return jsonify({
+        'llm': gateway.get_stats(),
+        'cache': cache.get_stats(),
+        'singleflight': singleflight.get_stats(),
+        'rate_limit': limiter.get_stats(),
+        'breaker': breaker.get_stats(),
+        'ml': predictor.get_stats(),
+        'comparables': comparables.get_stats(),
+        'market_prewarm': get_prewarm_stats(),
+        'idea_pool': get_pool_stats()
+    }), 200
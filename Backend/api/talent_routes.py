@@ -1,14 +1,122 @@
 import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 from dotenv import load_dotenv
+from database.db import db
+from database.models import GitHubCacheEntry
 
 load_dotenv()
 talent_bp = Blueprint('talent', __name__)
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 
+# --- CONFIG ---
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+PROFILE_TTL_SECONDS = int(os.getenv("GITHUB_PROFILE_TTL_SECONDS", "86400"))
+SEARCH_TTL_SECONDS = int(os.getenv("GITHUB_SEARCH_TTL_SECONDS", "600"))
+DETAIL_WORKERS = int(os.getenv("GITHUB_DETAIL_WORKERS", "10"))
+DEFAULT_PER_PAGE = 5   # small pages to save your Rate Limit quota
+MAX_PER_PAGE = 30
+MAX_PAGE = 34          # GitHub search stops at the first 1000 results
+
+_session = None
+_session_pid = None
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_session():
+    """One pooled keep-alive session per worker process (recreated after a fork)."""
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DETAIL_WORKERS)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['Accept'] = 'application/vnd.github.v3+json'
+            if GITHUB_TOKEN:
+                session.headers['Authorization'] = f'token {GITHUB_TOKEN}'
+            _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DETAIL_WORKERS, thread_name_prefix='github')
+    return _executor
+
+
+def _fetch(url, etag=None, timeout=5):
+    """GET with If-None-Match. Returns (status, data, etag); data is None on 304."""
+    headers = {'If-None-Match': etag} if etag else {}
+    response = _get_session().get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return 304, None, etag
+    return response.status_code, response.json() if response.status_code == 200 else None, response.headers.get('ETag')
+
+
+def _fetch_all(urls, ttl, timeout=5):
+    """Fetch many GitHub URLs through the cache. Returns {url: data} for those that succeeded.
+
+    Fresh entries are served without a request; stale ones are revalidated with
+    their ETag (a 304 does not count against the rate limit), and only the
+    remaining network calls are fanned out over the pooled session.
+    """
+    now = time.time()
+    cached = {row.url: row for row in GitHubCacheEntry.query.filter(GitHubCacheEntry.url.in_(urls))} if urls else {}
+    results = {url: row.data for url, row in cached.items() if now - row.fetched_at < ttl}
+    pending = [url for url in urls if url not in results]
+
+    futures = {
+        url: _get_executor().submit(_fetch, url, cached[url].etag if url in cached else None, timeout)
+        for url in pending
+    }
+    for url, future in futures.items():
+        try:
+            status, data, etag = future.result()
+        except Exception as e:
+            print(f"⚠️ GitHub fetch failed for {url}: {e}")
+            continue
+        row = cached.get(url)
+        if status == 304 and row is not None:
+            row.fetched_at = now
+            results[url] = row.data
+        elif status == 200:
+            if row is None:
+                row = GitHubCacheEntry(url=url)
+                db.session.add(row)
+            row.etag, row.data, row.fetched_at = etag, data, now
+            results[url] = data
+        elif status == 403:
+            print("❌ Rate Limit Hit! (Add a Token to fix this)")
+        else:
+            print(f"⚠️ API Error: {status}")
+
+    if futures:
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[WARN] GitHub cache save failed: {e}")
+    return results
+
+
+def _int_arg(data, name, default, low, high):
+    try:
+        return max(low, min(int(data.get(name) or default), high))
+    except (TypeError, ValueError):
+        return default
+
+
 @talent_bp.route('/search_talent', methods=['POST', 'OPTIONS'])
 @cross_origin()
 def search_talent():
@@ -16,55 +124,44 @@ def search_talent():
         return jsonify({'status': 'ok'}), 200
 
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         query = data.get('skill') or "Developer"
-        
+        page = _int_arg(data, 'page', 1, 1, MAX_PAGE)
+        per_page = _int_arg(data, 'per_page', DEFAULT_PER_PAGE, 1, MAX_PER_PAGE)
+
         # 1. SEARCH CONFIGURATION
-        # We limit to 5 results to save your Rate Limit quota
-        url = f"https://api.github.com/search/users?q={query} location:India&per_page=5"
-        
-        headers = {'Accept': 'application/vnd.github.v3+json'}
-        if GITHUB_TOKEN:
-            headers['Authorization'] = f'token {GITHUB_TOKEN}'
+        url = (f"{GITHUB_API_URL}/search/users?q={quote(f'{query} location:India')}"
+               f"&page={page}&per_page={per_page}")
 
-        print(f"🔍 Searching GitHub for: {query}")
+        print(f"🔍 Searching GitHub for: {query} (page {page})")
 
-        # 2. EXECUTE SEARCH
-        response = requests.get(url, headers=headers, timeout=10)
+        # 2. EXECUTE SEARCH (cached briefly, revalidated with its ETag)
+        search = _fetch_all([url], SEARCH_TTL_SECONDS, timeout=10).get(url)
 
         # 3. HANDLE ERRORS GRACEFULLY (Don't crash the frontend)
-        if response.status_code == 403:
-            print("❌ Rate Limit Hit! (Add a Token to fix this)")
+        if search is None:
             return jsonify([]), 200 # Return empty list so frontend doesn't show alert
-            
-        if response.status_code != 200:
-            print(f"⚠️ API Error: {response.status_code}")
-            return jsonify([]), 200
 
-        # 4. PROCESS RESULTS
-        users = []
-        items = response.json().get('items', [])
+        # 4. FETCH PROFILES CONCURRENTLY (Name, Bio)
+        items = search.get('items', [])
+        profiles = _fetch_all([item['url'] for item in items], PROFILE_TTL_SECONDS)
 
+        users = []
         for item in items:
-            try:
-                # Fetch details (Name, Bio)
-                details = requests.get(item['url'], headers=headers, timeout=5).json()
-                
-                # Only add if they have a real name
-                if details.get('name'):
-                    users.append({
-                        "name": details.get('name'),
-                        "role": f"{query} Developer",
-                        "skills": [query, "India"],
-                        "bio": details.get('bio') or "No bio available.",
-                        "avatar": item['avatar_url'],
-                        "linkedin": item['html_url'] # Points to REAL Profile
-                    })
-            except:
-                continue
+            details = profiles.get(item['url']) or {}
+            # Only add if they have a real name
+            if details.get('name'):
+                users.append({
+                    "name": details.get('name'),
+                    "role": f"{query} Developer",
+                    "skills": [query, "India"],
+                    "bio": details.get('bio') or "No bio available.",
+                    "avatar": item['avatar_url'],
+                    "linkedin": item['html_url'] # Points to REAL Profile
+                })
 
         return jsonify(users), 200
 
     except Exception as e:
         print(f"SERVER ERROR: {e}")
-        return jsonify([]), 200 # Return empty list on crash
\ No newline at end of file
+        return jsonify([]), 200 # Return empty list on crash
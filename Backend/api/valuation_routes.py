@@ -1,67 +1,61 @@
 from flask import Blueprint, request, jsonify
-from google import genai  # Modern 2026 SDK
-import os
-import json
-from dotenv import load_dotenv
-
-# Ensure environment variables are loaded
-load_dotenv(override=True)
+from llm import gateway, cache, singleflight, schemas, json_stream, breaker
+from ml import valuation
 
 valuation_bp = Blueprint('valuation', __name__)
 
-# --- CONFIGURATION ---
-api_key = os.getenv("GEMINI_API_KEY")
-
-# Initialize the new Client
-client = None
-if api_key:
-    client = genai.Client(api_key=api_key)
-
-# Using Flash-Lite for speed and high daily request limits (1,000+ RPD)
-MODEL_ID = "gemini-2.5-flash-lite"
+NARRATIVE_TIMEOUT_SECONDS = 10
+
+def _fetch_key_factors(prompt):
+    """Call Gemini for the narrative key factors (raises if no valid list came back)."""
+    response_text = gateway.generate(prompt, timeout=NARRATIVE_TIMEOUT_SECONDS)
+
+    # Parse the AI response, skipping markdown fences and prose
+    narrative = json_stream.parse(response_text, schemas.VALUATION_FACTORS)
+    if narrative is None:
+        raise ValueError("AI response did not contain valid key_factors JSON")
+    cache.put('valuation', prompt, narrative)
+    return narrative
+
+def _narrate(result):
+    """Replace the templated key_factors with Gemini's wording; keeps them if the AI is unavailable."""
+    prompt = f"""
+    Act as a Venture Capital Analyst.
+    A {result['industry']} startup was valued at {result['estimated_valuation']}
+    using {result['multiples_used']}. Method values: {result['methods']}.
+    Draft reasons: {result['key_factors']}
+
+    Return ONLY a JSON object: {{"key_factors": [3 short reasons for this valuation]}}
+    """
+
+    narrative = cache.get('valuation', prompt)
+    if narrative is None:
+        try:
+            narrative = singleflight.do(cache.make_key(prompt), lambda: _fetch_key_factors(prompt))
+        except Exception as e:
+            print(f"[WARN] Valuation narrative unavailable, using local factors: {e}")
+            return result
+    result['key_factors'] = narrative['key_factors'][:3] or result['key_factors']
+    return result
+
+def calculate_valuation_result(data, narrative=True):
+    """Local valuation (multiples, per-user value, DCF) with an optional Gemini narrative."""
+    result = valuation.estimate(data or {})
+    if narrative and gateway.is_available() and not breaker.is_open():
+        result = _narrate(result)
+    return result
 
 @valuation_bp.route('/calculate_valuation', methods=['POST'])
 def calculate_valuation():
+    """Valuation range and sensitivity table. `?narrative=0` skips the AI-written key factors."""
     try:
-        if not client:
-            return jsonify({"error": "AI Client not initialized"}), 500
-
-        data = request.get_json()
-        
-        # Gathering startup details for the AI to process
-        startup_details = {
-            "revenue": data.get('revenue', 0),
-            "users": data.get('users', 0),
-            "growth_rate": data.get('growth_rate', '0%'),
-            "industry": data.get('industry', 'General Tech')
-        }
-
-        prompt = f"""
-        Act as a Venture Capital Analyst. 
-        Calculate an estimated valuation for a startup in the {startup_details['industry']} sector 
-        with ${startup_details['revenue']} annual revenue, {startup_details['users']} users, 
-        and a {startup_details['growth_rate']} growth rate.
-
-        Return ONLY a JSON object with:
-        1. "estimated_valuation": A string (e.g. "$5M - $7M").
-        2. "multiples_used": The industry multiple applied.
-        3. "confidence_score": A percentage.
-        4. "key_factors": List of 3 reasons for this valuation.
-        """
-
-        # --- CALL NEW GENERATE METHOD ---
-        response = client.models.generate_content(
-            model=MODEL_ID,
-            contents=prompt
-        )
-
-        # Clean and parse the AI response
-        response_text = response.text
-        clean_text = response_text.replace("```json", "").replace("```", "").strip()
-        valuation_data = json.loads(clean_text)
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Expected a JSON object"}), 400
 
-        return jsonify(valuation_data), 200
+        narrative = request.args.get('narrative', '1').lower() not in ('0', 'false', 'no')
+        return jsonify(calculate_valuation_result(data, narrative)), 200
 
     except Exception as e:
         print(f"❌ Valuation Error: {e}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
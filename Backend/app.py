@@ -1,47 +1,65 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 import os
 
 # --- 1. DATABASE IMPORTS ---
 from database.db import db
 from database.models import StartupAnalysis, User
+from database import config as db_config, migrate, user_stats
 
 # --- 2. BLUEPRINT IMPORTS ---
 from api.analyzer_routes import analyzer_bp
 from api.generator_routes import generator_bp
 from api.talent_routes import talent_bp
-from api.market_routes import market_bp
+from api.market_routes import market_bp, start_prewarmer
 from api.valuation_routes import valuation_bp
 from api.auth_routes import auth_bp
 from api.competitor_routes import competitor_bp
 from api.canvas_routes import canvas_bp
 from api.share_routes import share_bp
+from api.stats_routes import stats_bp
+from api.job_routes import job_bp, recover_stale_jobs
+from api.comparables_routes import comparables_bp
+from api.simulation_routes import simulation_bp
+from api.report_routes import report_bp
+from api.dashboard_routes import dashboard_bp
+from api.history_routes import history_bp
 
 # Load environment variables
 load_dotenv(override=True)
 
 app = Flask(__name__)
+# Behind Render's proxy: take the client address from X-Forwarded-For (PROXY_HOPS trusted proxies)
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.getenv("PROXY_HOPS", "1")))
 
 # --- 3. CORS CONFIGURATION ---
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 # --- 4. DATABASE CONFIGURATION (PostgreSQL / SQLite) ---
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///startup_iq.db')
+# Pool settings for Postgres, WAL + pragmas for the SQLite fallback (see database/config.py)
+db_config.configure(app)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'startup_iq_dev_secret_key_must_be_changed_in_prod')
 
 # Initialize the DB with the app
 db.init_app(app)
+# user_stats follows every analysis insert/delete in the same transaction
+user_stats.install()
 
 # Create Tables automatically if they don't exist
 with app.app_context():
+    db_config.install(db.engine)
     try:
         db.create_all()
         print("[OK] SQL Database connected & tables created.")
     except Exception as e:
         print(f"[ERROR] Database error: {e}")
 
+# Columns, indexes and backfills create_all() cannot add to existing tables
+migrate.run(app)
+
 # --- 5. REGISTER BLUEPRINTS ---
 app.register_blueprint(analyzer_bp, url_prefix='/api')
 app.register_blueprint(generator_bp, url_prefix='/api') 
@@ -52,6 +70,19 @@ app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(competitor_bp, url_prefix='/api')
 app.register_blueprint(canvas_bp, url_prefix='/api')
 app.register_blueprint(share_bp, url_prefix='/api')
+app.register_blueprint(stats_bp, url_prefix='/api')
+app.register_blueprint(job_bp, url_prefix='/api')
+app.register_blueprint(comparables_bp, url_prefix='/api')
+app.register_blueprint(simulation_bp, url_prefix='/api')
+app.register_blueprint(report_bp, url_prefix='/api')
+app.register_blueprint(dashboard_bp, url_prefix='/api')
+app.register_blueprint(history_bp, url_prefix='/api')
+
+# Fail jobs left queued/running by a worker that died
+recover_stale_jobs(app)
+
+# Keep the most requested industries' market reports warm in the background
+start_prewarmer(app)
 
 # --- 6. HEALTH CHECK ---
 @app.route('/')
@@ -0,0 +1,137 @@
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+# Concurrency benchmark for the database settings in database/config.py.
+# Worker threads run the app's hot mix against one database: saving an
+# analysis (which also updates user_stats in the same transaction) and
+# reading a history page. It runs once with SQLAlchemy's default engine and
+# once with the tuned engine, and reports throughput, latency and lock errors.
+#
+#   python benchmark_db.py                        # temporary SQLite files
+#   python benchmark_db.py --url postgresql://... # a disposable Postgres database
+from database import config as db_config
+from database import user_stats
+from database.db import db
+from database.models import StartupAnalysis, User
+
+USERS = 50
+
+
+def _make_engine(url, tuned):
+    if not tuned:
+        engine = create_engine(url)
+        if engine.dialect.name == 'sqlite':
+            with engine.begin() as conn:
+                conn.exec_driver_sql('PRAGMA journal_mode=DELETE')
+        return engine
+    engine = create_engine(url, **db_config.engine_options(url))
+    db_config.install(engine)
+    return engine
+
+
+def _seed(engine):
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(User(name=f"bench{i}", email=f"bench{i}@example.com", password_hash='x') for i in range(USERS))
+        session.commit()
+        return [u.id for u in session.query(User.id)]
+
+
+def _write(session, user_id, rng):
+    session.add(StartupAnalysis(
+        startup_name=f"Bench {rng.randrange(10 ** 6)}", funding=rng.uniform(1e4, 1e7),
+        market_size=rng.choice(['Regional', 'National (India)', 'Global']),
+        ai_result={'score': rng.randint(5, 95), 'analysis': 'x' * 400, 'recommendations': ['a', 'b', 'c']},
+        user_id=user_id, created_at=datetime.utcnow()
+    ))
+    session.commit()
+
+
+def _read(session, user_id):
+    session.query(*StartupAnalysis.summary_columns()) \
+        .filter(StartupAnalysis.user_id == user_id) \
+        .order_by(StartupAnalysis.created_at.desc(), StartupAnalysis.id.desc()).limit(21).all()
+    session.commit()
+
+
+def run(engine, user_ids, threads, seconds, write_ratio):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker(seed):
+        rng = random.Random(seed)
+        mine, failed = [], 0
+        with Session(engine) as session:
+            while time.monotonic() < deadline:
+                user_id = rng.choice(user_ids)
+                started = time.perf_counter()
+                try:
+                    if rng.random() < write_ratio:
+                        _write(session, user_id, rng)
+                    else:
+                        _read(session, user_id)
+                    mine.append(time.perf_counter() - started)
+                except Exception:
+                    session.rollback()
+                    failed += 1
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pick = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0
+    return {
+        'ops_per_sec': len(latencies) / elapsed,
+        'p50_ms': pick(0.50),
+        'p95_ms': pick(0.95),
+        'errors': sum(errors),
+    }
+
+
+def main():
+    # Writes update user_stats in the same transaction, as they do in the app
+    user_stats.install()
+    parser = argparse.ArgumentParser(description="Default vs tuned database engine under concurrent load.")
+    parser.add_argument('--url', default=None, help="database to use (default: temporary SQLite files)")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    results = {}
+    for label, tuned in (('default', False), ('tuned', True)):
+        url = db_config.database_url(args.url) if args.url else f"sqlite:///{os.path.join(tmp, label + '.db')}"
+        engine = _make_engine(url, tuned)
+        user_ids = _seed(engine)
+        print(f"⏱️  {label}: {args.threads} threads x {args.seconds:.0f}s on {engine.url.render_as_string(hide_password=True)}")
+        results[label] = run(engine, user_ids, args.threads, args.seconds, args.write_ratio)
+        engine.dispose()
+
+    print(f"\n{'engine':<10}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for label, r in results.items():
+        print(f"{label:<10}{r['ops_per_sec']:>10.0f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['errors']:>8}")
+    if results['default']['ops_per_sec']:
+        print(f"\n🚀 Throughput x{results['tuned']['ops_per_sec'] / results['default']['ops_per_sec']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
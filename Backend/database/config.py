@@ -0,0 +1,89 @@
+# database/config.py
+# Engine settings per database backend.
+#   Postgres: a bounded connection pool per worker, pre-ping to drop
+#             connections the server (or Render's proxy) closed, and recycling
+#             before idle timeouts kick in.
+#   SQLite:   WAL journal so readers never block the writer and commits do not
+#             rewrite a rollback journal, synchronous=NORMAL (safe under WAL),
+#             a memory map for reads, and a busy timeout so concurrent writers
+#             wait their turn instead of failing with "database is locked".
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+import os
+
+load_dotenv(override=True)
+
+# --- CONFIG ---
+DEFAULT_URL = 'sqlite:///startup_iq.db'
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))   # seconds
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "65536"))
+
+
+def database_url(url=None):
+    """DATABASE_URL with Heroku/Render-style postgres:// rewritten for SQLAlchemy."""
+    url = url or os.getenv('DATABASE_URL', DEFAULT_URL)
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def _is_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(url):
+    """SQLALCHEMY_ENGINE_OPTIONS for this URL."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == 'postgresql':
+        return {
+            'pool_size': POOL_SIZE,
+            'max_overflow': MAX_OVERFLOW,
+            'pool_timeout': POOL_TIMEOUT,
+            'pool_recycle': POOL_RECYCLE,
+            'pool_pre_ping': True,
+        }
+    if backend == 'sqlite' and not _is_memory(url):
+        # pysqlite's own busy handler; the PRAGMA below covers other drivers
+        return {'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {}
+
+
+def sqlite_pragmas():
+    return [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+        f'PRAGMA mmap_size={SQLITE_MMAP_BYTES}',
+        f'PRAGMA cache_size=-{SQLITE_CACHE_KB}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+
+def install(engine):
+    """Apply the per-connection SQLite pragmas to every new connection of this engine."""
+    if engine.dialect.name != 'sqlite' or _is_memory(engine.url):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in sqlite_pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def configure(app):
+    """Set the database URI and engine options on the Flask app before db.init_app."""
+    url = database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+    return url
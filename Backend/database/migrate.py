@@ -0,0 +1,173 @@
+# database/migrate.py
+# Schema changes db.create_all() cannot make on an existing database: new
+# columns and indexes on old tables, and the backfills that go with them.
+# Each migration runs once per database and is recorded in
+# `schema_migrations`. Steps check the live schema first, so a fresh
+# database (already created with the new columns) or a second worker racing
+# this one just skips ahead.
+#
+# Runs at startup from app.py, or by hand:  python -m database.migrate
+from datetime import datetime
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from database.db import db
+from database.models import StartupAnalysis, SchemaMigration, IdeaPoolEntry, IdeaCursor, score_from_result
+from database import user_stats
+
+# --- CONFIG ---
+BACKFILL_BATCH = 1000
+
+
+def _columns(conn, table):
+    return {c['name'] for c in inspect(conn).get_columns(table)}
+
+
+def _indexes(conn, table):
+    return {i['name'] for i in inspect(conn).get_indexes(table)}
+
+
+def add_column(conn, model, name):
+    """ALTER TABLE ... ADD COLUMN for a column declared on the model, if missing."""
+    table = model.__table__
+    if name in _columns(conn, table.name):
+        return False
+    column = table.c[name]
+    # Plain column only: constraints (FK, UNIQUE) cannot be added this way on SQLite
+    ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+    conn.execute(text(ddl))
+    return True
+
+
+def create_indexes(conn, model):
+    """Create every index declared on the model that the database does not have yet."""
+    table = model.__table__
+    existing = _indexes(conn, table.name)
+    created = []
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(conn)
+            created.append(index.name)
+    return created
+
+
+def _backfill_scores(conn):
+    table = StartupAnalysis.__table__
+    last_id, updated = 0, 0
+    while True:
+        rows = conn.execute(
+            table.select().with_only_columns(table.c.id, table.c.ai_result)
+            .where(table.c.id > last_id, table.c.score.is_(None), table.c.ai_result.isnot(None))
+            .order_by(table.c.id).limit(BACKFILL_BATCH)
+        ).fetchall()
+        if not rows:
+            return updated
+        last_id = rows[-1].id
+        values = [{'row_id': r.id, 'new_score': score_from_result(r.ai_result)} for r in rows]
+        values = [v for v in values if v['new_score'] is not None]
+        if values:
+            conn.execute(
+                table.update().where(table.c.id == bindparam('row_id')).values(score=bindparam('new_score')),
+                values
+            )
+            updated += len(values)
+
+
+def m001_analysis_accounts(conn):
+    """user_id and share_id, missing from databases created before accounts and sharing."""
+    add_column(conn, StartupAnalysis, 'user_id')
+    if add_column(conn, StartupAnalysis, 'share_id'):
+        # ADD COLUMN cannot carry UNIQUE on SQLite; a unique index enforces it instead
+        conn.execute(text("CREATE UNIQUE INDEX uq_startup_analysis_share_id ON startup_analysis (share_id)"))
+
+
+def m002_analysis_score(conn):
+    """startup_analysis.score (from ai_result), indexed along with market_size."""
+    add_column(conn, StartupAnalysis, 'score')
+    create_indexes(conn, StartupAnalysis)
+    updated = _backfill_scores(conn)
+    print(f"[OK] Backfilled score on {updated} analyses")
+
+
+def m003_user_stats(conn):
+    """Fill user_stats for analyses saved before it was maintained."""
+    written = user_stats.rebuild(conn)
+    print(f"[OK] Built user_stats for {written} users")
+
+
+def m004_analysis_user_indexes(conn):
+    """Composite (user_id, created_at, id) and (user_id, score) indexes for the per-user routes."""
+    created = create_indexes(conn, StartupAnalysis)
+    print(f"[OK] Created indexes: {', '.join(created) or 'none needed'}")
+
+
+def m005_analysis_features(conn):
+    """startup_analysis.features; older rows stay NULL and are embedded from funding and market."""
+    add_column(conn, StartupAnalysis, 'features')
+
+
+def m006_idea_pool_keys(conn):
+    """idea_pool.name_key with a unique (topic, name_key) index, and idea_cursors.updated_at."""
+    add_column(conn, IdeaCursor, 'updated_at')
+    if add_column(conn, IdeaPoolEntry, 'name_key'):
+        table = IdeaPoolEntry.__table__
+        seen, duplicates, keys = set(), [], []
+        for row in conn.execute(table.select().with_only_columns(table.c.id, table.c.topic, table.c.idea)
+                                .order_by(table.c.id)):
+            key = str((row.idea or {}).get('name') or '').strip().lower()[:200] or f"#{row.id}"
+            if (row.topic, key) in seen:
+                duplicates.append(row.id)  # pooled twice by racing refills; keep the oldest
+            else:
+                seen.add((row.topic, key))
+                keys.append({'row_id': row.id, 'new_key': key})
+        if duplicates:
+            conn.execute(table.delete().where(table.c.id.in_(duplicates)))
+        if keys:
+            conn.execute(
+                table.update().where(table.c.id == bindparam('row_id')).values(name_key=bindparam('new_key')),
+                keys
+            )
+        print(f"[OK] Keyed {len(keys)} pooled ideas, dropped {len(duplicates)} duplicates")
+    create_indexes(conn, IdeaPoolEntry)
+    create_indexes(conn, IdeaCursor)
+
+
+# (version, function) in the order they must run; never renumber
+MIGRATIONS = [
+    (1, m001_analysis_accounts),
+    (2, m002_analysis_score),
+    (3, m003_user_stats),
+    (4, m004_analysis_user_indexes),
+    (5, m005_analysis_features),
+    (6, m006_idea_pool_keys),
+]
+
+
+def run(app):
+    """Apply every migration this database has not seen yet."""
+    with app.app_context():
+        table = SchemaMigration.__table__
+        with db.engine.connect() as conn:
+            applied = {row.version for row in conn.execute(table.select())}
+
+        for version, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            try:
+                with db.engine.begin() as conn:
+                    migration(conn)
+                    conn.execute(table.insert().values(
+                        version=version, name=migration.__name__, applied_at=datetime.utcnow()
+                    ))
+                print(f"[OK] Applied migration {version}: {migration.__name__}")
+            except IntegrityError:
+                pass  # another worker recorded it first
+            except Exception as e:
+                print(f"[ERROR] Migration {version} ({migration.__name__}) failed: {e}")
+                return False
+    return True
+
+
+if __name__ == '__main__':
+    from app import app
+    raise SystemExit(0 if run(app) else 1)
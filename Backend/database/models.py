@@ -1,17 +1,39 @@
 # database/models.py
 from database.db import db
 from datetime import datetime
+from sqlalchemy.orm import validates
+
+
+def score_from_result(ai_result):
+    """The numeric score inside an ai_result blob, or None."""
+    try:
+        return float((ai_result or {}).get('score'))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
 
 class StartupAnalysis(db.Model):
     __tablename__ = 'startup_analysis'
+    __table_args__ = (
+        # Per-user lists newest first (history, dashboard, keyset cursor) read this in order
+        db.Index('ix_startup_analysis_user_created', 'user_id', 'created_at', 'id'),
+        # Per-user best score (user_stats after a delete)
+        db.Index('ix_startup_analysis_user_score', 'user_id', 'score'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     startup_name = db.Column(db.String(100), nullable=True)
     funding = db.Column(db.Float, default=0.0)
-    market_size = db.Column(db.String(50), nullable=True)
+    market_size = db.Column(db.String(50), nullable=True, index=True)
     
     # This JSON column stores the entire AI output (score, recommendations, etc.)
     ai_result = db.Column(db.JSON, nullable=True)
+
+    # Copy of ai_result['score'] so stats and filters never have to read the JSON
+    score = db.Column(db.Float, nullable=True, index=True)
+
+    # Raw model features of the pitch (ml/comparables.pitch_features), for finding similar analyses
+    features = db.Column(db.JSON, nullable=True)
     
     # Link analysis to a user (nullable for anonymous analyses)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
@@ -21,16 +43,39 @@ class StartupAnalysis(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @validates('ai_result')
+    def _sync_score(self, key, ai_result):
+        self.score = score_from_result(ai_result)
+        return ai_result
+
     def to_dict(self):
         return {
             "id": self.id,
             "name": self.startup_name,
             "funding": self.funding,
+            "score": self.score,
             "result": self.ai_result,
             "share_id": self.share_id,
             "date": self.created_at.isoformat()
         }
 
+    @classmethod
+    def summary_columns(cls):
+        """Columns for list views: everything to_dict shows except the ai_result JSON."""
+        return (cls.id, cls.startup_name, cls.funding, cls.market_size, cls.score, cls.share_id, cls.created_at)
+
+    @staticmethod
+    def summary_dict(row):
+        return {
+            "id": row.id,
+            "name": row.startup_name,
+            "funding": row.funding,
+            "market_size": row.market_size,
+            "score": row.score,
+            "share_id": row.share_id,
+            "date": row.created_at.isoformat()
+        }
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -49,4 +94,152 @@ class User(db.Model):
             "name": self.name,
             "email": self.email,
             "created_at": self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class LLMCacheEntry(db.Model):
+    """Shared second tier of the LLM response cache (see llm/cache.py)."""
+    __tablename__ = 'llm_cache'
+
+    # sha256 of (model ID, normalized prompt)
+    key = db.Column(db.String(64), primary_key=True)
+    endpoint = db.Column(db.String(50), nullable=False)
+    value = db.Column(db.JSON, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class LLMInflight(db.Model):
+    """Cross-worker lock row for single-flight LLM calls (see llm/singleflight.py)."""
+    __tablename__ = 'llm_inflight'
+
+    key = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending | done
+    value = db.Column(db.JSON, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class Job(db.Model):
+    """Background AI analysis run by the job worker pool (see api/job_routes.py)."""
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='queued')  # queued | running | done | failed
+    payload = db.Column(db.JSON, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class LLMRateBucket(db.Model):
+    """Shared token bucket for the Gemini quota (see llm/limiter.py)."""
+    __tablename__ = 'llm_rate_limit'
+
+    name = db.Column(db.String(20), primary_key=True)  # 'rpm' | 'rpd'
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)   # epoch seconds of the last refill
+    blocked_until = db.Column(db.Float, nullable=False, default=0.0)  # set after an upstream 429
+
+
+class GitHubCacheEntry(db.Model):
+    """Conditional-request cache for GitHub API responses (see api/talent_routes.py)."""
+    __tablename__ = 'github_cache'
+
+    url = db.Column(db.String(500), primary_key=True)
+    etag = db.Column(db.String(200), nullable=True)
+    data = db.Column(db.JSON, nullable=False)
+    fetched_at = db.Column(db.Float, nullable=False)   # epoch seconds of the last 200/304
+
+
+class MarketReport(db.Model):
+    """Last good market analysis per industry plus its request demand (see api/market_routes.py)."""
+    __tablename__ = 'market_reports'
+
+    industry = db.Column(db.String(100), primary_key=True)   # lower-cased, trimmed
+    label = db.Column(db.String(100), nullable=False)        # as first requested, used in the prompt
+    data = db.Column(db.JSON, nullable=True)
+    refreshed_at = db.Column(db.Float, nullable=True)         # epoch seconds of the last good analysis
+    demand = db.Column(db.Float, nullable=False, default=0.0, index=True)  # decayed request count
+    decayed_at = db.Column(db.Float, nullable=False, default=0.0)
+    requested_at = db.Column(db.Float, nullable=True)
+
+
+class WorkerLease(db.Model):
+    """Named lease so one worker at a time runs a periodic background task (see api/market_routes.py)."""
+    __tablename__ = 'worker_leases'
+
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)   # host:pid of the holder
+    expires_at = db.Column(db.Float, nullable=False)    # epoch seconds
+
+
+class IdeaPoolEntry(db.Model):
+    """Pre-generated startup idea waiting to be served for a topic (see api/generator_routes.py)."""
+    __tablename__ = 'idea_pool'
+    __table_args__ = (
+        db.Index('ix_idea_pool_topic_id', 'topic', 'id'),
+        # One row per idea name and topic, however many refills race to add it
+        db.Index('uq_idea_pool_topic_name', 'topic', 'name_key', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(100), nullable=False)   # lower-cased, trimmed
+    name_key = db.Column(db.String(200), nullable=False)  # idea name, lower-cased and trimmed
+    idea = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.Float, nullable=False)    # epoch seconds
+
+
+class IdeaCursor(db.Model):
+    """Highest pool id each viewer has already been shown for a topic."""
+    __tablename__ = 'idea_cursors'
+
+    viewer = db.Column(db.String(80), primary_key=True)  # 'user:<id>' or 'client:<id>'
+    topic = db.Column(db.String(100), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.Float, nullable=True, index=True)  # epoch seconds; idle cursors expire
+
+
+class UserStats(db.Model):
+    """Running dashboard totals per user, kept in step with startup_analysis (see database/user_stats.py)."""
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    scored = db.Column(db.Integer, nullable=False, default=0)       # analyses that have a score
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    best_score = db.Column(db.Float, nullable=True)
+    last_analysis_at = db.Column(db.DateTime, nullable=True)
+    market_counts = db.Column(db.JSON, nullable=False, default=dict)  # market_size -> analyses
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'avgScore': round(self.score_sum / self.scored, 1) if self.scored else 0,
+            'bestScore': self.best_score if self.best_score is not None else 0,
+            'lastAnalysisAt': self.last_analysis_at.isoformat() if self.last_analysis_at else None,
+            'markets': self.market_counts or {}
+        }
+
+
+class SchemaMigration(db.Model):
+    """Migrations already applied to this database (see database/migrate.py)."""
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
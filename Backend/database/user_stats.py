@@ -0,0 +1,162 @@
+# database/user_stats.py
+# Keeps `user_stats` in step with startup_analysis. A session after_flush
+# hook turns the StartupAnalysis rows inserted or deleted by each flush into
+# per-user deltas and applies them on the flush's own connection, so the
+# stats commit (or roll back) together with the analyses. That covers every
+# path that saves through the ORM: /analyze, the batch bulk insert, reports,
+# jobs and delete_analysis. A user's row is created from a full count the
+# first time one of their analyses is flushed. install() registers the hook;
+# app.py calls it at startup.
+#
+# Repair drift with:  python -m database.user_stats [--user ID]
+from collections import Counter, defaultdict
+from datetime import datetime
+from sqlalchemy import case, event, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import argparse
+
+from database.db import db
+from database.models import StartupAnalysis, UserStats
+
+UNKNOWN_MARKET = 'Unknown'
+
+
+def _market(value):
+    return str(value or '').strip() or UNKNOWN_MARKET
+
+
+class _Delta:
+    def __init__(self):
+        self.total = 0
+        self.scored = 0
+        self.score_sum = 0.0
+        self.best = None
+        self.last = None
+        self.markets = Counter()
+        self.recompute = False  # a deleted row may have held the best score or the latest date
+
+
+def _collect(session):
+    deltas = defaultdict(_Delta)
+    for obj in session.new:
+        if isinstance(obj, StartupAnalysis) and obj.user_id is not None:
+            d = deltas[obj.user_id]
+            d.total += 1
+            d.markets[_market(obj.market_size)] += 1
+            if obj.score is not None:
+                d.scored += 1
+                d.score_sum += obj.score
+                d.best = obj.score if d.best is None else max(d.best, obj.score)
+            created = obj.created_at or datetime.utcnow()
+            d.last = created if d.last is None else max(d.last, created)
+    for obj in session.deleted:
+        if isinstance(obj, StartupAnalysis) and obj.user_id is not None:
+            d = deltas[obj.user_id]
+            d.total -= 1
+            d.markets[_market(obj.market_size)] -= 1
+            if obj.score is not None:
+                d.scored -= 1
+                d.score_sum -= obj.score
+            d.recompute = True
+    return deltas
+
+
+def _compute(conn, user_ids=None):
+    """Fresh user_stats values from startup_analysis, for some users or all of them."""
+    sa = StartupAnalysis.__table__.c
+    where = [sa.user_id.isnot(None)] + ([sa.user_id.in_(user_ids)] if user_ids is not None else [])
+    stats = {}
+    for row in conn.execute(
+        select(sa.user_id, func.count(sa.id), func.count(sa.score), func.coalesce(func.sum(sa.score), 0.0),
+               func.max(sa.score), func.max(sa.created_at)).where(*where).group_by(sa.user_id)
+    ):
+        stats[row[0]] = {
+            'user_id': row[0], 'total': row[1], 'scored': row[2], 'score_sum': float(row[3]),
+            'best_score': row[4], 'last_analysis_at': row[5], 'market_counts': {}
+        }
+    for user_id, market, count in conn.execute(
+        select(sa.user_id, sa.market_size, func.count(sa.id)).where(*where).group_by(sa.user_id, sa.market_size)
+    ):
+        counts = stats[user_id]['market_counts']
+        counts[_market(market)] = counts.get(_market(market), 0) + count
+    return stats
+
+
+def _apply(conn, user_id, d, retry=True):
+    table = UserStats.__table__
+    c = table.c
+    values = {'total': c.total + d.total, 'scored': c.scored + d.scored, 'score_sum': c.score_sum + d.score_sum}
+    if d.best is not None:
+        values['best_score'] = case((or_(c.best_score.is_(None), c.best_score < d.best), d.best),
+                                    else_=c.best_score)
+    if d.last is not None:
+        values['last_analysis_at'] = case((or_(c.last_analysis_at.is_(None), c.last_analysis_at < d.last), d.last),
+                                          else_=c.last_analysis_at)
+
+    # The UPDATE takes the row's write lock before market_counts is read back
+    if not conn.execute(table.update().where(c.user_id == user_id).values(**values)).rowcount:
+        # No row yet: count everything, which already includes this flush
+        fresh = _compute(conn, [user_id]).get(user_id)
+        if fresh is None:
+            return
+        try:
+            with conn.begin_nested():
+                conn.execute(table.insert().values(**fresh))
+        except IntegrityError:
+            # Another transaction created it first; add our delta to theirs
+            if retry:
+                _apply(conn, user_id, d, retry=False)
+        return
+
+    counts = Counter(conn.execute(select(c.market_counts).where(c.user_id == user_id)).scalar() or {})
+    counts.update(d.markets)
+    extra = {'market_counts': {market: n for market, n in counts.items() if n > 0}}
+    if d.recompute:
+        sa = StartupAnalysis.__table__.c
+        best, last = conn.execute(
+            select(func.max(sa.score), func.max(sa.created_at)).where(sa.user_id == user_id)
+        ).one()
+        extra.update(best_score=best, last_analysis_at=last)
+    conn.execute(table.update().where(c.user_id == user_id).values(**extra))
+
+
+def _after_flush(session, flush_context):
+    deltas = _collect(session)
+    if not deltas:
+        return
+    conn = session.connection()
+    for user_id, d in deltas.items():
+        _apply(conn, user_id, d)
+
+
+def install():
+    """Keep user_stats updated on every ORM flush (all sessions). Safe to call more than once."""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+def rebuild(conn, user_id=None):
+    """Recompute user_stats from startup_analysis (one user, or every row). Returns rows written."""
+    table = UserStats.__table__
+    if user_id is None:
+        conn.execute(table.delete())
+        stats = _compute(conn)
+    else:
+        conn.execute(table.delete().where(table.c.user_id == user_id))
+        stats = _compute(conn, [user_id])
+    if stats:
+        conn.execute(table.insert(), list(stats.values()))
+    return len(stats)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild user_stats from startup_analysis.")
+    parser.add_argument('--user', type=int, default=None, help="only this user ID")
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        with db.engine.begin() as conn:
+            written = rebuild(conn, args.user)
+    print(f"✅ Rebuilt user_stats for {written} user(s)")
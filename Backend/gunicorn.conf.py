@@ -0,0 +1,17 @@
+# gunicorn.conf.py
+# Loaded by `gunicorn -c gunicorn.conf.py app:app` (Procfile, render.yaml).
+# Threaded workers: /api/analyze/batch streams NDJSON for as long as a cohort
+# takes and /api/jobs/<id>?wait= long-polls, so a request must be able to
+# outlive `timeout`. With gthread the worker's main thread keeps heart-beating
+# while request threads wait on Gemini, so `timeout` only kills a worker that
+# is truly stuck, not one serving a long stream. Threads also share the
+# worker's in-process job pool and background refreshers.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = 'gthread'
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "60"))
+keepalive = 5
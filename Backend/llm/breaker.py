@@ -0,0 +1,153 @@
+# llm/breaker.py
+# Circuit breaker for upstream Gemini calls. Outcomes of recent calls are kept
+# in a rolling window; once too many of them fail or run slow the circuit
+# opens and callers fail fast (routes use their local fallbacks) instead of
+# waiting on a sick upstream. After OPEN_SECONDS one probe call is let through
+# (half-open): success closes the circuit, failure opens it again.
+from dotenv import load_dotenv
+from collections import deque
+import os
+import threading
+import time
+
+load_dotenv(override=True)
+
+# --- CONFIG ---
+WINDOW_SECONDS = float(os.getenv("LLM_BREAKER_WINDOW_SECONDS", "60"))
+MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+SLOW_CALL_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "10"))
+SLOW_CALL_RATE = float(os.getenv("LLM_BREAKER_SLOW_CALL_RATE", "0.5"))
+OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+PROBE_TIMEOUT_SECONDS = float(os.getenv("LLM_BREAKER_PROBE_TIMEOUT_SECONDS", "30"))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_lock = threading.Lock()
+_window = deque()          # (timestamp, ok, latency_seconds)
+_state = CLOSED
+_opened_at = 0.0
+_probe_started = None      # monotonic time the half-open probe was let through
+_stats = {
+    "trips": 0,
+    "short_circuited": 0,
+    "probes": 0,
+    "last_trip_reason": None,
+}
+
+
+def _prune(now):
+    while _window and now - _window[0][0] > WINDOW_SECONDS:
+        _window.popleft()
+
+
+def _trip(now, reason):
+    global _state, _opened_at, _probe_started
+    _state = OPEN
+    _opened_at = now
+    _probe_started = None
+    _window.clear()
+    _stats["trips"] += 1
+    _stats["last_trip_reason"] = reason
+    print(f"[WARN] LLM circuit opened: {reason}")
+
+
+def _current_state(now):
+    """Move OPEN -> HALF_OPEN once the cool-down is over. Caller holds the lock."""
+    global _state
+    if _state == OPEN and now - _opened_at >= OPEN_SECONDS:
+        _state = HALF_OPEN
+    return _state
+
+
+def is_open():
+    """True while calls would be refused; does not claim the half-open probe."""
+    with _lock:
+        state = _current_state(time.monotonic())
+        if state == HALF_OPEN:
+            return _probe_started is not None and time.monotonic() - _probe_started < PROBE_TIMEOUT_SECONDS
+        return state == OPEN
+
+
+def allow():
+    """May a call go upstream now? In half-open state only one probe at a time is allowed."""
+    global _probe_started
+    with _lock:
+        now = time.monotonic()
+        state = _current_state(now)
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            # A probe that never reported back (shed by the limiter, client gone)
+            # must not wedge the breaker, so it expires after PROBE_TIMEOUT_SECONDS.
+            if _probe_started is None or now - _probe_started >= PROBE_TIMEOUT_SECONDS:
+                _probe_started = now
+                _stats["probes"] += 1
+                return True
+        _stats["short_circuited"] += 1
+        return False
+
+
+def record_success(latency):
+    global _state, _probe_started
+    with _lock:
+        now = time.monotonic()
+        if _current_state(now) == HALF_OPEN:
+            if latency >= SLOW_CALL_SECONDS:
+                _trip(now, f"probe took {latency:.1f}s")
+                return
+            _state = CLOSED
+            _probe_started = None
+            _window.clear()
+            print("[INFO] LLM circuit closed")
+            return
+        _window.append((now, True, latency))
+        _check(now)
+
+
+def record_failure(latency=0.0):
+    with _lock:
+        now = time.monotonic()
+        if _current_state(now) == HALF_OPEN:
+            _trip(now, "probe failed")
+            return
+        _window.append((now, False, latency))
+        _check(now)
+
+
+def _check(now):
+    if _state != CLOSED:
+        return
+    _prune(now)
+    total = len(_window)
+    if total < MIN_CALLS:
+        return
+    failures = sum(1 for _, ok, _ in _window if not ok)
+    slow = sum(1 for _, _, latency in _window if latency >= SLOW_CALL_SECONDS)
+    if failures / total >= ERROR_RATE:
+        _trip(now, f"{failures}/{total} calls failed")
+    elif slow / total >= SLOW_CALL_RATE:
+        _trip(now, f"{slow}/{total} calls slower than {SLOW_CALL_SECONDS:.0f}s")
+
+
+def reset():
+    global _state, _probe_started
+    with _lock:
+        _state = CLOSED
+        _probe_started = None
+        _window.clear()
+
+
+def get_stats():
+    with _lock:
+        now = time.monotonic()
+        _prune(now)
+        snapshot = dict(_stats)
+        snapshot["state"] = _current_state(now)
+        snapshot["window_calls"] = len(_window)
+        snapshot["window_failures"] = sum(1 for _, ok, _ in _window if not ok)
+        if snapshot["state"] != CLOSED:
+            snapshot["open_for_seconds"] = round(now - _opened_at, 1)
+    return snapshot
@@ -0,0 +1,182 @@
+# llm/cache.py
+# Content-addressed cache for parsed LLM results.
+# Tier 1 is a size-bounded in-process LRU; tier 2 is the `llm_cache` table so
+# every gunicorn worker (and every restart) can reuse a hit.
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import copy
+import hashlib
+import os
+import re
+import threading
+import time
+
+from llm.gateway import MODEL_ID
+
+load_dotenv(override=True)
+
+# --- CONFIG ---
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+SHARED_TIER = os.getenv("LLM_CACHE_SHARED", "true").lower() in ("1", "true", "yes")
+PURGE_EVERY = 100  # sets between sweeps of expired rows in the shared tier
+
+# Seconds a result stays fresh, per endpoint. 0 disables caching.
+ENDPOINT_TTLS = {
+    "analyze": int(os.getenv("LLM_CACHE_TTL_ANALYZE", 3600)),
+    "canvas": int(os.getenv("LLM_CACHE_TTL_CANVAS", 86400)),
+    "competitors": int(os.getenv("LLM_CACHE_TTL_COMPETITORS", 86400)),
+    "market": int(os.getenv("LLM_CACHE_TTL_MARKET", 21600)),
+    "valuation": int(os.getenv("LLM_CACHE_TTL_VALUATION", 3600)),
+    # Users press "generate" to get *new* ideas, so repeats are not cached.
+    "generate_idea": int(os.getenv("LLM_CACHE_TTL_GENERATE_IDEA", 0)),
+}
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (value, expires_at monotonic)
+_stats = {
+    "hits": 0,
+    "shared_hits": 0,
+    "misses": 0,
+    "sets": 0,
+    "evictions": 0,
+    "expirations": 0,
+    "shared_errors": 0,
+}
+
+
+def make_key(prompt, model=MODEL_ID):
+    """sha256 over the model ID and the whitespace-normalized prompt."""
+    normalized = re.sub(r'\s+', ' ', prompt).strip()
+    return hashlib.sha256(f"{model}\x00{normalized}".encode('utf-8')).hexdigest()
+
+
+def ttl_for(endpoint):
+    return ENDPOINT_TTLS.get(endpoint, 0)
+
+
+def _bump(key, amount=1):
+    with _lock:
+        _stats[key] += amount
+
+
+def _local_get(key):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del _entries[key]
+            _stats["expirations"] += 1
+            return None
+        _entries.move_to_end(key)
+        return value
+
+
+def _local_set(key, value, ttl):
+    with _lock:
+        _entries[key] = (value, time.monotonic() + ttl)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def _shared_table():
+    # Imported lazily so the cache module stays usable outside the Flask app.
+    from database.models import LLMCacheEntry
+    return LLMCacheEntry.__table__
+
+
+def _shared_get(key):
+    from database.db import db
+    table = _shared_table()
+    try:
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                table.select().where(table.c.key == key, table.c.expires_at > datetime.utcnow())
+            ).first()
+    except Exception as e:
+        _bump("shared_errors")
+        print(f"[WARN] LLM cache read error: {e}")
+        return None, 0
+    if row is None:
+        return None, 0
+    return row.value, (row.expires_at - datetime.utcnow()).total_seconds()
+
+
+def _shared_set(key, endpoint, value, ttl, purge):
+    from database.db import db
+    table = _shared_table()
+    now = datetime.utcnow()
+    try:
+        # Own connection + transaction so a cache write never commits or
+        # rolls back whatever the calling route has pending in db.session.
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.key == key))
+            conn.execute(table.insert().values(
+                key=key, endpoint=endpoint, value=value,
+                expires_at=now + timedelta(seconds=ttl), created_at=now
+            ))
+            if purge:
+                conn.execute(table.delete().where(table.c.expires_at <= now))
+    except Exception as e:
+        _bump("shared_errors")
+        print(f"[WARN] LLM cache write error: {e}")
+
+
+def get(endpoint, prompt, model=MODEL_ID):
+    """Return the cached result for this prompt, or None on a miss."""
+    if ttl_for(endpoint) <= 0:
+        return None
+
+    key = make_key(prompt, model)
+    value = _local_get(key)
+    if value is not None:
+        _bump("hits")
+        # Callers are free to mutate what they get back (the analyzer vetoes do).
+        return copy.deepcopy(value)
+
+    if SHARED_TIER:
+        value, remaining = _shared_get(key)
+        if value is not None:
+            _local_set(key, copy.deepcopy(value), remaining)
+            _bump("shared_hits")
+            return value
+
+    _bump("misses")
+    return None
+
+
+def put(endpoint, prompt, value, model=MODEL_ID):
+    """Store a parsed result under this prompt for the endpoint's TTL."""
+    ttl = ttl_for(endpoint)
+    if ttl <= 0 or value is None:
+        return
+
+    key = make_key(prompt, model)
+    _local_set(key, copy.deepcopy(value), ttl)
+    with _lock:
+        _stats["sets"] += 1
+        purge = _stats["sets"] % PURGE_EVERY == 0
+    if SHARED_TIER:
+        _shared_set(key, endpoint, value, ttl, purge)
+
+
+def clear():
+    """Drop every entry in this worker's in-process tier."""
+    with _lock:
+        _entries.clear()
+
+
+def get_stats():
+    with _lock:
+        snapshot = dict(_stats)
+        snapshot["size"] = len(_entries)
+    lookups = snapshot["hits"] + snapshot["shared_hits"] + snapshot["misses"]
+    snapshot["hit_rate"] = round((snapshot["hits"] + snapshot["shared_hits"]) / lookups, 3) if lookups else 0
+    snapshot["max_entries"] = MAX_ENTRIES
+    snapshot["shared_tier"] = SHARED_TIER
+    snapshot["ttls"] = dict(ENDPOINT_TTLS)
+    return snapshot
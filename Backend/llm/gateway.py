@@ -0,0 +1,316 @@
+# llm/gateway.py
+# One shared Gemini client per worker process. Every blueprint calls the model
+# through generate() so timeouts, concurrency, the circuit breaker and metrics
+# live in one place.
+from google import genai
+from google.genai import types
+from dotenv import load_dotenv
+import os
+import threading
+import time
+
+from llm import limiter, breaker
+
+load_dotenv(override=True)
+
+# --- CONFIG ---
+MODEL_ID = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
+TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+RETRYABLE_CODES = (429, 500, 502, 503, 504)
+
+
+class LLMError(Exception):
+    """Base error for any failed gateway call."""
+
+
+class LLMUnavailable(LLMError):
+    """No API key configured, so there is no client to call."""
+
+
+class LLMBusy(LLMError):
+    """All concurrency slots stayed taken for the whole queue timeout."""
+
+
+class LLMTimeout(LLMError):
+    """The model did not answer before the call deadline."""
+
+
+class LLMRateLimited(LLMError):
+    """Quota exhausted (locally predicted or a 429 upstream) within the call deadline."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMCircuitOpen(LLMError):
+    """The circuit breaker is open after recent upstream failures; fail fast."""
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "calls": 0,
+    "errors": 0,
+    "timeouts": 0,
+    "rejected": 0,
+    "retries": 0,
+    "rate_limited": 0,
+    "in_flight": 0,
+    "total_latency_ms": 0.0,
+    "max_latency_ms": 0.0,
+}
+
+
+def get_client():
+    """Return the process-wide client, creating it on first use (and again after a fork)."""
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            api_key = os.getenv("GEMINI_API_KEY")
+            _client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(timeout=int(TIMEOUT_SECONDS * 1000))
+            ) if api_key else None
+            _client_pid = os.getpid()
+    return _client
+
+
+def is_available():
+    return get_client() is not None
+
+
+def _record(key, latency_ms=None):
+    with _stats_lock:
+        _stats[key] += 1
+        if latency_ms is not None:
+            _stats["total_latency_ms"] += latency_ms
+            _stats["max_latency_ms"] = max(_stats["max_latency_ms"], latency_ms)
+
+
+def _is_timeout(exc):
+    name = type(exc).__name__.lower()
+    return "timeout" in name or "deadline" in name
+
+
+def _retry_hint(exc):
+    """Seconds the API asked us to wait (Retry-After header or google.rpc.RetryInfo), if any."""
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers and headers.get('Retry-After'):
+        try:
+            return float(headers.get('Retry-After'))
+        except ValueError:
+            pass
+    try:
+        for detail in exc.details['error']['details']:
+            if 'retryDelay' in detail:
+                return float(str(detail['retryDelay']).rstrip('s'))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def _is_upstream_failure(exc):
+    """Timeouts, 429/5xx and connection errors count against the breaker; a 4xx is our fault."""
+    if isinstance(exc, LLMTimeout) or _is_timeout(exc):
+        return True
+    code = getattr(exc, 'code', None)
+    return code is None or code in RETRYABLE_CODES
+
+
+def _check_breaker():
+    if not breaker.allow():
+        raise LLMCircuitOpen("Gemini circuit is open after recent failures")
+
+
+def _take_quota(remaining):
+    try:
+        limiter.acquire(max_wait=min(limiter.MAX_WAIT_SECONDS, max(remaining, 0)))
+    except limiter.RateLimited as e:
+        _record("rate_limited")
+        raise LLMRateLimited(str(e), e.retry_after) from e
+
+
+def _call_once(client, prompt, model, deadline):
+    if not _slots.acquire(timeout=QUEUE_TIMEOUT_SECONDS):
+        _record("rejected")
+        raise LLMBusy(f"LLM gateway saturated ({MAX_CONCURRENCY} calls in flight)")
+
+    with _stats_lock:
+        _stats["in_flight"] += 1
+    start = time.perf_counter()
+    try:
+        response = client.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                http_options=types.HttpOptions(timeout=int(deadline * 1000))
+            )
+        )
+        latency = time.perf_counter() - start
+        _record("calls", latency * 1000)
+        breaker.record_success(latency)
+        if not response.text:
+            _record("errors")
+            raise LLMError("Empty response from AI")
+        return response.text
+    except LLMError:
+        raise
+    except Exception as e:
+        latency = time.perf_counter() - start
+        _record("calls", latency * 1000)
+        if _is_upstream_failure(e):
+            breaker.record_failure(latency)
+        else:
+            breaker.record_success(latency)
+        if _is_timeout(e):
+            _record("timeouts")
+            raise LLMTimeout(f"LLM call exceeded {deadline:.1f}s") from e
+        _record("errors")
+        raise
+    finally:
+        with _stats_lock:
+            _stats["in_flight"] -= 1
+        _slots.release()
+
+
+def generate(prompt, timeout=None, model=MODEL_ID, retries=MAX_RETRIES):
+    """Send a prompt to Gemini and return the response text.
+
+    Every attempt first takes a token from the shared quota (llm/limiter.py),
+    then waits at most QUEUE_TIMEOUT_SECONDS for a free slot. 429/5xx answers
+    are retried with jittered exponential backoff that honours the API's retry
+    hint, but only while the whole call still fits in `timeout` seconds
+    (default TIMEOUT_SECONDS); otherwise the error is raised at once.
+    While the circuit breaker is open, LLMCircuitOpen is raised without calling out.
+    """
+    client = get_client()
+    if not client:
+        raise LLMUnavailable("AI Client not initialized. Check your API Key.")
+
+    deadline = timeout or TIMEOUT_SECONDS
+    started = time.monotonic()
+    for attempt in range(retries + 1):
+        _check_breaker()
+        remaining = deadline - (time.monotonic() - started)
+        _take_quota(remaining)
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            _record("timeouts")
+            raise LLMTimeout(f"LLM call exceeded {deadline}s")
+        try:
+            return _call_once(client, prompt, model, remaining)
+        except LLMError:
+            raise
+        except Exception as e:
+            code = getattr(e, 'code', None)
+            if code not in RETRYABLE_CODES:
+                raise
+            hint = _retry_hint(e)
+            delay = limiter.backoff_delay(attempt, hint=hint)
+            if code == 429:
+                # Tell every worker to hold off, not just this request
+                limiter.penalize(hint or delay)
+            remaining = deadline - (time.monotonic() - started)
+            if attempt == retries or delay >= remaining:
+                if code == 429:
+                    _record("rate_limited")
+                    raise LLMRateLimited(f"Gemini quota exhausted (retry in {delay:.1f}s)", delay) from e
+                raise
+            _record("retries")
+            print(f"[WARN] Gemini returned {code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def generate_stream(prompt, timeout=None, model=MODEL_ID):
+    """Stream a Gemini response, yielding text chunks as they arrive.
+
+    Holds a concurrency slot until the stream is exhausted or closed, and
+    aborts with LLMTimeout once `timeout` seconds have passed in total.
+    """
+    client = get_client()
+    if not client:
+        raise LLMUnavailable("AI Client not initialized. Check your API Key.")
+
+    deadline = timeout or TIMEOUT_SECONDS
+    # Quota and slot waits count against the same budget as the stream itself
+    started = time.monotonic()
+    _check_breaker()
+    _take_quota(deadline)
+    remaining = deadline - (time.monotonic() - started)
+    if remaining <= 0:
+        _record("timeouts")
+        raise LLMTimeout(f"LLM stream exceeded {deadline}s")
+    if not _slots.acquire(timeout=min(QUEUE_TIMEOUT_SECONDS, remaining)):
+        _record("rejected")
+        raise LLMBusy(f"LLM gateway saturated ({MAX_CONCURRENCY} calls in flight)")
+    remaining = deadline - (time.monotonic() - started)
+    if remaining <= 0:
+        _slots.release()
+        _record("timeouts")
+        raise LLMTimeout(f"LLM stream exceeded {deadline}s")
+
+    with _stats_lock:
+        _stats["in_flight"] += 1
+    start = time.perf_counter()
+    try:
+        stream = client.models.generate_content_stream(
+            model=model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                http_options=types.HttpOptions(timeout=int(remaining * 1000))
+            )
+        )
+        for chunk in stream:
+            if time.monotonic() - started > deadline:
+                raise LLMTimeout(f"LLM stream exceeded {deadline}s")
+            if chunk.text:
+                yield chunk.text
+        latency = time.perf_counter() - start
+        _record("calls", latency * 1000)
+        breaker.record_success(latency)
+    except LLMTimeout:
+        latency = time.perf_counter() - start
+        _record("calls", latency * 1000)
+        _record("timeouts")
+        breaker.record_failure(latency)
+        raise
+    except Exception as e:
+        latency = time.perf_counter() - start
+        _record("calls", latency * 1000)
+        if _is_upstream_failure(e):
+            breaker.record_failure(latency)
+        else:
+            breaker.record_success(latency)
+        if _is_timeout(e):
+            _record("timeouts")
+            raise LLMTimeout(f"LLM stream exceeded {deadline}s") from e
+        _record("errors")
+        raise
+    finally:
+        with _stats_lock:
+            _stats["in_flight"] -= 1
+        _slots.release()
+
+
+def get_stats():
+    """Snapshot of the gateway counters for this worker."""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot["avg_latency_ms"] = round(snapshot["total_latency_ms"] / snapshot["calls"], 1) if snapshot["calls"] else 0
+    snapshot["total_latency_ms"] = round(snapshot["total_latency_ms"], 1)
+    snapshot["max_latency_ms"] = round(snapshot["max_latency_ms"], 1)
+    snapshot["max_concurrency"] = MAX_CONCURRENCY
+    snapshot["model"] = MODEL_ID
+    return snapshot
@@ -0,0 +1,195 @@
+# llm/json_stream.py
+# Incremental JSON parser for model output, shared by every AI route.
+# Text is fed in chunks as it arrives, and every value that finishes at a
+# shallow enough depth is returned right away as (path, value), so routes can
+# forward partial results before the model has finished the whole document.
+# Markdown fences and surrounding prose are skipped, and values can be checked
+# against an endpoint schema from llm/schemas.py.
+import json
+
+from llm.schemas import validate, schema_at
+
+
+class _Frame:
+    def __init__(self, kind):
+        self.kind = kind            # 'obj' or 'arr'
+        self.key = None             # current key (objects)
+        self.index = 0              # current element index (arrays)
+        self.expect = 'key' if kind == 'obj' else 'value'
+        self.value_start = None     # buffer offset where the current child began
+
+    @property
+    def current(self):
+        return self.key if self.kind == 'obj' else self.index
+
+
+class JSONStreamParser:
+    """Feed model output with feed(); collect the full document with close().
+
+    feed() returns a list of (path, value) for each value completed in that
+    chunk whose path is at most `max_depth` long. For
+    '{"canvas": {"channels": [...]}}' with max_depth=2 that is
+    (('canvas', 'channels'), [...]) followed by (('canvas',), {...}).
+
+    Anything before the document (fences, "Here is...", stray braces in prose)
+    is skipped: a candidate that turns out not to be valid JSON, or not to match
+    `schema`, is dropped and scanning resumes after it. Values that do not
+    match their part of the schema are not reported.
+    """
+
+    def __init__(self, schema=None, max_depth=2):
+        self.schema = schema
+        self.max_depth = max_depth
+        self.root = None
+        self._buf = []
+        self._scan = 0
+        self._done = False
+        self._reset()
+
+    def _reset(self):
+        self._stack = []
+        self._root_start = None
+        self._in_string = False
+        self._escape = False
+        self._string_role = None
+        self._string_start = None
+        self._prim_start = None
+
+    def _text(self, start, end):
+        return ''.join(self._buf[start:end])
+
+    def feed(self, chunk):
+        events = []
+        self._buf.extend(chunk)
+        while self._scan < len(self._buf) and not self._done:
+            i = self._scan
+            self._scan += 1
+            self._step(self._buf[i], i, events)
+        return events
+
+    def close(self):
+        """Return the parsed root document, or None if no valid one completed."""
+        return self.root
+
+    # --- state machine ---
+
+    def _step(self, c, i, events):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == '\\':
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                self._string_closed(i, events)
+            return
+
+        if not self._stack:
+            if c in '{[':
+                self._root_start = i
+                self._stack.append(_Frame('obj' if c == '{' else 'arr'))
+            return
+
+        if self._prim_start is not None:
+            if c not in ',}] \t\r\n':
+                return
+            self._value_done(i, events)
+            self._prim_start = None
+
+        if c.isspace():
+            return
+
+        frame = self._stack[-1]
+        if frame.kind == 'obj':
+            if frame.expect == 'key':
+                if c == '"':
+                    self._open_string('key', i)
+                elif c == '}':
+                    self._close_frame(i, events)
+            elif frame.expect == 'colon':
+                if c == ':':
+                    frame.expect = 'value'
+            elif frame.expect == 'value':
+                self._start_value(frame, c, i)
+            elif frame.expect == 'comma':
+                if c == ',':
+                    frame.expect = 'key'
+                elif c == '}':
+                    self._close_frame(i, events)
+        else:
+            if frame.expect == 'value':
+                if c == ']':
+                    self._close_frame(i, events)
+                else:
+                    self._start_value(frame, c, i)
+            elif frame.expect == 'comma':
+                if c == ',':
+                    frame.expect = 'value'
+                elif c == ']':
+                    self._close_frame(i, events)
+
+    def _open_string(self, role, i):
+        self._in_string = True
+        self._string_role = role
+        self._string_start = i
+
+    def _start_value(self, frame, c, i):
+        frame.value_start = i
+        if c in '{[':
+            self._stack.append(_Frame('obj' if c == '{' else 'arr'))
+        elif c == '"':
+            self._open_string('value', i)
+        else:
+            self._prim_start = i
+
+    def _string_closed(self, i, events):
+        frame = self._stack[-1]
+        if self._string_role == 'key':
+            raw = self._text(self._string_start, i + 1)
+            try:
+                frame.key = json.loads(raw)
+            except json.JSONDecodeError:
+                frame.key = raw[1:-1]
+            frame.expect = 'colon'
+        else:
+            self._value_done(i + 1, events)
+
+    def _value_done(self, end, events):
+        frame = self._stack[-1]
+        path = tuple(f.current for f in self._stack)
+        if len(path) <= self.max_depth:
+            try:
+                value = json.loads(self._text(frame.value_start, end))
+                if validate(value, schema_at(self.schema, path)):
+                    events.append((path, value))
+            except json.JSONDecodeError:
+                pass
+        if frame.kind == 'arr':
+            frame.index += 1
+        frame.expect = 'comma'
+
+    def _close_frame(self, i, events):
+        self._stack.pop()
+        if self._stack:
+            self._value_done(i + 1, events)
+            return
+
+        start = self._root_start
+        self._reset()
+        try:
+            root = json.loads(self._text(start, i + 1))
+        except json.JSONDecodeError:
+            # Prose like "use {braces}" looked like a document; rescan after it.
+            self._scan = start + 1
+            return
+        if validate(root, self.schema):
+            self.root = root
+            self._done = True
+        # Valid JSON of the wrong shape: keep looking after it.
+
+
+def parse(text, schema=None):
+    """Parse a complete model response; returns the document or None."""
+    parser = JSONStreamParser(schema=schema, max_depth=0)
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,206 @@
+# llm/limiter.py
+# Client-side token buckets sized to the Gemini quota (requests per minute and
+# per day). Buckets live in the `llm_rate_limit` table so all gunicorn workers
+# draw from one budget; updates are compare-and-swap on `updated_at`, which
+# works the same on SQLite and Postgres. Without an app context (or if the
+# table is unreachable) each worker falls back to an in-process bucket.
+from flask import has_app_context
+from sqlalchemy.exc import IntegrityError
+from dotenv import load_dotenv
+import os
+import random
+import threading
+import time
+
+load_dotenv(override=True)
+
+# --- CONFIG ---
+RPM = float(os.getenv("LLM_RPM", "15"))
+RPD = float(os.getenv("LLM_RPD", "1000"))
+MAX_WAIT_SECONDS = float(os.getenv("LLM_RATE_MAX_WAIT_SECONDS", "5"))
+SHARED_BUCKETS = os.getenv("LLM_RATE_SHARED", "true").lower() in ("1", "true", "yes")
+CAS_ATTEMPTS = 5
+
+BUCKETS = {
+    # name: (capacity, refill per second)
+    "rpm": (RPM, RPM / 60.0),
+    "rpd": (RPD, RPD / 86400.0),
+}
+
+
+class RateLimited(Exception):
+    """No quota left within the caller's wait budget; shed the request."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Conflict(Exception):
+    """A concurrent worker updated the shared bucket between our read and write."""
+
+
+_lock = threading.Lock()
+_local = {name: {"tokens": cap, "updated_at": time.time(), "blocked_until": 0.0}
+          for name, (cap, _) in BUCKETS.items()}
+_stats = {
+    "acquired": 0,
+    "waited": 0,
+    "shed": 0,
+    "penalties": 0,
+    "shared_errors": 0,
+}
+
+
+def _bump(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def _refill(state, name, now):
+    capacity, rate = BUCKETS[name]
+    return min(capacity, state["tokens"] + (now - state["updated_at"]) * rate)
+
+
+def _plan(states, now):
+    """Given current bucket states, return (new_states, wait_seconds). wait 0 = granted."""
+    new_states = {}
+    wait = 0.0
+    for name, state in states.items():
+        tokens = _refill(state, name, now)
+        blocked = state["blocked_until"] - now
+        if blocked > 0:
+            wait = max(wait, blocked)
+        elif tokens < 1:
+            wait = max(wait, (1 - tokens) / BUCKETS[name][1])
+        new_states[name] = {"tokens": tokens - 1, "updated_at": now, "blocked_until": state["blocked_until"]}
+    return new_states, wait
+
+
+def _try_local(now):
+    with _lock:
+        new_states, wait = _plan(_local, now)
+        if wait == 0:
+            _local.update(new_states)
+        return wait
+
+
+def _table():
+    from database.models import LLMRateBucket
+    return LLMRateBucket.__table__
+
+
+def _try_shared(now):
+    """One CAS round against the shared buckets. Returns wait seconds, or None on conflict."""
+    from database.db import db
+    table = _table()
+    with db.engine.begin() as conn:
+        rows = {r.name: r for r in conn.execute(table.select())}
+        missing = [name for name in BUCKETS if name not in rows]
+        if missing:
+            conn.execute(table.insert(), [
+                {"name": name, "tokens": BUCKETS[name][0], "updated_at": now, "blocked_until": 0.0}
+                for name in missing
+            ])
+            return None
+
+        states = {name: {"tokens": rows[name].tokens, "updated_at": rows[name].updated_at,
+                         "blocked_until": rows[name].blocked_until} for name in BUCKETS}
+        new_states, wait = _plan(states, now)
+        if wait > 0:
+            return wait
+
+        for name, state in new_states.items():
+            result = conn.execute(
+                table.update()
+                .where(table.c.name == name, table.c.updated_at == rows[name].updated_at)
+                .values(tokens=state["tokens"], updated_at=state["updated_at"])
+            )
+            if result.rowcount != 1:
+                # Another worker got there first; roll back and re-read.
+                raise _Conflict()
+        return 0.0
+
+
+def _try_once():
+    now = time.time()
+    if SHARED_BUCKETS and has_app_context():
+        for _ in range(CAS_ATTEMPTS):
+            try:
+                wait = _try_shared(now)
+            except (_Conflict, IntegrityError):
+                wait = None
+            except Exception as e:
+                _bump("shared_errors")
+                print(f"[WARN] Rate limiter DB error, using local bucket: {e}")
+                break
+            if wait is not None:
+                return wait
+            time.sleep(random.uniform(0, 0.02))
+            now = time.time()
+    return _try_local(now)
+
+
+def acquire(max_wait=None):
+    """Take one request from the quota, waiting up to `max_wait` seconds for it.
+
+    Raises RateLimited straight away if the next token is further off than the
+    wait budget, so callers can fall back instead of queueing behind the quota.
+    """
+    budget = MAX_WAIT_SECONDS if max_wait is None else max_wait
+    deadline = time.monotonic() + budget
+    waited = False
+    while True:
+        wait = _try_once()
+        if wait == 0:
+            _bump("acquired")
+            if waited:
+                _bump("waited")
+            return
+        remaining = deadline - time.monotonic()
+        if wait > remaining:
+            _bump("shed")
+            raise RateLimited(f"Gemini quota exhausted, next slot in {wait:.1f}s", wait)
+        waited = True
+        # Small jitter so workers woken together do not collide on the same token
+        time.sleep(wait + random.uniform(0, 0.05))
+
+
+def penalize(seconds):
+    """Upstream said 429: stop every worker from calling for `seconds`."""
+    _bump("penalties")
+    until = time.time() + seconds
+    with _lock:
+        for state in _local.values():
+            state["blocked_until"] = max(state["blocked_until"], until)
+    if SHARED_BUCKETS and has_app_context():
+        from database.db import db
+        table = _table()
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    table.update().where(table.c.name == "rpm", table.c.blocked_until < until)
+                    .values(blocked_until=until)
+                )
+        except Exception as e:
+            _bump("shared_errors")
+            print(f"[WARN] Rate limiter DB error: {e}")
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0, hint=None):
+    """Full-jitter exponential backoff; an upstream retry hint sets the floor."""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if hint is not None:
+        delay = max(delay, hint)
+    return delay
+
+
+def get_stats():
+    with _lock:
+        snapshot = dict(_stats)
+        snapshot["local_tokens"] = {name: round(_refill(state, name, time.time()), 2)
+                                    for name, state in _local.items()}
+    snapshot["rpm"] = RPM
+    snapshot["rpd"] = RPD
+    snapshot["shared_buckets"] = SHARED_BUCKETS
+    return snapshot
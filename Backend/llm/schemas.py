@@ -0,0 +1,105 @@
+# llm/schemas.py
+# Expected shape of each endpoint's model output, checked by llm/json_stream.py.
+#
+# Mini schema language:
+#   str, bool, dict, NUMBER, ANY   -> isinstance check (NUMBER = int/float, not bool)
+#   [spec]                         -> list whose items all match spec
+#   {"key": spec, "opt?": spec}    -> dict with those keys ("?" = optional); extra keys allowed
+#   (spec, spec)                   -> matches any of the alternatives
+
+NUMBER = 'number'
+ANY = 'any'
+
+ANALYZE = {
+    "score": NUMBER,
+    "analysis?": str,
+    "recommendations?": [str],
+}
+
+CANVAS = {
+    "canvas": {
+        "keyPartners?": [str],
+        "keyActivities?": [str],
+        "keyResources?": [str],
+        "valuePropositions?": [str],
+        "customerRelationships?": [str],
+        "channels?": [str],
+        "customerSegments?": [str],
+        "costStructure?": [str],
+        "revenueStreams?": [str],
+    }
+}
+
+COMPETITORS = {
+    "summary": str,
+    "competitors": [{
+        "name": str,
+        "strengths?": [str],
+        "weaknesses?": [str],
+        "marketPosition?": str,
+        "threatLevel?": str,
+    }],
+}
+
+MARKET = {
+    "summary": str,
+    "growth_trend": [{"year": (str, NUMBER), "market_size": NUMBER}],
+    "sentiment_distribution": [dict],
+    "trending_startups_heatmap": [{
+        "name": str,
+        "subtitle?": str,
+        "competition?": str,
+        "avgFunding?": (str, NUMBER),
+        "successRate?": NUMBER,
+    }],
+}
+
+VALUATION_FACTORS = {
+    "key_factors": [str],
+}
+
+IDEAS = [{
+    "name": str,
+    "problem": str,
+    "solution": str,
+    "audience": str,
+}]
+
+
+def validate(value, schema):
+    """True if `value` matches `schema` (see the mini language above)."""
+    if schema is None or schema == ANY:
+        return True
+    if schema == NUMBER:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if isinstance(schema, tuple):
+        return any(validate(value, alt) for alt in schema)
+    if isinstance(schema, list):
+        return isinstance(value, list) and all(validate(item, schema[0]) for item in value)
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            return False
+        for key, spec in schema.items():
+            optional = key.endswith('?')
+            name = key[:-1] if optional else key
+            if name not in value:
+                if not optional:
+                    return False
+            elif not validate(value[name], spec):
+                return False
+        return True
+    return isinstance(value, schema)
+
+
+def schema_at(schema, path):
+    """Sub-schema for the value at `path` (None = unconstrained)."""
+    for step in path:
+        if isinstance(schema, list) and isinstance(step, int):
+            schema = schema[0]
+        elif isinstance(schema, dict) and isinstance(step, str):
+            schema = schema.get(step, schema.get(step + '?'))
+        else:
+            return None
+        if schema is None:
+            return None
+    return schema
@@ -0,0 +1,174 @@
+# llm/singleflight.py
+# Coalesces concurrent identical LLM requests into one upstream call.
+# Inside a worker, followers wait on the leader's threading.Event. Across
+# workers, the leader holds a row in `llm_inflight` and publishes its result
+# there for a short grace period so other workers can pick it up.
+from datetime import datetime, timedelta
+from flask import has_app_context
+from sqlalchemy.exc import IntegrityError
+import copy
+import os
+import socket
+import threading
+import time
+import uuid
+
+from llm.gateway import TIMEOUT_SECONDS, QUEUE_TIMEOUT_SECONDS
+
+# --- CONFIG ---
+SHARED_LOCKS = os.getenv("LLM_SINGLEFLIGHT_SHARED", "true").lower() in ("1", "true", "yes")
+WAIT_SECONDS = TIMEOUT_SECONDS + QUEUE_TIMEOUT_SECONDS
+LEASE_SECONDS = WAIT_SECONDS + 5    # a crashed leader's row expires after this
+RESULT_GRACE_SECONDS = 5            # how long a finished result stays readable
+POLL_SECONDS = 0.2
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_lock = threading.Lock()
+_calls = {}
+_stats = {
+    "leaders": 0,
+    "coalesced": 0,
+    "remote_coalesced": 0,
+    "wait_timeouts": 0,
+}
+
+
+def _bump(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def _table():
+    from database.models import LLMInflight
+    return LLMInflight.__table__
+
+
+def _try_acquire(key, owner):
+    """Returns ('acquired' | 'done' | 'busy' | 'error', value)."""
+    from database.db import db
+    table = _table()
+    now = datetime.utcnow()
+    try:
+        with db.engine.begin() as conn:
+            row = conn.execute(table.select().where(table.c.key == key)).first()
+            if row is not None:
+                if row.expires_at > now:
+                    return ('done', row.value) if row.status == 'done' else ('busy', None)
+                conn.execute(table.delete().where(table.c.key == key, table.c.expires_at <= now))
+            conn.execute(table.insert().values(
+                key=key, owner=owner, status='pending',
+                expires_at=now + timedelta(seconds=LEASE_SECONDS)
+            ))
+        return 'acquired', None
+    except IntegrityError:
+        # Another worker inserted the row between our read and our insert.
+        return 'busy', None
+    except Exception as e:
+        print(f"[WARN] Single-flight lock error: {e}")
+        return 'error', None
+
+
+def _publish(key, owner, value):
+    from database.db import db
+    table = _table()
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(table.update().where(table.c.key == key, table.c.owner == owner).values(
+                status='done', value=value,
+                expires_at=datetime.utcnow() + timedelta(seconds=RESULT_GRACE_SECONDS)
+            ))
+    except Exception as e:
+        print(f"[WARN] Single-flight publish error: {e}")
+
+
+def _release(key, owner):
+    from database.db import db
+    table = _table()
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.key == key, table.c.owner == owner))
+    except Exception as e:
+        print(f"[WARN] Single-flight release error: {e}")
+
+
+def _run_across_workers(key, fn):
+    if not SHARED_LOCKS or not has_app_context():
+        return fn()
+
+    owner = f"{_OWNER}:{uuid.uuid4().hex[:8]}"
+    deadline = time.monotonic() + WAIT_SECONDS
+    while True:
+        state, value = _try_acquire(key, owner)
+        if state == 'acquired':
+            break
+        if state == 'done':
+            _bump("remote_coalesced")
+            return value
+        if state == 'error':
+            return fn()
+        if time.monotonic() >= deadline:
+            _bump("wait_timeouts")
+            return fn()
+        time.sleep(POLL_SECONDS)
+
+    try:
+        value = fn()
+    except Exception:
+        _release(key, owner)
+        raise
+    _publish(key, owner, value)
+    return value
+
+
+def do(key, fn):
+    """Run fn() once for every concurrent caller sharing `key`; all get its result.
+
+    fn must return something JSON-serializable so other workers can read it.
+    Exceptions raised by the leader are re-raised in its local followers.
+    """
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _Call()
+            _calls[key] = call
+            _stats["leaders"] += 1
+        else:
+            _stats["coalesced"] += 1
+
+    if not leader:
+        if not call.done.wait(WAIT_SECONDS):
+            _bump("wait_timeouts")
+            return fn()
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.value)
+
+    try:
+        value = _run_across_workers(key, fn)
+        call.value = copy.deepcopy(value)
+        return value
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            _calls.pop(key, None)
+        call.done.set()
+
+
+def get_stats():
+    with _lock:
+        snapshot = dict(_stats)
+        snapshot["in_flight"] = len(_calls)
+    snapshot["shared_locks"] = SHARED_LOCKS
+    return snapshot
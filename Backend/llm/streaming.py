@@ -0,0 +1,75 @@
+# llm/streaming.py
+# Server-Sent Events helpers for the `?stream=1` mode of the AI routes.
+from flask import Response, stream_with_context
+import json
+
+from llm import gateway, cache
+from llm.json_stream import JSONStreamParser
+
+
+def wants_stream(req):
+    return req.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',  # stop nginx/Render proxies from buffering
+        }
+    )
+
+
+def replay_json(document, schema, select):
+    """Yield the SSE events stream_json would send for an already complete document."""
+    parser = JSONStreamParser(schema=schema, max_depth=2)
+    for path, value in parser.feed(json.dumps(document)):
+        selected = select(path, value)
+        if selected:
+            yield sse_event(*selected)
+    yield sse_event('done', document)
+
+
+def stream_json(endpoint, prompt, schema, select, fallback, store=None):
+    """Yield SSE events for a JSON document generated by the model.
+
+    Values are checked against `schema` (see llm/schemas.py) before they are
+    sent. `select(path, value)` maps each completed value to an (event, data) pair,
+    or None to skip it. The stream always ends with a `done` event carrying
+    the full document (or `fallback` after an `error` event).
+    A cached result is replayed through the same events without calling Gemini.
+    Routes that keep their own store pass `store(result)`; the LLM cache is
+    then neither read nor written.
+    """
+    cached = cache.get(endpoint, prompt) if store is None else None
+    if cached is not None:
+        yield from replay_json(cached, schema, select)
+        return
+
+    parser = JSONStreamParser(schema=schema, max_depth=2)
+    try:
+        for chunk in gateway.generate_stream(prompt):
+            for path, value in parser.feed(chunk):
+                selected = select(path, value)
+                if selected:
+                    yield sse_event(*selected)
+
+        result = parser.close()
+        if result is None:
+            raise ValueError("Model output was not valid JSON")
+        if store is None:
+            cache.put(endpoint, prompt, result)
+        else:
+            store(result)
+    except Exception as e:
+        print(f"[WARN] {endpoint} stream error: {e}")
+        yield sse_event('error', {'error': str(e)})
+        result = fallback
+
+    yield sse_event('done', result)
@@ -0,0 +1,319 @@
+# ml/comparables.py
+# Nearest-neighbour index of comparable startups: every row of
+# startup_data.csv plus every saved StartupAnalysis. Rows are embedded as
+# float32 vectors (scaled numerics, ordinal scope/competition/burn, one-hot
+# sector) in a growable matrix, and queries scan it in fixed-size blocks with
+# a running top-k, so memory per query stays flat as analyses grow into the
+# millions. New analyses are appended by polling the table past the highest
+# id already indexed.
+#
+# Only dataset rows carry an outcome, so find() ranks those alone. Saved
+# analyses are private: find_own() matches a signed-in user against their
+# own earlier analyses, leaving out repeats of the same pitch.
+from flask import has_app_context
+import numpy as np
+import os
+import threading
+import time
+
+from ml import dataset, predictor
+
+# --- CONFIG ---
+BLOCK_ROWS = int(os.getenv("COMPARABLES_BLOCK_ROWS", "65536"))
+REFRESH_SECONDS = float(os.getenv("COMPARABLES_REFRESH_SECONDS", "5"))
+DEFAULT_K = 5
+MAX_K = 50
+
+MARKET_ORDER = ['Local', 'Regional', 'National', 'Global']
+LEVEL_ORDER = ['Low', 'Medium', 'High']
+DEFAULT_BURN = 'Medium'
+
+DATASET_OWNER = -1
+ANONYMOUS = 0
+
+
+class _Index:
+    def __init__(self, dim, capacity=1024):
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.norms = np.zeros(capacity, dtype=np.float32)
+        # >= 0: StartupAnalysis.id; < 0: -(csv row + 1)
+        self.refs = np.zeros(capacity, dtype=np.int64)
+        # Owning user_id; DATASET_OWNER for csv rows, ANONYMOUS for analyses without a user
+        self.owners = np.zeros(capacity, dtype=np.int64)
+        self.size = 0
+        self.dataset_rows = 0
+        self.last_analysis_id = 0
+
+    def append(self, vectors, refs, owners):
+        needed = self.size + len(vectors)
+        if needed > len(self.matrix):
+            capacity = max(needed, 2 * len(self.matrix))
+            matrix = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+            norms = np.zeros(capacity, dtype=np.float32)
+            ref_arr = np.zeros(capacity, dtype=np.int64)
+            owner_arr = np.zeros(capacity, dtype=np.int64)
+            matrix[:self.size] = self.matrix[:self.size]
+            norms[:self.size] = self.norms[:self.size]
+            ref_arr[:self.size] = self.refs[:self.size]
+            owner_arr[:self.size] = self.owners[:self.size]
+            # Readers holding the old arrays keep a consistent snapshot
+            self.matrix, self.norms, self.refs, self.owners = matrix, norms, ref_arr, owner_arr
+        end = self.size + len(vectors)
+        self.matrix[self.size:end] = vectors
+        self.norms[self.size:end] = np.einsum('ij,ij->i', vectors, vectors)
+        self.refs[self.size:end] = refs
+        self.owners[self.size:end] = owners
+        self.size = end
+
+
+class _Encoder:
+    """Maps raw feature values to index vectors, scaled with dataset statistics."""
+
+    def __init__(self, ds):
+        self.sectors = list(ds.vocabularies['Sector'])
+        funding = np.log1p(np.asarray(ds['Funding'], dtype=np.float64))
+        team = np.log1p(np.asarray(ds['TeamSize'], dtype=np.float64))
+        innovation = np.asarray(ds['Innovation_Index'], dtype=np.float64)
+        self.center = np.array([funding.mean(), team.mean(), innovation.mean()])
+        self.scale = np.array([funding.std(), team.std(), innovation.std()]) + 1e-9
+        self.default_innovation = float(np.median(innovation))
+        self.dim = 3 + 3 + len(self.sectors)
+
+    def encode(self, funding, team_size, sector, market, competition, innovation, burn_rate):
+        """Vectors for arrays of raw values (funding in dataset units, i.e. ₹ lakhs)."""
+        n = len(funding)
+        out = np.zeros((n, self.dim), dtype=np.float32)
+        numeric = np.column_stack([
+            np.log1p(np.maximum(np.asarray(funding, dtype=np.float64), 0)),
+            np.log1p(np.maximum(np.asarray(team_size, dtype=np.float64), 0)),
+            np.asarray(innovation, dtype=np.float64),
+        ])
+        out[:, :3] = (numeric - self.center) / self.scale
+        # Ordered categories on [0, 1]; a one-step difference costs about as much as 1 std
+        out[:, 3] = _ordinal(market, MARKET_ORDER)
+        out[:, 4] = _ordinal(competition, LEVEL_ORDER)
+        out[:, 5] = _ordinal(burn_rate, LEVEL_ORDER)
+        lookup = {name: i for i, name in enumerate(self.sectors)}
+        codes = np.array([lookup.get(name, -1) for name in sector], dtype=np.int64)
+        known = np.nonzero(codes >= 0)[0]
+        # 1/sqrt(2) so a sector mismatch adds exactly 1 to the squared distance
+        out[known, 6 + codes[known]] = 0.7071
+        return out
+
+
+def pitch_features(data):
+    """Raw feature values of an /analyze payload, as stored on StartupAnalysis.features."""
+    features = predictor.to_features(data)
+    try:
+        features['Innovation'] = float(data['innovationIndex'])
+    except (KeyError, TypeError, ValueError):
+        features['Innovation'] = None  # dataset median at encode time
+    features['BurnRate'] = str(data.get('burnRate') or DEFAULT_BURN).strip().capitalize()
+    return features
+
+
+def _ordinal(values, order):
+    lookup = {name: i / (len(order) - 1) for i, name in enumerate(order)}
+    return np.array([lookup.get(v, 0.5) for v in values], dtype=np.float32)
+
+
+_index = None
+_encoder = None
+_checked_at = None
+_lock = threading.Lock()
+_stats = {"queries": 0, "dataset_rows": 0, "analysis_rows": 0, "last_query_ms": 0.0}
+
+
+def _build():
+    global _index, _encoder
+    ds = dataset.load()
+    encoder = _Encoder(ds)
+    vectors = encoder.encode(
+        ds['Funding'], ds['TeamSize'], ds.decode('Sector'), ds.decode('MarketSize'),
+        ds.decode('Competition'), ds['Innovation_Index'], ds.decode('Burn_Rate')
+    )
+    index = _Index(encoder.dim, capacity=max(1024, 2 * len(ds)))
+    index.append(vectors, -(np.arange(len(ds)) + 1), np.full(len(ds), DATASET_OWNER))
+    index.dataset_rows = len(ds)
+    _stats["dataset_rows"] = len(ds)
+    _encoder, _index = encoder, index
+
+
+def _encode_features(rows):
+    """Vectors for a list of pitch_features() dicts."""
+    median = _encoder.default_innovation
+    return _encoder.encode(
+        [f['Funding'] for f in rows], [f['TeamSize'] for f in rows], [f['Sector'] for f in rows],
+        [f['MarketSize'] for f in rows], [f['Competition'] for f in rows],
+        [median if f.get('Innovation') is None else f['Innovation'] for f in rows],
+        [f.get('BurnRate') or DEFAULT_BURN for f in rows]
+    )
+
+
+def _analysis_features(row):
+    if row.features:
+        return row.features
+    # Saved before features were stored: only funding and market are known
+    return {
+        'Funding': (row.funding or 0) / predictor.RUPEES_PER_FUNDING_UNIT,
+        'TeamSize': 1,
+        'Sector': None,
+        'MarketSize': predictor.MARKETS.get(str(row.market_size or '').strip().lower(), predictor.DEFAULT_MARKET),
+        'Competition': predictor.DEFAULT_COMPETITION,
+    }
+
+
+def _refresh(batch=50000):
+    """Append analyses saved since the last look (by any worker)."""
+    if not has_app_context():
+        return
+    from database.db import db
+    from database.models import StartupAnalysis
+    while True:
+        rows = db.session.query(
+            StartupAnalysis.id, StartupAnalysis.user_id, StartupAnalysis.funding,
+            StartupAnalysis.market_size, StartupAnalysis.features
+        ).filter(StartupAnalysis.id > _index.last_analysis_id) \
+         .order_by(StartupAnalysis.id).limit(batch).all()
+        if not rows:
+            return
+        _index.append(_encode_features([_analysis_features(r) for r in rows]), [r.id for r in rows],
+                      [r.user_id or ANONYMOUS for r in rows])
+        _index.last_analysis_id = rows[-1].id
+        _stats["analysis_rows"] += len(rows)
+        if len(rows) < batch:
+            return
+
+
+def ensure_fresh(force=False):
+    global _checked_at
+    now = time.monotonic()
+    if not force and _index is not None and _checked_at is not None and now - _checked_at < REFRESH_SECONDS:
+        return
+    with _lock:
+        if _index is None:
+            _build()
+        try:
+            _refresh()
+        except Exception as e:
+            print(f"[WARN] Comparables refresh failed: {e}")
+        _checked_at = now
+
+
+def mark_stale():
+    """Called after this worker saves analyses so the next query picks them up."""
+    global _checked_at
+    _checked_at = None
+
+
+def _nearest(query, k, owner=DATASET_OWNER):
+    """(ref, squared distance) of the k nearest rows owned by `owner`, scanning block by block."""
+    # Size first: rows below it are present in whichever arrays we then pick up
+    size = _index.size
+    matrix, norms, refs, owners = _index.matrix, _index.norms, _index.refs, _index.owners
+    # Dataset rows come first in the matrix, analyses after them
+    first, last = (0, _index.dataset_rows) if owner == DATASET_OWNER else (_index.dataset_rows, size)
+    q_norm = float(query @ query)
+    best_d = np.empty(0, dtype=np.float32)
+    best_i = np.empty(0, dtype=np.int64)
+    for start in range(first, last, BLOCK_ROWS):
+        end = min(start + BLOCK_ROWS, last)
+        # |a-b|^2 = |a|^2 - 2ab + |b|^2, one GEMV per block
+        d = norms[start:end] - 2 * (matrix[start:end] @ query) + q_norm
+        mine = np.nonzero(owners[start:end] == owner)[0]
+        d = d[mine]
+        if len(d) > k:
+            part = np.argpartition(d, k)[:k]
+        else:
+            part = np.arange(len(d))
+        best_d = np.concatenate([best_d, d[part]])
+        best_i = np.concatenate([best_i, mine[part] + start])
+        if len(best_d) > k:
+            keep = np.argpartition(best_d, k)[:k]
+            best_d, best_i = best_d[keep], best_i[keep]
+    order = np.argsort(best_d, kind='stable')
+    return [(int(refs[best_i[j]]), float(max(best_d[j], 0))) for j in order]
+
+
+def _query_vector(data):
+    return _encode_features([pitch_features(data)])[0]
+
+
+def _describe_dataset(hits):
+    ds = dataset.load()
+    out = []
+    for ref, distance in hits:
+        row = -ref - 1
+        out.append({
+            "name": str(ds['StartupName'][row]),
+            "source": "dataset",
+            "sector": str(ds.decode('Sector')[row]),
+            "market_size": str(ds.decode('MarketSize')[row]),
+            "funding": float(ds['Funding'][row]) * predictor.RUPEES_PER_FUNDING_UNIT,
+            "team_size": int(ds['TeamSize'][row]),
+            "outcome": "success" if int(ds['Outcome'][row]) == 1 else "failure",
+            "success_probability": float(ds['SuccessProb'][row]),
+            "distance": round(distance ** 0.5, 4),
+        })
+    return out
+
+
+def _record(started):
+    _stats["queries"] += 1
+    _stats["last_query_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def find(data, k=DEFAULT_K):
+    """Top-k dataset startups (each with a known outcome) for an /analyze payload, nearest first."""
+    started = time.perf_counter()
+    ensure_fresh()
+    k = max(1, min(int(k), MAX_K))
+    result = _describe_dataset(_nearest(_query_vector(data), k))
+    _record(started)
+    return result
+
+
+def _same_pitch(a, b):
+    return str(a or '').strip().lower() == str(b or '').strip().lower()
+
+
+def find_own(data, user_id, k=DEFAULT_K, exclude_ids=()):
+    """The user's own earlier analyses closest to this pitch, nearest first.
+
+    Analyses of the same startup name are left out (they are repeats, not
+    comparables), as are `exclude_ids` and rows deleted since they were
+    indexed; the scan over-fetches until k rows survive or none are left.
+    """
+    if not user_id or not has_app_context():
+        return []
+    from database.models import StartupAnalysis
+    started = time.perf_counter()
+    ensure_fresh()
+    k = max(1, min(int(k), MAX_K))
+    query = _query_vector(data)
+    exclude = {int(i) for i in exclude_ids if i is not None}
+    name = data.get('startupName')
+
+    want = 2 * k + len(exclude)
+    while True:
+        hits = _nearest(query, want, owner=int(user_id))
+        ids = [ref for ref, _ in hits if ref not in exclude]
+        rows = {r.id: r for r in StartupAnalysis.query.with_entities(*StartupAnalysis.summary_columns())
+                .filter(StartupAnalysis.id.in_(ids), StartupAnalysis.user_id == user_id)} if ids else {}
+        out = []
+        for ref, distance in hits:
+            row = rows.get(ref)
+            if row is None or _same_pitch(row.startup_name, name):
+                continue
+            out.append(dict(StartupAnalysis.summary_dict(row), distance=round(distance ** 0.5, 4)))
+        if len(out) >= k or len(hits) < want:
+            break
+        want *= 2
+    _record(started)
+    return out[:k]
+
+
+def get_stats():
+    snapshot = dict(_stats)
+    snapshot["indexed"] = _index.size if _index is not None else 0
+    return snapshot
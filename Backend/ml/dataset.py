@@ -0,0 +1,160 @@
+# ml/dataset.py
+# Typed loader for data/startup_data.csv. The CSV is column-aligned with
+# spaces, so every cell is stripped and converted to an explicit dtype;
+# categorical columns are encoded to sorted-vocabulary codes (the same codes
+# LabelEncoder produces). The parsed columns are cached as one .npy file per
+# column under data/cache/<csv sha256>/ and memory-mapped on later loads, so
+# training, evaluation and serve-time code share one zero-copy parse.
+import numpy as np
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+# --- CONFIG ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(SCRIPT_DIR, '..', 'data', 'startup_data.csv')
+CACHE_DIR = os.getenv("DATASET_CACHE_DIR", os.path.join(SCRIPT_DIR, '..', 'data', 'cache'))
+
+# Column -> dtype, in file order. 'category' columns are stored as int16 codes.
+COLUMNS = {
+    'StartupName': 'str',
+    'Sector': 'category',
+    'Funding': 'float64',
+    'TeamSize': 'int32',
+    'MarketSize': 'category',
+    'Competition': 'category',
+    'Innovation_Index': 'float64',
+    'Burn_Rate': 'category',
+    'Outcome': 'int8',
+    'SuccessProb': 'float64',
+}
+
+_memo = {}  # (path, size, mtime) -> Dataset
+_lock = threading.Lock()
+
+
+class Dataset:
+    """Columns of the startup CSV as NumPy arrays (memory-mapped when cached)."""
+
+    def __init__(self, columns, vocabularies, data_hash):
+        self.columns = columns
+        self.vocabularies = vocabularies
+        self.data_hash = data_hash
+        self.rows = len(next(iter(columns.values())))
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        """Raw column: values for numeric/str columns, int codes for categories."""
+        return self.columns[name]
+
+    def decode(self, name):
+        """Category labels for a categorical column."""
+        return np.asarray(self.vocabularies[name])[self.columns[name]]
+
+    def matrix(self, features, dtype=np.float64):
+        """Stack columns (categories as codes) into an n_rows x n_features array."""
+        return np.column_stack([np.asarray(self.columns[f], dtype=dtype) for f in features])
+
+    def frame(self, decode=False):
+        """pandas DataFrame of the dataset (categories as codes unless `decode`)."""
+        import pandas as pd
+        return pd.DataFrame({
+            name: self.decode(name) if decode and name in self.vocabularies else np.asarray(values)
+            for name, values in self.columns.items()
+        })
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_csv(path=DATA_PATH):
+    """Parse the CSV into ({column: array}, {column: vocabulary}) with explicit dtypes."""
+    import pandas as pd
+    # Read every cell as text first: headers and values carry padding on both sides
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    header = [c.strip() for c in df.columns]
+    if header != list(COLUMNS):
+        raise ValueError(f"Unexpected columns in {path}: {header}")
+    df.columns = header
+
+    columns, vocabularies = {}, {}
+    for name, kind in COLUMNS.items():
+        values = df[name].str.strip()
+        if kind == 'str':
+            columns[name] = values.to_numpy(dtype=str)
+        elif kind == 'category':
+            vocab, codes = np.unique(values.to_numpy(dtype=str), return_inverse=True)
+            vocabularies[name] = [str(v) for v in vocab]
+            columns[name] = codes.astype(np.int16)
+        else:
+            columns[name] = pd.to_numeric(values, errors='raise').to_numpy(dtype=kind)
+    return columns, vocabularies
+
+
+def _write_cache(target, columns, vocabularies, data_hash):
+    tmp = f"{target}.{os.getpid()}.tmp"
+    os.makedirs(tmp, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), values)
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({'sha256': data_hash, 'columns': list(columns), 'vocabularies': vocabularies}, f)
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # Another process published the same cache first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _read_cache(target):
+    with open(os.path.join(target, 'meta.json')) as f:
+        meta = json.load(f)
+    columns = {name: np.load(os.path.join(target, f"{name}.npy"), mmap_mode='r')
+               for name in meta['columns']}
+    return Dataset(columns, meta['vocabularies'], meta['sha256'])
+
+
+def load(path=DATA_PATH, use_cache=True):
+    """The parsed dataset, from the columnar cache when the CSV is unchanged.
+
+    Within a process the result is memoised on the file's size and mtime, so
+    repeated calls cost one stat().
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    memo_key = (path, stat.st_size, stat.st_mtime_ns)
+    if memo_key in _memo:
+        return _memo[memo_key]
+
+    with _lock:
+        if memo_key in _memo:
+            return _memo[memo_key]
+        data_hash = file_hash(path)
+        target = os.path.join(CACHE_DIR, data_hash[:16])
+        dataset = None
+        if use_cache and os.path.isfile(os.path.join(target, 'meta.json')):
+            try:
+                dataset = _read_cache(target)
+            except Exception as e:
+                print(f"[WARN] Dataset cache unreadable, re-parsing CSV: {e}")
+        if dataset is None:
+            columns, vocabularies = parse_csv(path)
+            if use_cache:
+                try:
+                    os.makedirs(CACHE_DIR, exist_ok=True)
+                    _write_cache(target, columns, vocabularies, data_hash)
+                    dataset = _read_cache(target)
+                except Exception as e:
+                    print(f"[WARN] Could not write dataset cache: {e}")
+            if dataset is None:
+                dataset = Dataset(columns, vocabularies, data_hash)
+        _memo[memo_key] = dataset
+        return dataset
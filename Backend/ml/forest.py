@@ -0,0 +1,90 @@
+# ml/forest.py
+# The RandomForest flattened into contiguous NumPy arrays, so serving needs
+# neither sklearn nor joblib. export_forest() runs at training time;
+# load_forest() + Forest.predict_proba() run in the API workers.
+#
+# Every tree's nodes are concatenated into one set of arrays:
+#   feature[i], threshold[i]   split test `x[feature] <= threshold` (-1 = leaf)
+#   left[i], right[i]          global child indices (-1 = leaf)
+#   value[i]                   P(success) at a leaf
+#   roots[t]                   index of tree t's root node
+import numpy as np
+
+LEAF = -1
+
+
+def flatten_forest(model, vocabularies=None, feature_names=None, positive_class=1):
+    """Arrays (see above) for a fitted RandomForestClassifier and its encoder vocabularies."""
+    positive = list(model.classes_).index(positive_class)
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == LEAF
+        counts = tree.value[:, 0, :]
+        roots.append(offset)
+        feature.append(np.where(is_leaf, LEAF, tree.feature))
+        threshold.append(tree.threshold)
+        left.append(np.where(is_leaf, LEAF, tree.children_left + offset))
+        right.append(np.where(is_leaf, LEAF, tree.children_right + offset))
+        value.append(counts[:, positive] / counts.sum(axis=1))
+        offset += tree.node_count
+
+    arrays = {
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'value': np.concatenate(value).astype(np.float64),
+        'roots': np.array(roots, dtype=np.int32),
+        'max_depth': np.array(max(e.tree_.max_depth for e in model.estimators_), dtype=np.int32),
+    }
+    if feature_names is not None:
+        arrays['feature_names'] = np.array(feature_names)
+    for name, classes in (vocabularies or {}).items():
+        arrays[f'vocab_{name}'] = np.array([str(c) for c in classes])
+    return arrays
+
+
+def export_forest(model, path, vocabularies=None, feature_names=None, positive_class=1):
+    """Write a fitted RandomForestClassifier (and encoder vocabularies) to `path` as .npz."""
+    np.savez(path, **flatten_forest(model, vocabularies, feature_names, positive_class))
+
+
+class Forest:
+    """Pure-NumPy evaluator for an exported forest."""
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+        self.feature_names = [str(f) for f in arrays['feature_names']] if 'feature_names' in arrays else None
+        self.vocabularies = {key[len('vocab_'):]: [str(c) for c in arrays[key]]
+                             for key in arrays if key.startswith('vocab_')}
+
+    def predict_proba(self, X):
+        """P(success) for each row of X (n_rows x n_features), averaged over all trees."""
+        # sklearn compares float32 inputs against float64 thresholds; match it exactly
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.roots.size)).copy()
+        # Walk every (row, tree) pair one level per step; leaves stay put
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            active = feature != LEAF
+            if not active.any():
+                break
+            go_left = X[rows, np.where(active, feature, 0)] <= self.threshold[nodes]
+            nodes = np.where(active, np.where(go_left, self.left[nodes], self.right[nodes]), nodes)
+        return self.value[nodes].mean(axis=1)
+
+
+def load_forest(path):
+    with np.load(path) as data:
+        return Forest({key: data[key] for key in data.files})
@@ -0,0 +1,206 @@
+# ml/predictor.py
+# In-process inference for the local success model (the RandomForest written
+# by ml/train_model.py). The published registry version is loaded once per
+# worker and swapped in place when CURRENT changes, so a retrained model goes
+# live without a restart; routes call predict_one() / predict_batch() with raw
+# /analyze payloads. Scoring uses the NumPy export (ml/forest.py), so sklearn
+# is only imported if that is missing.
+from datetime import datetime
+import numpy as np
+import os
+import threading
+import time
+
+from ml import registry
+from ml.forest import Forest, flatten_forest, load_forest
+
+# --- CONFIG ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Used when nothing has been published to the registry yet
+MODEL_PATH = os.getenv("ML_MODEL_PATH", os.path.join(SCRIPT_DIR, 'models', 'startup_predictor.pkl'))
+FOREST_PATH = os.getenv("ML_FOREST_PATH", os.path.join(SCRIPT_DIR, 'models', 'startup_predictor.npz'))
+RELOAD_CHECK_SECONDS = float(os.getenv("ML_RELOAD_CHECK_SECONDS", "30"))
+FEATURES = ['Funding', 'TeamSize', 'Sector', 'MarketSize', 'Competition']
+
+# startup_data.csv records funding in ₹ lakhs; the API receives rupees
+RUPEES_PER_FUNDING_UNIT = 100000
+
+# Form values (see IdeaAnalyzer.jsx) -> training-set categories
+SECTORS = {
+    'ai': 'SaaS',
+    'saas': 'SaaS',
+    'fintech': 'FinTech',
+    'edtech': 'EdTech',
+    'healthcare': 'Healthcare',
+    'e-commerce': 'Retail',
+    'ecommerce': 'Retail',
+    'retail': 'Retail',
+    'agritech': 'AgriTech',
+    'logistics': 'Logistics',
+    'energy': 'Energy',
+    'foodtech': 'FoodTech',
+    'cybersecurity': 'Cybersecurity',
+}
+DEFAULT_SECTOR = 'SaaS'
+
+MARKETS = {
+    'global': 'Global',
+    'national': 'National',
+    'national (india)': 'National',
+    'regional': 'Regional',
+    'local': 'Local',
+}
+DEFAULT_MARKET = 'Regional'
+
+TEAM_SIZES = {
+    'solo founder': 1,
+    '2-5 employees': 4,
+    '5-10 employees': 8,
+    '10+ employees': 15,
+}
+DEFAULT_COMPETITION = 'Medium'
+
+class _Model:
+    """A loaded forest with its encoders; swapped as one object so readers never mix versions."""
+
+    def __init__(self, version, forest):
+        self.version = version
+        self.forest = forest
+        self.loaded_at = datetime.utcnow()
+        # Encoder vocabularies become plain {category: code} dicts, so encoding
+        # a request is a dict lookup rather than a LabelEncoder call.
+        self.encoders = {
+            'Sector': _lookup(forest.vocabularies['Sector'], DEFAULT_SECTOR),
+            'MarketSize': _lookup(forest.vocabularies['MarketSize'], DEFAULT_MARKET),
+            'Competition': _lookup(forest.vocabularies['Competition'], DEFAULT_COMPETITION),
+        }
+
+
+_model = None
+_checked_at = None  # monotonic time of the last look at the registry
+_lock = threading.Lock()
+_stats = {"loads": 0, "load_errors": 0}
+
+
+def _lookup(classes, default):
+    """{category: code} for an encoder vocabulary, plus the code used for unseen values."""
+    codes = {str(label): code for code, label in enumerate(classes)}
+    return codes, codes.get(default, 0)
+
+
+def _from_pickle(path):
+    import joblib
+    artifacts = joblib.load(path)
+    return Forest(flatten_forest(artifacts['model'], vocabularies={
+        'Sector': artifacts['le_sector'].classes_,
+        'MarketSize': artifacts['le_market'].classes_,
+        'Competition': artifacts['le_comp'].classes_,
+    }, feature_names=FEATURES))
+
+
+def _load_version(version):
+    if version is None:
+        # Pre-registry artifacts; the pickle is flattened in memory
+        if os.path.exists(FOREST_PATH):
+            return _Model('legacy', load_forest(FOREST_PATH))
+        return _Model('legacy', _from_pickle(MODEL_PATH))
+    path = registry.version_dir(version)
+    forest_file = os.path.join(path, 'forest.npz')
+    if os.path.exists(forest_file):
+        return _Model(version, load_forest(forest_file))
+    return _Model(version, _from_pickle(os.path.join(path, 'model.pkl')))
+
+
+def load(force=False):
+    """The current model, loaded once per process. Returns None if unavailable.
+
+    At most every RELOAD_CHECK_SECONDS the registry's CURRENT pointer is
+    re-read; if it names another version that one is loaded and swapped in.
+    If loading fails the previous model keeps serving.
+    """
+    global _model, _checked_at
+    now = time.monotonic()
+    if not force and _checked_at is not None and now - _checked_at < RELOAD_CHECK_SECONDS:
+        return _model
+    with _lock:
+        if not force and _checked_at is not None and now - _checked_at < RELOAD_CHECK_SECONDS:
+            return _model
+        _checked_at = now
+        version = registry.current_version()
+        if _model is not None and (version is None or version == _model.version):
+            return _model
+        try:
+            _model = _load_version(version)
+            _stats["loads"] += 1
+            print(f"✅ Local ML model {_model.version} loaded ({_model.forest.roots.size} trees)")
+        except Exception as e:
+            _stats["load_errors"] += 1
+            print(f"[WARN] Local ML model {version or ''} unavailable ({e}). Run ml/train_model.py")
+    return _model
+
+
+def is_available():
+    return load() is not None
+
+
+def get_stats():
+    model = load()
+    snapshot = dict(_stats)
+    snapshot["version"] = model.version if model else None
+    snapshot["loaded_at"] = model.loaded_at.isoformat() if model else None
+    snapshot["published_version"] = registry.current_version()
+    return snapshot
+
+
+def _team_size(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or '').strip().lower()
+    if text in TEAM_SIZES:
+        return TEAM_SIZES[text]
+    try:
+        return float(text)
+    except ValueError:
+        return 1.0
+
+
+def to_features(data):
+    """Map an /analyze payload onto the model's raw (unencoded) feature values."""
+    return {
+        'Funding': float(data.get('funding') or 0) / RUPEES_PER_FUNDING_UNIT,
+        'TeamSize': _team_size(data.get('teamSize')),
+        'Sector': SECTORS.get(str(data.get('industry') or '').strip().lower(), DEFAULT_SECTOR),
+        'MarketSize': MARKETS.get(str(data.get('marketSize') or '').strip().lower(), DEFAULT_MARKET),
+        'Competition': str(data.get('competition') or DEFAULT_COMPETITION).strip().capitalize(),
+    }
+
+
+def encode(data, model=None):
+    """One model input row (in FEATURES order) for an /analyze payload."""
+    model = model or load()
+    features = to_features(data)
+    row = [features['Funding'], features['TeamSize']]
+    for name in ('Sector', 'MarketSize', 'Competition'):
+        codes, default = model.encoders[name]
+        row.append(codes.get(features[name], default))
+    return row
+
+
+def predict_batch(items):
+    """Success probabilities (0-1) for a list of payloads in one vectorized call.
+
+    Returns None when the model is unavailable.
+    """
+    model = load()
+    if model is None:
+        return None
+    if not items:
+        return []
+    matrix = np.array([encode(data, model) for data in items], dtype=float)
+    return model.forest.predict_proba(matrix).tolist()
+
+
+def predict_one(data):
+    """Probability (0-1) that the pitch succeeds, or None when the model is unavailable."""
+    result = predict_batch([data])
+    return None if result is None else result[0]
@@ -0,0 +1,64 @@
+# ml/registry.py
+# Local registry of trained model versions. Each training run writes a
+# directory ml/models/<version>/ holding the artifacts and a manifest.json
+# (data hash, features, encoder vocabularies, CV metrics, params). The
+# CURRENT file names the version the API serves; publishing rewrites it
+# atomically, and running workers pick the change up (see ml/predictor.py).
+from datetime import datetime
+import json
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.getenv("ML_REGISTRY_DIR", os.path.join(SCRIPT_DIR, 'models'))
+CURRENT_FILE = os.path.join(REGISTRY_DIR, 'CURRENT')
+MANIFEST = 'manifest.json'
+
+
+def new_version(data_hash):
+    """Sortable version name: UTC timestamp plus the first 8 chars of the data hash."""
+    return f"{datetime.utcnow():%Y%m%d-%H%M%S}-{data_hash[:8]}"
+
+
+def version_dir(version, create=False):
+    path = os.path.join(REGISTRY_DIR, version)
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_manifest(version, manifest):
+    with open(os.path.join(version_dir(version, create=True), MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def load_manifest(version):
+    with open(os.path.join(version_dir(version), MANIFEST)) as f:
+        return json.load(f)
+
+
+def list_versions():
+    if not os.path.isdir(REGISTRY_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(REGISTRY_DIR)
+        if os.path.isfile(os.path.join(REGISTRY_DIR, name, MANIFEST))
+    )
+
+
+def current_version():
+    """Version named by CURRENT, or None if nothing has been published yet."""
+    try:
+        with open(CURRENT_FILE) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish(version):
+    """Point CURRENT at `version` (atomic rename, so readers never see a half-written file)."""
+    if version not in list_versions():
+        raise ValueError(f"Unknown model version '{version}'")
+    tmp = f"{CURRENT_FILE}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(version)
+    os.replace(tmp, CURRENT_FILE)
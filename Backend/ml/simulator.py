@@ -0,0 +1,189 @@
+# ml/simulator.py
+# Monte Carlo success-probability and runway simulator. A ridge-regularised
+# logistic model of Outcome is fitted on startup_data.csv (once per dataset
+# hash); each request then samples thousands of scenarios in one batched
+# NumPy pass:
+#   - model coefficients from their Laplace posterior N(beta, H^-1)
+#   - funding actually raised, lognormal around the ask
+#   - burn rate / competition, when not given, from the dataset's frequencies
+#   - monthly cost per head, lognormal around MONTHLY_COST_PER_HEAD
+# and reports percentiles of the success probability and of the runway.
+from dotenv import load_dotenv
+import numpy as np
+import json
+import os
+import threading
+import zlib
+
+from ml import dataset, predictor
+
+load_dotenv(override=True)
+
+# --- CONFIG ---
+DEFAULT_SCENARIOS = int(os.getenv("SIM_SCENARIOS", "20000"))
+MAX_SCENARIOS = 100000
+MAX_CELLS = 1000000                 # items x scenarios simulated per chunk in batch mode
+MONTHLY_COST_PER_HEAD = float(os.getenv("SIM_MONTHLY_COST_PER_HEAD", "60000"))  # ₹
+COST_SIGMA = 0.3
+FUNDING_SIGMA = 0.25                # how far the raise can land from the ask
+BURN_MULTIPLIERS = {'Low': 0.7, 'Medium': 1.0, 'High': 1.5}
+RIDGE = 1.0
+PERCENTILES = [5, 25, 50, 75, 95]
+RUNWAY_TARGET_MONTHS = 18
+
+MARKET_ORDER = ['Local', 'Regional', 'National', 'Global']
+LEVEL_ORDER = ['Low', 'Medium', 'High']
+
+
+class _Model:
+    def __init__(self, ds):
+        X = self.design(
+            np.asarray(ds['Funding'], dtype=np.float64),
+            np.asarray(ds['TeamSize'], dtype=np.float64),
+            _codes(ds.decode('MarketSize'), MARKET_ORDER),
+            _codes(ds.decode('Burn_Rate'), LEVEL_ORDER),
+            _codes(ds.decode('Competition'), LEVEL_ORDER),
+        )
+        y = np.asarray(ds['Outcome'], dtype=np.float64)
+        self.beta, cov = _fit_logistic(X, y)
+        self.chol = np.linalg.cholesky(cov)
+        self.burn_freq = _frequencies(ds.decode('Burn_Rate'), LEVEL_ORDER)
+        self.competition_freq = _frequencies(ds.decode('Competition'), LEVEL_ORDER)
+        self.data_hash = ds.data_hash
+
+    @staticmethod
+    def design(funding, team, market, burn, competition):
+        """Design matrix (..., 6): intercept, log funding, log team, market, burn, competition."""
+        return np.stack([
+            np.ones_like(funding),
+            np.log1p(np.maximum(funding, 0)),
+            np.log1p(np.maximum(team, 0)),
+            market / 3.0,
+            burn / 2.0,
+            competition / 2.0,
+        ], axis=-1)
+
+
+def _codes(values, order):
+    lookup = {name: i for i, name in enumerate(order)}
+    return np.array([lookup.get(str(v), 1) for v in values], dtype=np.float64)
+
+
+def _frequencies(values, order):
+    counts = np.array([np.sum(np.asarray(values) == name) for name in order], dtype=np.float64)
+    return (counts + 1) / (counts.sum() + len(order))  # add-one so no level is impossible
+
+
+def _fit_logistic(X, y, iterations=50):
+    """Newton/IRLS with an L2 penalty (not on the intercept). Returns (beta, posterior covariance)."""
+    penalty = np.full(X.shape[1], RIDGE)
+    penalty[0] = 1e-6
+    beta = np.zeros(X.shape[1])
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-X @ beta))
+        gradient = X.T @ (y - p) - penalty * beta
+        hessian = (X.T * (p * (1 - p))) @ X + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        beta += step
+        if np.abs(step).max() < 1e-8:
+            break
+    p = 1 / (1 + np.exp(-X @ beta))
+    hessian = (X.T * (p * (1 - p))) @ X + np.diag(penalty)
+    return beta, np.linalg.inv(hessian)
+
+
+_model = None
+_lock = threading.Lock()
+
+
+def _get_model():
+    global _model
+    ds = dataset.load()
+    if _model is None or _model.data_hash != ds.data_hash:
+        with _lock:
+            if _model is None or _model.data_hash != ds.data_hash:
+                _model = _Model(ds)
+    return _model
+
+
+def _inputs(data):
+    """Raw simulation inputs for an /analyze-style payload (None = unknown, sample it)."""
+    features = predictor.to_features(data)
+    burn = str(data.get('burnRate') or '').strip().capitalize()
+    competition = str(data.get('competition') or '').strip().capitalize()
+    return {
+        'funding': features['Funding'],
+        'team': max(features['TeamSize'], 1.0),
+        'market': float(MARKET_ORDER.index(features['MarketSize'])),
+        'burn': float(LEVEL_ORDER.index(burn)) if burn in LEVEL_ORDER else None,
+        'competition': float(LEVEL_ORDER.index(competition)) if competition in LEVEL_ORDER else None,
+    }
+
+
+def _seed(inputs, scenarios):
+    """Same payload -> same draws, so repeated requests give identical answers."""
+    return zlib.crc32(json.dumps([inputs, scenarios], sort_keys=True).encode())
+
+
+def _simulate_chunk(model, items, scenarios):
+    d = len(model.beta)
+    rngs = [np.random.default_rng(_seed(item, scenarios)) for item in items]
+
+    def draw(fn):
+        return np.stack([fn(rng) for rng in rngs])
+
+    funding = np.array([i['funding'] for i in items])[:, None] * draw(
+        lambda rng: rng.lognormal(-FUNDING_SIGMA ** 2 / 2, FUNDING_SIGMA, scenarios))
+    team = np.repeat(np.array([i['team'] for i in items])[:, None], scenarios, axis=1)
+    market = np.repeat(np.array([i['market'] for i in items])[:, None], scenarios, axis=1)
+    burn = draw(lambda rng: rng.choice(3, scenarios, p=model.burn_freq).astype(np.float64))
+    competition = draw(lambda rng: rng.choice(3, scenarios, p=model.competition_freq).astype(np.float64))
+    for row, item in enumerate(items):
+        if item['burn'] is not None:
+            burn[row] = item['burn']
+        if item['competition'] is not None:
+            competition[row] = item['competition']
+
+    # Success probability per scenario, each with its own posterior draw of beta
+    X = _Model.design(funding, team, market, burn, competition)               # (n, S, d)
+    betas = model.beta + draw(lambda rng: rng.standard_normal((scenarios, d))) @ model.chol.T
+    probability = 1 / (1 + np.exp(-np.einsum('nsd,nsd->ns', X, betas)))
+
+    # Runway in months: cash raised / (team x cost per head x burn multiplier)
+    multipliers = np.array([BURN_MULTIPLIERS[level] for level in LEVEL_ORDER])[burn.astype(int)]
+    cost = MONTHLY_COST_PER_HEAD * draw(lambda rng: rng.lognormal(-COST_SIGMA ** 2 / 2, COST_SIGMA, scenarios))
+    runway = funding * predictor.RUPEES_PER_FUNDING_UNIT / (team * cost * multipliers)
+    return probability, runway
+
+
+def _summarise(probability, runway, scenarios):
+    p_pct = np.percentile(probability, PERCENTILES)
+    r_pct = np.percentile(runway, PERCENTILES)
+    histogram, _ = np.histogram(probability, bins=10, range=(0, 1))
+    return {
+        'scenarios': scenarios,
+        'success_probability': round(float(probability.mean()) * 100, 1),
+        'success_percentiles': {f"p{q}": round(float(v) * 100, 1) for q, v in zip(PERCENTILES, p_pct)},
+        'success_histogram': (histogram / scenarios).round(4).tolist(),
+        'runway_months': {f"p{q}": round(float(v), 1) for q, v in zip(PERCENTILES, r_pct)},
+        'runway_over_target': round(float((runway >= RUNWAY_TARGET_MONTHS).mean()) * 100, 1),
+        'runway_target_months': RUNWAY_TARGET_MONTHS,
+    }
+
+
+def simulate_batch(items, scenarios=DEFAULT_SCENARIOS):
+    """Simulation summaries for a list of payloads, in input order."""
+    scenarios = max(100, min(int(scenarios), MAX_SCENARIOS))
+    model = _get_model()
+    inputs = [_inputs(data) for data in items]
+    chunk = max(1, MAX_CELLS // scenarios)
+    results = []
+    for start in range(0, len(inputs), chunk):
+        probability, runway = _simulate_chunk(model, inputs[start:start + chunk], scenarios)
+        results.extend(_summarise(probability[i], runway[i], scenarios) for i in range(len(probability)))
+    return results
+
+
+def simulate(data, scenarios=DEFAULT_SCENARIOS):
+    """Simulation summary for one payload."""
+    return simulate_batch([data], scenarios)[0]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+import os
+import sys
+import tempfile
+
+# Checks that the NumPy forest (ml/forest.py) scores exactly like sklearn.
+# Run directly (python ml/test_forest_parity.py) or through pytest.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FEATURES = ['Funding', 'TeamSize', 'Sector', 'MarketSize', 'Competition']
+RANDOM_ROWS = 2000
+
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..'))
+from ml.forest import export_forest, load_forest
+from ml import dataset
+
+
+def _training_data():
+    ds = dataset.load()
+    return pd.DataFrame(ds.matrix(FEATURES), columns=FEATURES), np.asarray(ds['Outcome'])
+
+
+def test_forest_matches_sklearn():
+    X, y = _training_data()
+    model = RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y)
+
+    # Training rows, random rows, and values sitting exactly on split thresholds
+    rng = np.random.default_rng(0)
+    random_rows = np.column_stack([
+        rng.uniform(0, 700, RANDOM_ROWS),
+        rng.integers(1, 150, RANDOM_ROWS),
+        rng.integers(0, 10, RANDOM_ROWS),
+        rng.integers(0, 4, RANDOM_ROWS),
+        rng.integers(0, 3, RANDOM_ROWS),
+    ])
+    tree = model.estimators_[0].tree_
+    edge_rows = np.tile(X.to_numpy(dtype=float)[:1], (tree.node_count, 1))
+    for i, (f, t) in enumerate(zip(tree.feature, tree.threshold)):
+        if f >= 0:
+            edge_rows[i, f] = t
+    rows = np.vstack([X.to_numpy(dtype=float), random_rows, edge_rows])
+
+    expected = model.predict_proba(pd.DataFrame(rows, columns=FEATURES))[:, 1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'forest.npz')
+        export_forest(model, path, feature_names=FEATURES)
+        forest = load_forest(path)
+
+    np.testing.assert_allclose(forest.predict_proba(rows), expected, atol=1e-12)
+    # A single 1-D row scores the same as in a batch
+    np.testing.assert_allclose(forest.predict_proba(rows[0]), expected[:1], atol=1e-12)
+
+
+if __name__ == '__main__':
+    try:
+        test_forest_matches_sklearn()
+        checked = len(_training_data()[0]) + RANDOM_ROWS
+        print(f"✅ NumPy forest matches sklearn on {checked} rows plus every split threshold")
+    except AssertionError as e:
+        print(f"❌ PARITY FAILED: {e}")
+        sys.exit(1)
@@ -1,29 +1,35 @@
 import joblib
+import numpy as np
 import pandas as pd
 from sklearn.metrics import classification_report, accuracy_score
 import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..'))
+from ml import dataset
 
 # Load your local "Manufactured" brain
-model_path = 'models/startup_predictor.pkl'
-data_path = '../data/startup_data.csv'
+model_path = os.path.join(SCRIPT_DIR, 'models', 'startup_predictor.pkl')
+FEATURES = ['Funding', 'TeamSize', 'Sector', 'MarketSize', 'Competition']
 
 if os.path.exists(model_path):
     artifacts = joblib.load(model_path)
     model = artifacts['model']
     print("✅ Local ML Model loaded successfully!")
     
-    # Load data to test accuracy
-    df = pd.read_csv(data_path)
-    # Convert text to numbers just for the test
-    X = df[['Funding', 'TeamSize', 'Sector', 'MarketSize', 'Competition']]
-    
-    # Simple mapping for the demo
-    X_encoded = pd.get_dummies(X) 
+    # Load data to test accuracy (typed, stripped and categorical-encoded)
+    ds = dataset.load()
+    X = pd.DataFrame(ds.matrix(FEATURES), columns=FEATURES)
+    y = np.asarray(ds['Outcome'])
+    predictions = model.predict(X)
     
     print("\n--- ML Model Logic Proof ---")
     print(f"Algorithm: Random Forest Classifier")
-    print(f"Features Analyzed: {list(X.columns)}")
-    print(f"Training Samples: {len(df)} startups")
+    print(f"Features Analyzed: {FEATURES}")
+    print(f"Training Samples: {len(ds)} startups")
+    print(f"Training Accuracy: {accuracy_score(y, predictions):.2%}")
     print("----------------------------")
+    print(classification_report(y, predictions))
 else:
-    print("❌ Model file not found. Run train.py first!")
\ No newline at end of file
+    print("❌ Model file not found. Run train_model.py first!")
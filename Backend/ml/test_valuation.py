@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Checks that the local valuation never rises as growth falls, down to
+# (and past) -100% a year. Run directly (python ml/test_valuation.py) or through pytest.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..'))
+from ml import valuation
+
+GROWTH_RATES = [200, 100, 40, 10, 0, -10, -50, -90, -95, -99, -100, -150, -1000]
+PAYLOADS = [
+    {'revenue': '1000000', 'industry': 'SaaS'},
+    {'revenue': '250000', 'users': '5000', 'industry': 'FinTech'},
+    {'users': '20000', 'industry': 'EdTech'},
+]
+
+
+def test_valuation_falls_with_growth():
+    for payload in PAYLOADS:
+        previous = None
+        for growth in GROWTH_RATES:
+            result = valuation.estimate(dict(payload, growth_rate=growth))
+            current = result['valuation']
+            assert all(v >= 0 for v in current.values()), (payload, growth, current)
+            assert all(v >= 0 for v in result['methods'].values()), (payload, growth, result['methods'])
+            if previous is not None:
+                for point in ('low', 'mid', 'high'):
+                    assert current[point] <= previous[point], (payload, growth, point, previous, current)
+            previous = current
+
+
+if __name__ == '__main__':
+    try:
+        test_valuation_falls_with_growth()
+        print(f"✅ Valuation falls monotonically over growth rates {GROWTH_RATES[0]}% to {GROWTH_RATES[-1]}%")
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
@@ -1,55 +1,145 @@
 import pandas as pd
+import numpy as np
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
 from sklearn.preprocessing import LabelEncoder
+import argparse
 import joblib
+import json
 import os
+import sys
+import time
+
+# Training pipeline: k-fold cross-validated grid search over the forest's
+# hyperparameters (all cores), then a versioned artifact + manifest in the
+# model registry (ml/registry.py). Usage:
+#   python ml/train_model.py [--folds 5] [--jobs -1] [--no-publish]
 
 # 1. NAVIGATION LOGIC based on your image
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__)) 
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 DATA_PATH = os.path.join(SCRIPT_DIR, '..', 'data', 'startup_data.csv')
 
-# Model will be saved in: Backend/ml/models/startup_predictor.pkl
+# Legacy copy of the published model for the ad-hoc test scripts
 MODEL_DIR = os.path.join(SCRIPT_DIR, 'models')
 MODEL_FILE = os.path.join(MODEL_DIR, 'startup_predictor.pkl')
 
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..'))
+from ml.forest import export_forest
+from ml import registry, dataset
+
+FEATURES = ['Funding', 'TeamSize', 'Sector', 'MarketSize', 'Competition']
+TARGET = 'Outcome'
+SEED = 42
+
+PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [None, 4, 8],
+    'min_samples_leaf': [1, 3],
+}
+SCORING = {'roc_auc': 'roc_auc', 'accuracy': 'accuracy', 'f1': 'f1'}
+REFIT_METRIC = 'roc_auc'
+
+
+def _encoder(classes):
+    """Fitted LabelEncoder for a known vocabulary (kept in the pickle for older readers)."""
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(classes)
+    return encoder
+
+
+parser = argparse.ArgumentParser(description="Train and register the startup success model")
+parser.add_argument('--folds', type=int, default=5)
+parser.add_argument('--jobs', type=int, default=-1, help="parallel CV fits (-1 = all cores)")
+parser.add_argument('--no-publish', action='store_true', help="register the version without serving it")
+args = parser.parse_args()
+
 print(f"📍 Training script location: {SCRIPT_DIR}")
 print(f"📂 Searching for data at: {os.path.abspath(DATA_PATH)}")
 
 try:
     if not os.path.exists(DATA_PATH):
         print(f"❌ ERROR: Cannot find startup_data.csv at {DATA_PATH}")
-        exit()
+        sys.exit(1)
 
-    df = pd.read_csv(DATA_PATH)
-    print(f"✅ Data loaded successfully ({len(df)} rows).")
+    # Typed, whitespace-stripped parse (cached as memory-mapped columns)
+    ds = dataset.load(DATA_PATH)
+    data_hash = ds.data_hash
+    print(f"✅ Data loaded successfully ({len(ds)} rows, sha256 {data_hash[:12]}).")
 
     # 2. PRE-PROCESSING
-    le_sector, le_market, le_comp = LabelEncoder(), LabelEncoder(), LabelEncoder()
-    df['Sector'] = le_sector.fit_transform(df['Sector'])
-    df['MarketSize'] = le_market.fit_transform(df['MarketSize'])
-    df['Competition'] = le_comp.fit_transform(df['Competition'])
-
-    X = df[['Funding', 'TeamSize', 'Sector', 'MarketSize', 'Competition']]
-    y = df['Outcome']
-
-    # 3. TRAINING
-    print("🧠 Training Random Forest Model...")
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X, y)
-
-    # 4. SAVE TO 'ml/models/'
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    
+    # Categories arrive as sorted-vocabulary codes, exactly what LabelEncoder would give
+    X = pd.DataFrame(ds.matrix(FEATURES), columns=FEATURES)
+    y = np.asarray(ds[TARGET])
+    vocabularies = {name: ds.vocabularies[name] for name in ('Sector', 'MarketSize', 'Competition')}
+    le_sector, le_market, le_comp = (_encoder(vocabularies[name]) for name in ('Sector', 'MarketSize', 'Competition'))
+
+    # 3. CROSS-VALIDATED HYPERPARAMETER SEARCH
+    # Fixed seeds for the folds and the forests make a run reproducible
+    folds = StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=SEED)
+    search = GridSearchCV(
+        RandomForestClassifier(random_state=SEED),
+        PARAM_GRID,
+        scoring=SCORING,
+        refit=REFIT_METRIC,
+        cv=folds,
+        n_jobs=args.jobs
+    )
+    candidates = int(np.prod([len(v) for v in PARAM_GRID.values()]))
+    print(f"🧠 Searching {candidates} forests x {args.folds} folds...")
+    started = time.perf_counter()
+    search.fit(X, y)
+    train_seconds = time.perf_counter() - started
+
+    best = search.best_index_
+    metrics = {
+        name: {
+            'mean': round(float(search.cv_results_[f'mean_test_{name}'][best]), 4),
+            'std': round(float(search.cv_results_[f'std_test_{name}'][best]), 4),
+        }
+        for name in SCORING
+    }
+    model = search.best_estimator_
+    print(f"📊 Best params: {search.best_params_}")
+    print(f"📊 CV metrics: {json.dumps(metrics)}")
+    print(f"⏱️ Search + refit took {train_seconds:.1f}s")
+
+    # 4. REGISTER THE VERSION
+    version = registry.new_version(data_hash)
+    out_dir = registry.version_dir(version, create=True)
+    export_forest(model, os.path.join(out_dir, 'forest.npz'),
+                  vocabularies=vocabularies, feature_names=FEATURES)
+
     artifacts = {
         'model': model,
         'le_sector': le_sector,
         'le_market': le_market,
         'le_comp': le_comp
     }
+    joblib.dump(artifacts, os.path.join(out_dir, 'model.pkl'))
+
+    registry.write_manifest(version, {
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'data': {'path': 'data/startup_data.csv', 'sha256': data_hash, 'rows': len(ds)},
+        'features': FEATURES,
+        'target': TARGET,
+        'vocabularies': vocabularies,
+        'params': search.best_params_,
+        'param_grid': PARAM_GRID,
+        'cv': {'folds': args.folds, 'seed': SEED, 'refit_metric': REFIT_METRIC, 'metrics': metrics},
+        'train_seconds': round(train_seconds, 2),
+        'versions': {'sklearn': sklearn.__version__, 'numpy': np.__version__, 'pandas': pd.__version__},
+    })
+    print(f"📦 Registered model version {version} in {out_dir}")
 
-    joblib.dump(artifacts, MODEL_FILE)
-    print(f"🎉 SUCCESS! Model saved at: {MODEL_FILE}")
+    # 5. PUBLISH (running API workers hot-swap to it)
+    if not args.no_publish:
+        registry.publish(version)
+        joblib.dump(artifacts, MODEL_FILE)
+        print(f"🎉 SUCCESS! Serving version {version}")
 
 except Exception as e:
-    print(f"❌ ERROR: {e}")
\ No newline at end of file
+    print(f"❌ ERROR: {e}")
+    sys.exit(1)
@@ -0,0 +1,203 @@
+# ml/valuation.py
+# Deterministic startup valuation. Three methods are blended:
+#   - revenue multiple: revenue x industry EV/revenue multiple, scaled by growth
+#   - user value: active users x industry value per user
+#   - DCF: revenue grown for PROJECTION_YEARS with growth fading to the
+#     terminal rate, margins ramping to the industry's mature margin,
+#     discounted at DISCOUNT_RATE with a Gordon terminal value
+# A grid of growth and multiple assumptions is evaluated in one broadcast
+# pass, which gives the valuation range and the sensitivity table.
+import numpy as np
+import re
+
+# --- CONFIG ---
+CURRENCY = '$'
+DISCOUNT_RATE = 0.25        # early-stage venture discount rate
+TERMINAL_GROWTH = 0.03
+PROJECTION_YEARS = 5
+REFERENCE_GROWTH = 0.40     # growth at which the table multiples apply
+MIN_GROWTH = -0.95          # a business cannot shrink by 100% or more a year
+GROWTH_STEPS = np.array([0.5, 0.75, 1.0, 1.25, 1.5])
+MULTIPLE_STEPS = np.array([0.6, 0.8, 1.0, 1.2, 1.4])
+METHOD_WEIGHTS = {'revenue_multiple': 0.5, 'dcf': 0.3, 'user_value': 0.2}
+
+# industry: (EV/revenue multiple, value per active user, mature FCF margin)
+INDUSTRY_MULTIPLES = {
+    'SaaS': (8.0, 250.0, 0.25),
+    'AI': (10.0, 200.0, 0.25),
+    'FinTech': (6.0, 150.0, 0.20),
+    'EdTech': (4.0, 40.0, 0.15),
+    'HealthTech': (5.0, 120.0, 0.18),
+    'E-commerce': (2.0, 60.0, 0.08),
+    'AgriTech': (3.0, 30.0, 0.10),
+    'Logistics': (2.0, 50.0, 0.08),
+    'Energy': (3.0, 80.0, 0.12),
+    'FoodTech': (2.0, 25.0, 0.07),
+    'Cybersecurity': (9.0, 300.0, 0.25),
+    'General Tech': (4.0, 80.0, 0.15),
+}
+DEFAULT_INDUSTRY = 'General Tech'
+
+# word prefix (regex) in the lower-cased industry -> table row
+INDUSTRY_KEYWORDS = [
+    ('saas', 'SaaS'), ('software', 'SaaS'),
+    ('cyber', 'Cybersecurity'), ('security', 'Cybersecurity'),
+    ('fintech', 'FinTech'), ('finance', 'FinTech'), ('payment', 'FinTech'),
+    ('edtech', 'EdTech'), ('education', 'EdTech'),
+    ('health', 'HealthTech'), ('med', 'HealthTech'),
+    ('commerce', 'E-commerce'), ('retail', 'E-commerce'),
+    ('agri', 'AgriTech'), ('farm', 'AgriTech'),
+    ('logistic', 'Logistics'), ('delivery', 'Logistics'),
+    ('energy', 'Energy'), ('climate', 'Energy'), ('solar', 'Energy'),
+    ('food', 'FoodTech'),
+    ('artificial intelligence', 'AI'), (r'ai\b', 'AI'),
+]
+
+
+def resolve_industry(industry):
+    text = str(industry or '').strip().lower()
+    for name in INDUSTRY_MULTIPLES:
+        if text == name.lower():
+            return name
+    for keyword, name in INDUSTRY_KEYWORDS:
+        if re.search(rf"\b{keyword}", text):
+            return name
+    return DEFAULT_INDUSTRY
+
+
+def parse_amount(value):
+    """Numbers, or strings like "$1,200,000" / "1.2M" / "500k"."""
+    if isinstance(value, (int, float)):
+        return max(float(value), 0.0)
+    text = str(value or '').strip().lower().replace(',', '')
+    match = re.search(r"(-?\d+(?:\.\d+)?)\s*([kmb]?)", text)
+    if not match:
+        return 0.0
+    scale = {'': 1, 'k': 1e3, 'm': 1e6, 'b': 1e9}[match.group(2)]
+    return max(float(match.group(1)) * scale, 0.0)
+
+
+def parse_growth(value):
+    """Annual growth as a fraction (never below MIN_GROWTH). Numbers and "40%" strings are both percentages."""
+    if isinstance(value, (int, float)):
+        return max(float(value) / 100, MIN_GROWTH)
+    match = re.search(r"-?\d+(?:\.\d+)?", str(value or ''))
+    return max(float(match.group()) / 100, MIN_GROWTH) if match else 0.0
+
+
+def format_amount(amount):
+    for threshold, suffix in ((1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+        if amount >= threshold:
+            return f"{CURRENCY}{amount / threshold:.1f}{suffix}"
+    return f"{CURRENCY}{amount:,.0f}"
+
+
+def _dcf(revenue, growth, margin):
+    """DCF value for arrays of starting growth rates (any shape); revenue and margin scalars."""
+    growth = np.asarray(growth, dtype=np.float64)[..., None]
+    years = np.arange(1, PROJECTION_YEARS + 1)
+    # Growth fades linearly to the terminal rate; margins ramp from 0 to mature
+    fade = (years - 1) / max(PROJECTION_YEARS - 1, 1)
+    yearly_growth = growth + (TERMINAL_GROWTH - growth) * fade
+    # Revenue can shrink to nothing but never turn negative
+    revenues = revenue * np.cumprod(np.maximum(1 + yearly_growth, 0.0), axis=-1)
+    cash_flows = revenues * margin * years / PROJECTION_YEARS
+    discount = (1 + DISCOUNT_RATE) ** years
+    terminal = cash_flows[..., -1] * (1 + TERMINAL_GROWTH) / (DISCOUNT_RATE - TERMINAL_GROWTH)
+    return (cash_flows / discount).sum(axis=-1) + terminal / discount[-1]
+
+
+def sweep(revenue, users, growth, industry):
+    """Blended valuation for every (growth, multiple) pair in one pass.
+
+    Returns (grid, growths, multiples, components) where grid[i, j] uses
+    growths[i] and multiples[j], and components holds each method's value at
+    the base assumptions.
+    """
+    multiple, per_user, margin = INDUSTRY_MULTIPLES[industry]
+    growth = max(growth, MIN_GROWTH)
+    # Scale the grid around the base growth, but never below zero
+    growths = np.maximum(growth * GROWTH_STEPS, 0.0) if growth > 0 else np.full(len(GROWTH_STEPS), growth)
+    multiples = multiple * MULTIPLE_STEPS
+
+    g = growths[:, None]
+    m = multiples[None, :]
+    growth_factor = np.clip((1 + g) / (1 + REFERENCE_GROWTH), 0.3, 3.0)
+    by_method = {
+        'revenue_multiple': np.broadcast_to(revenue * m * growth_factor, (len(growths), len(multiples))),
+        # DCF does not use a multiple, so it only varies down the growth axis
+        'dcf': np.broadcast_to(_dcf(revenue, g[:, 0], margin)[:, None], (len(growths), len(multiples))),
+        'user_value': np.broadcast_to(users * per_user * (m / multiple) * growth_factor,
+                                      (len(growths), len(multiples))),
+    }
+    # Methods take part when their input is known; a method that then values
+    # the company at 0 (e.g. DCF under steep decline) still counts, as 0
+    applicable = {'revenue_multiple': revenue > 0, 'dcf': revenue > 0, 'user_value': users > 0}
+    weights = {name: w for name, w in METHOD_WEIGHTS.items() if applicable[name]}
+    total = sum(weights.values())
+    grid = sum(by_method[name] * (w / total) for name, w in weights.items()) if weights \
+        else np.zeros((len(growths), len(multiples)))
+    mid = (len(growths) // 2, len(multiples) // 2)
+    components = {name: float(values[mid]) for name, values in by_method.items() if name in weights}
+    return grid, growths, multiples, components
+
+
+def _confidence(revenue, users, low, high):
+    """Lower when the grid range is wide or there is no revenue to anchor on."""
+    if high <= 0:
+        return 10
+    score = 90.0
+    if low > 0:
+        score -= 15 * np.log2(high / low)
+    if revenue <= 0:
+        score -= 25
+    if users <= 0:
+        score -= 10
+    return int(np.clip(score, 10, 95))
+
+
+def local_key_factors(revenue, users, growth, industry, components):
+    multiple = INDUSTRY_MULTIPLES[industry][0]
+    factors = []
+    if revenue > 0:
+        factors.append(f"{format_amount(revenue)} annual revenue at {multiple:.1f}x, the {industry} revenue multiple")
+    else:
+        factors.append("Pre-revenue: value rests on users and projected growth")
+    if growth >= REFERENCE_GROWTH:
+        factors.append(f"{growth:.0%} growth is above the {REFERENCE_GROWTH:.0%} benchmark, lifting the multiple")
+    else:
+        factors.append(f"{growth:.0%} growth is below the {REFERENCE_GROWTH:.0%} benchmark, compressing the multiple")
+    if users > 0:
+        factors.append(f"{int(users):,} users valued at about {format_amount(INDUSTRY_MULTIPLES[industry][1])} each")
+    elif 'dcf' in components:
+        factors.append(f"DCF at a {DISCOUNT_RATE:.0%} discount rate gives {format_amount(components['dcf'])}")
+    else:
+        factors.append("No user base reported yet")
+    return factors
+
+
+def estimate(data):
+    """Valuation for a /calculate_valuation payload (revenue, users, growth_rate, industry)."""
+    revenue = parse_amount(data.get('revenue', 0))
+    users = parse_amount(data.get('users', 0))
+    growth = parse_growth(data.get('growth_rate', data.get('growth', 0)))
+    industry = resolve_industry(data.get('industry'))
+
+    grid, growths, multiples, components = sweep(revenue, users, growth, industry)
+    low, mid, high = (float(v) for v in np.percentile(grid, [10, 50, 90]))
+    base_multiple = INDUSTRY_MULTIPLES[industry][0]
+
+    return {
+        "estimated_valuation": f"{format_amount(low)} - {format_amount(high)}",
+        "multiples_used": f"{base_multiple:.1f}x revenue ({industry})",
+        "confidence_score": f"{_confidence(revenue, users, low, high)}%",
+        "key_factors": local_key_factors(revenue, users, growth, industry, components),
+        "valuation": {"low": round(low), "mid": round(mid), "high": round(high)},
+        "methods": {name: round(value) for name, value in components.items()},
+        "industry": industry,
+        "sensitivity": {
+            "growth_rates": [round(float(g) * 100, 1) for g in growths],
+            "multiples": [round(float(m), 2) for m in multiples],
+            "valuations": np.round(grid).astype(np.int64).tolist(),
+        },
+    }
@@ -0,0 +1,118 @@
+import datetime
+import os
+import tempfile
+
+import jwt
+from sqlalchemy import event
+
+# Query-plan regression test for the per-user routes. Every statement the
+# history, dashboard, detail, share and delete routes send is recorded, then
+# EXPLAINed; a full scan of a table or a sort the index should have made
+# unnecessary fails the test. Runs on a temporary SQLite database, or on
+# Postgres when TEST_DATABASE_URL points at a disposable one:
+#   TEST_DATABASE_URL=postgresql://... python test_query_plans.py
+DB_FILE = os.path.join(tempfile.mkdtemp(), 'plans_test.db')
+os.environ['DATABASE_URL'] = os.getenv('TEST_DATABASE_URL', f"sqlite:///{DB_FILE}")
+
+from app import app
+from database.db import db
+from database.models import StartupAnalysis, User
+
+USERS = 20
+ANALYSES_PER_USER = 50
+
+
+def _seed():
+    """A few users with enough history that the planner has a real choice to make."""
+    now = datetime.datetime.utcnow()
+    users = [User(name=f"u{i}", email=f"plans{i}@example.com", password_hash='x') for i in range(USERS)]
+    db.session.add_all(users)
+    db.session.commit()
+    for user in users:
+        db.session.add_all(StartupAnalysis(
+            startup_name=f"{user.name}-{j}", funding=1000.0 * j, market_size=['Regional', 'Global'][j % 2],
+            ai_result={'score': j % 100}, user_id=user.id, created_at=now - datetime.timedelta(hours=j)
+        ) for j in range(ANALYSES_PER_USER))
+    db.session.commit()
+    target = StartupAnalysis.query.filter_by(user_id=users[0].id).first()
+    target.share_id = 'plan0001'
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+    return users[0].id, target.id
+
+
+def _record_statements(run):
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before)
+    return statements
+
+
+def _plan_problems(conn, statement, parameters):
+    """Plan lines that mean the statement does not use an index the way it should.
+
+    Full scans always fail. A sort only fails when there is no score range:
+    with one, the planner may rightly prefer (user_id, score) and sort the
+    few rows in range instead of walking the user's whole history in order.
+    """
+    sort_ok = 'score >=' in statement or 'score <=' in statement
+    if conn.dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        plan = [row[-1] for row in rows]
+        return [line for line in plan if line.startswith('SCAN ') or
+                ('TEMP B-TREE' in line and not sort_ok)], plan
+
+    # Postgres: forbid sequential scans so small test tables still show whether an index fits
+    conn.exec_driver_sql('SET enable_seqscan = off')
+    rows = conn.exec_driver_sql('EXPLAIN ' + statement, parameters).fetchall()
+    plan = [row[0] for row in rows]
+    return [line for line in plan if 'Seq Scan' in line or
+            (line.strip().lstrip('-> ').startswith('Sort') and not sort_ok)], plan
+
+
+def test_query_plans():
+    client = app.test_client()
+    with app.app_context():
+        user_id, analysis_id = _seed()
+    token = jwt.encode({'user_id': user_id, 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+                       app.config['SECRET_KEY'], algorithm='HS256')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def hot_routes():
+        first = client.get('/api/user/history?limit=10', headers=headers).get_json()
+        assert len(first['analyses']) == 10 and first['next_cursor']
+        client.get(f"/api/user/history?limit=10&cursor={first['next_cursor']}", headers=headers)
+        client.get('/api/user/history?min_score=20&max_score=60&market_size=Global', headers=headers)
+        assert client.get('/api/user/dashboard', headers=headers).status_code == 200
+        assert client.get(f'/api/user/history/{analysis_id}', headers=headers).status_code == 200
+        assert client.get('/api/shared/plan0001').status_code == 200
+        assert client.delete(f'/api/user/history/{analysis_id}', headers=headers).status_code == 200
+
+    with app.app_context():
+        statements = _record_statements(hot_routes)
+        assert statements, "no statements were recorded"
+        failures = []
+        with db.engine.connect() as conn:
+            for statement, parameters in statements:
+                problems, plan = _plan_problems(conn, statement, parameters)
+                if problems:
+                    failures.append(f"{' '.join(statement.split())}\n    plan: {plan}")
+        assert not failures, "Full scans / sorts in hot queries:\n" + "\n".join(failures)
+
+
+if __name__ == '__main__':
+    try:
+        test_query_plans()
+        print("✅ Query plans: every hot per-user query is served by an index")
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        raise SystemExit(1)
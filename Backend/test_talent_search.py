@@ -0,0 +1,130 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Exercises /api/search_talent against a local stand-in for the GitHub API
+# (no network, no token). Run directly (python test_talent_search.py) or
+# through pytest.
+DB_FILE = os.path.join(tempfile.mkdtemp(), 'talent_test.db')
+os.environ['DATABASE_URL'] = f"sqlite:///{DB_FILE}"
+
+from app import app
+from api import talent_routes
+
+PROFILE_DELAY = 0.2
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """Serves /search/users and /users/<login> with ETags, counting what it is asked."""
+    log = []
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        etag = f'"{abs(hash(url.path))}"'
+        cls = type(self)
+        cls.log.append((url.path, parse_qs(url.query), self.headers.get('If-None-Match')))
+
+        if url.path == '/search/users':
+            params = parse_qs(url.query)
+            page, per_page = int(params['page'][0]), int(params['per_page'][0])
+            base = f"http://127.0.0.1:{self.server.server_port}"
+            items = [{
+                'login': f"dev{page}_{i}",
+                'url': f"{base}/users/dev{page}_{i}",
+                'avatar_url': f"{base}/avatars/dev{page}_{i}",
+                'html_url': f"https://github.com/dev{page}_{i}",
+            } for i in range(per_page)]
+            return self._send(200, {'total_count': 1000, 'items': items}, etag)
+
+        if url.path.startswith('/users/'):
+            if self.headers.get('If-None-Match') == etag:
+                return self._send(304, etag=etag)
+            with cls.lock:
+                cls.in_flight += 1
+                cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            time.sleep(PROFILE_DELAY)
+            with cls.lock:
+                cls.in_flight -= 1
+            login = url.path.rsplit('/', 1)[-1]
+            return self._send(200, {'login': login, 'name': login.upper(), 'bio': 'Builds things'}, etag)
+
+        self._send(404, {'message': 'Not Found'})
+
+
+def _start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGitHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    talent_routes.GITHUB_API_URL = f"http://127.0.0.1:{server.server_port}"
+    return server
+
+
+def _search(client, **body):
+    response = client.post('/api/search_talent', json=dict({'skill': 'python'}, **body))
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_talent_search():
+    server = _start_server()
+    client = app.test_client()
+    ttls = talent_routes.PROFILE_TTL_SECONDS, talent_routes.SEARCH_TTL_SECONDS
+    try:
+        # 1. Profiles are fetched concurrently, not one after another
+        FakeGitHub.log.clear()
+        started = time.perf_counter()
+        users = _search(client, page=1, per_page=8)
+        elapsed = time.perf_counter() - started
+        assert [u['name'] for u in users] == [f"DEV1_{i}" for i in range(8)]
+        assert FakeGitHub.max_in_flight > 1
+        assert elapsed < 8 * PROFILE_DELAY / 2, f"took {elapsed:.2f}s"
+
+        # 2. page / per_page reach GitHub
+        search_calls = [q for path, q, _ in FakeGitHub.log if path == '/search/users']
+        assert search_calls[-1]['page'] == ['1'] and search_calls[-1]['per_page'] == ['8']
+        users = _search(client, page=2, per_page=3)
+        assert [u['name'] for u in users] == ['DEV2_0', 'DEV2_1', 'DEV2_2']
+
+        # 3. Within the TTL nothing goes over the wire
+        FakeGitHub.log.clear()
+        assert len(_search(client, page=2, per_page=3)) == 3
+        assert FakeGitHub.log == []
+
+        # 4. After the TTL, profiles are revalidated with If-None-Match and 304s reuse the cache
+        talent_routes.PROFILE_TTL_SECONDS = 0
+        talent_routes.SEARCH_TTL_SECONDS = 0
+        users = _search(client, page=2, per_page=3)
+        assert [u['name'] for u in users] == ['DEV2_0', 'DEV2_1', 'DEV2_2']
+        profile_calls = [etag for path, _, etag in FakeGitHub.log if path.startswith('/users/')]
+        assert len(profile_calls) == 3 and all(profile_calls)
+    finally:
+        talent_routes.PROFILE_TTL_SECONDS, talent_routes.SEARCH_TTL_SECONDS = ttls
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    try:
+        test_talent_search()
+        print("✅ Talent search: concurrent fetches, pagination and ETag cache all OK")
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        raise SystemExit(1)
@@ -134,11 +134,11 @@ const Dashboard = () => {
                       </p>
                     </div>
                     <div className={`text-lg font-bold px-3 py-1 rounded-lg ${
-                      (analysis.result?.score || 0) > 70 ? 'bg-emerald-900/40 text-emerald-400' :
-                      (analysis.result?.score || 0) > 40 ? 'bg-yellow-900/40 text-yellow-400' :
+                      (analysis.score ?? analysis.result?.score ?? 0) > 70 ? 'bg-emerald-900/40 text-emerald-400' :
+                      (analysis.score ?? analysis.result?.score ?? 0) > 40 ? 'bg-yellow-900/40 text-yellow-400' :
                       'bg-red-900/40 text-red-400'
                     }`}>
-                      {analysis.result?.score || 0}%
+                      {analysis.score ?? analysis.result?.score ?? 0}%
                     </div>
                   </div>
                 ))}
@@ -16,6 +16,9 @@ const History = () => {
   const [analyses, setAnalyses] = useState([]);
   const [loading, setLoading] = useState(true);
   const [expandedId, setExpandedId] = useState(null);
+  const [details, setDetails] = useState({});
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
 
   useEffect(() => {
@@ -26,19 +29,49 @@ const History = () => {
     fetchHistory();
   }, [user]);
 
-  const fetchHistory = async () => {
+  // History comes a page at a time; the cursor from the last page fetches the next one
+  const fetchHistory = async (cursor = null) => {
     try {
-      const response = await fetch(`${API_BASE}/api/user/history`, {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`${API_BASE}/api/user/history${query}`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
       if (response.ok) {
         const data = await response.json();
-        setAnalyses(data.analyses || []);
+        setAnalyses(prev => cursor ? [...prev, ...(data.analyses || [])] : (data.analyses || []));
+        setNextCursor(data.next_cursor || null);
       }
     } catch (err) {
       showToast('Failed to load history', 'error');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
+    }
+  };
+
+  const loadMore = () => {
+    setLoadingMore(true);
+    fetchHistory(nextCursor);
+  };
+
+  // The list only carries summaries; the full AI result is fetched on first expand
+  const toggleExpand = async (id) => {
+    if (expandedId === id) {
+      setExpandedId(null);
+      return;
+    }
+    setExpandedId(id);
+    if (details[id]) return;
+    try {
+      const response = await fetch(`${API_BASE}/api/user/history/${id}`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      if (response.ok) {
+        const data = await response.json();
+        setDetails(prev => ({ ...prev, [id]: data.result || {} }));
+      }
+    } catch (err) {
+      showToast('Failed to load analysis', 'error');
     }
   };
 
@@ -112,13 +145,13 @@ const History = () => {
                 {/* Summary Row */}
                 <div
                   className="flex items-center justify-between p-5 cursor-pointer"
-                  onClick={() => setExpandedId(expandedId === analysis.id ? null : analysis.id)}
+                  onClick={() => toggleExpand(analysis.id)}
                 >
                   <div className="flex-1 min-w-0">
                     <h3 className="text-white font-semibold truncate">{analysis.name || 'Untitled'}</h3>
                     <div className="flex flex-wrap items-center gap-3 mt-1 text-xs text-gray-500">
                       <span>{t('history.date')}: {new Date(analysis.date).toLocaleDateString()}</span>
-                      {analysis.result?.funding && (
+                      {analysis.funding > 0 && (
                         <span>{t('history.funding')}: ₹{Number(analysis.funding).toLocaleString('en-IN')}</span>
                       )}
                     </div>
@@ -126,11 +159,11 @@ const History = () => {
 
                   <div className="flex items-center gap-3">
                     <div className={`text-lg font-bold px-3 py-1 rounded-lg ${
-                      (analysis.result?.score || 0) > 70 ? 'bg-emerald-900/40 text-emerald-400' :
-                      (analysis.result?.score || 0) > 40 ? 'bg-yellow-900/40 text-yellow-400' :
+                      (analysis.score || 0) > 70 ? 'bg-emerald-900/40 text-emerald-400' :
+                      (analysis.score || 0) > 40 ? 'bg-yellow-900/40 text-yellow-400' :
                       'bg-red-900/40 text-red-400'
                     }`}>
-                      {analysis.result?.score || 0}%
+                      {analysis.score || 0}%
                     </div>
                     {expandedId === analysis.id ? (
                       <ChevronUp className="w-5 h-5 text-gray-500" />
@@ -144,18 +177,18 @@ const History = () => {
                 {expandedId === analysis.id && (
                   <div className="border-t border-gray-700 p-5 animate-fade-in-up">
                     <div className="space-y-4">
-                      {analysis.result?.analysis && (
+                      {details[analysis.id]?.analysis && (
                         <div>
                           <h4 className="text-sm font-bold text-blue-400 mb-1">AI Verdict</h4>
-                          <p className="text-gray-300 text-sm">{analysis.result.analysis}</p>
+                          <p className="text-gray-300 text-sm">{details[analysis.id].analysis}</p>
                         </div>
                       )}
 
-                      {analysis.result?.recommendations && (
+                      {details[analysis.id]?.recommendations && (
                         <div>
                           <h4 className="text-sm font-bold text-blue-400 mb-2">Recommendations</h4>
                           <ul className="space-y-1">
-                            {analysis.result.recommendations.map((rec, i) => (
+                            {details[analysis.id].recommendations.map((rec, i) => (
                               <li key={i} className="text-gray-400 text-sm flex gap-2">
                                 <span className="text-blue-500">•</span>
                                 {typeof rec === 'object' ? `${rec.title}: ${rec.tip || rec.content}` : rec}
@@ -181,6 +214,19 @@ const History = () => {
             ))}
           </div>
         )}
+
+        {/* Pagination */}
+        {nextCursor && (
+          <div className="flex justify-center mt-6">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-5 py-2 bg-gray-800 border border-gray-700 hover:border-blue-500 text-gray-300 rounded-lg text-sm font-medium transition-all"
+            >
+              {loadingMore ? t('common.loading') : t('history.loadMore')}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
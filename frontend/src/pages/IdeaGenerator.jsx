@@ -1,16 +1,28 @@
-import React, { useState } from 'react';
+import React, { useState, useContext } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 import { useUsageLimit } from '../hooks/useUsageLimit';
 import LimitModal from '../components/LimitModal';
+import { AuthContext } from '../context/AuthContext';
 
 const API_BASE = import.meta.env.VITE_API_URL || 'http://127.0.0.1:5000';
 
+// Stable per-browser ID so the backend's idea pool shows each visitor ideas they haven't seen
+const getClientId = () => {
+  let id = localStorage.getItem('startupiq_client_id');
+  if (!id) {
+    id = window.crypto?.randomUUID?.() || `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    localStorage.setItem('startupiq_client_id', id);
+  }
+  return id;
+};
+
 const IdeaGenerator = () => {
   const [keywords, setKeywords] = useState('');
   const [ideas, setIdeas] = useState([]);
   const [loading, setLoading] = useState(false);
   const navigate = useNavigate();
+  const { token } = useContext(AuthContext);
 
   const { checkAndIncrementUsage, showLimitModal, closeLimitModal } = useUsageLimit();
 
@@ -26,9 +38,11 @@ const IdeaGenerator = () => {
     setIdeas([]);
 
     try {
+      const headers = { 'X-Client-Id': getClientId() };
+      if (token) headers['Authorization'] = `Bearer ${token}`;
       const res = await axios.post(`${API_BASE}/api/generate_idea`, {
         topic: keywords
-      });
+      }, { headers });
       setIdeas(res.data);
     } catch (err) {
       console.error(err);